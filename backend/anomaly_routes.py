@@ -3,16 +3,17 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
 from services.anomaly_detection import AnomalyDetectionService
+from services.neo4j_driver import get_driver
 from config import settings
 import os
-from sqlalchemy import create_engine, Column, String, DateTime, JSON, Text
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.orm import Session
+from sqlalchemy import Column, String, DateTime, JSON, Text, func, select
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 router = APIRouter(prefix="/api/v1/anomalies", tags=["anomaly-detection"])
 
-# SQLAlchemy setup for cached anomalies
-DATABASE_URL = f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}/{settings.POSTGRES_DB}"
+# Async SQLAlchemy setup for cached anomalies, so queries don't block the event loop
+DATABASE_URL = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}/{settings.POSTGRES_DB}"
 Base = declarative_base()
 
 class Anomaly(Base):
@@ -27,39 +28,31 @@ class Anomaly(Base):
     recommended_actions = Column(JSON, nullable=True)
     entity_id = Column(String, nullable=True)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_async_engine(DATABASE_URL, pool_pre_ping=True)
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def get_anomaly_service():
-    neo4j_uri = settings.NEO4J_URI
-    neo4j_user = settings.NEO4J_USER
-    neo4j_password = settings.NEO4J_PASSWORD
-    
-    return AnomalyDetectionService(neo4j_uri, neo4j_user, neo4j_password)
+    return AnomalyDetectionService(driver=get_driver())
 
 @router.get("/all")
 async def get_all_historical_anomalies(
     limit: Optional[int] = Query(None, description="Limit number of results (default: no limit)"),
     offset: Optional[int] = Query(0, description="Offset for pagination"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all anomalies from the cached dataset with optional pagination"""
     try:
-        query = db.query(Anomaly)
-        total_count = query.count()
+        total_count = await db.scalar(select(func.count()).select_from(Anomaly))
         
         # Apply pagination
+        query = select(Anomaly).offset(offset)
         if limit:
-            paginated_anomalies = query.offset(offset).limit(limit).all()
-        else:
-            paginated_anomalies = query.offset(offset).all()
+            query = query.limit(limit)
+        paginated_anomalies = (await db.scalars(query)).all()
         
         # Convert to dicts
         anomalies_dict = [
@@ -97,7 +90,7 @@ async def get_all_historical_anomalies(
 async def get_anomalies_by_date_range(
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get anomalies within a specific date range from the cache"""
     try:
@@ -108,8 +101,8 @@ async def get_anomalies_by_date_range(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         
-        query = db.query(Anomaly).filter(Anomaly.timestamp >= start_dt, Anomaly.timestamp <= end_dt)
-        anomalies = query.all()
+        query = select(Anomaly).where(Anomaly.timestamp >= start_dt, Anomaly.timestamp <= end_dt)
+        anomalies = (await db.scalars(query)).all()
         
         anomalies_dict = [
             {
@@ -142,12 +135,12 @@ async def get_anomalies_by_date_range(
 @router.get("/by-location/{location}")
 async def get_anomalies_by_location(
     location: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get anomalies for a specific location from the cache"""
     try:
-        query = db.query(Anomaly).filter(Anomaly.location == location)
-        location_anomalies = query.all()
+        query = select(Anomaly).where(Anomaly.location == location)
+        location_anomalies = (await db.scalars(query)).all()
         
         anomalies_dict = [
             {
@@ -177,15 +170,15 @@ async def get_anomalies_by_location(
 @router.get("/by-severity/{severity}")
 async def get_anomalies_by_severity(
     severity: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get anomalies filtered by severity level from the cache"""
     try:
         if severity not in ['low', 'medium', 'high', 'critical']:
             raise HTTPException(status_code=400, detail="Severity must be one of: low, medium, high, critical")
         
-        query = db.query(Anomaly).filter(Anomaly.severity == severity)
-        severity_anomalies = query.all()
+        query = select(Anomaly).where(Anomaly.severity == severity)
+        severity_anomalies = (await db.scalars(query)).all()
         
         anomalies_dict = [
             {
@@ -215,11 +208,11 @@ async def get_anomalies_by_severity(
         raise HTTPException(status_code=500, detail=f"Error retrieving severity anomalies: {str(e)}")
 
 @router.get("/types")
-async def get_anomaly_types(db: Session = Depends(get_db)):
+async def get_anomaly_types(db: AsyncSession = Depends(get_db)):
     """Get list of all anomaly types from the cache"""
     try:
-        query = db.query(Anomaly.type).distinct()
-        types = [row[0] for row in query.all()]
+        query = select(Anomaly.type).distinct()
+        types = list((await db.scalars(query)).all())
         
         return {
             "success": True,
@@ -241,12 +234,11 @@ async def get_anomaly_types(db: Session = Depends(get_db)):
 
 @router.get("/summary")
 async def get_anomaly_summary(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get summary of anomalies by type and severity from the cache"""
     try:
-        query = db.query(Anomaly)
-        anomalies = query.all()
+        anomalies = (await db.scalars(select(Anomaly))).all()
         
         summary = {
             'total_anomalies': len(anomalies),
@@ -282,7 +274,9 @@ caching_in_progress = False
 
 @router.post("/cache-anomalies")
 
-async def trigger_cache_anomalies():
+async def trigger_cache_anomalies(
+    full_refresh: bool = Query(False, description="Re-detect every day instead of only days with new data")
+):
 
     """Endpoint to trigger the anomaly caching process in the background."""
 
@@ -298,13 +292,12 @@ async def trigger_cache_anomalies():
 
         global caching_in_progress
 
-        caching_in_progress = True
-
         try:
 
             from cache_anomalies import cache_anomalies
 
-            await cache_anomalies()
+            # The refresh is blocking Neo4j/PostgreSQL work; keep it off the event loop
+            await asyncio.to_thread(cache_anomalies, full_refresh)
 
         except Exception as e:
 
@@ -316,6 +309,7 @@ async def trigger_cache_anomalies():
 
 
 
+    caching_in_progress = True
     asyncio.create_task(run_caching())
 
     return {"success": True, "message": "Anomaly caching process started in the background."}
@@ -326,22 +320,19 @@ async def trigger_cache_anomalies():
 @router.get("/by-entity/{entity_id}")
 async def get_anomalies_by_entity(
     entity_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all anomalies for a specific entity from the cache"""
     try:
         # Although anomalies are cached, we might still want the latest entity profile from Neo4j
         from services.entity_anomaly_detection import EntityAnomalyDetectionService
-        neo4j_uri = settings.NEO4J_URI
-        neo4j_user = settings.NEO4J_USER
-        neo4j_password = settings.NEO4J_PASSWORD
-        entity_service = EntityAnomalyDetectionService(neo4j_uri, neo4j_user, neo4j_password)
-        entity_profile = entity_service.get_entity_profile(entity_id)
+        entity_service = EntityAnomalyDetectionService(driver=get_driver())
+        entity_profile = await entity_service.get_entity_profile_async(entity_id)
         if not entity_profile:
             raise HTTPException(status_code=404, detail=f"Entity '{entity_id}' not found")
 
-        query = db.query(Anomaly).filter(Anomaly.entity_id == entity_id)
-        entity_anomalies = query.all()
+        query = select(Anomaly).where(Anomaly.entity_id == entity_id)
+        entity_anomalies = (await db.scalars(query)).all()
 
         anomalies_dict = [
             {
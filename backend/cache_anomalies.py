@@ -1,9 +1,10 @@
 
-import asyncio
-import json
-from sqlalchemy import create_engine, Column, String, DateTime, JSON, Text
-from sqlalchemy.orm import sessionmaker, declarative_base
-from datetime import datetime
+import argparse
+from sqlalchemy import create_engine, Column, String, Date, DateTime, Integer, JSON, Text, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import declarative_base
+from datetime import datetime, timedelta
+from typing import Dict, List
 import logging
 
 # Setup logging
@@ -20,6 +21,8 @@ except ImportError:
 # Import anomaly detection services
 try:
     from services.anomaly_detection import AnomalyDetectionService
+    from services.neo4j_driver import get_driver
+    from services.anomaly_cache import day_ranges, day_start, days_to_refresh, detect_days, window_rows
 except ImportError:
     logger.error("Could not import AnomalyDetectionService. Ensure it exists and is accessible.")
     exit(1)
@@ -40,95 +43,106 @@ class Anomaly(Base):
     recommended_actions = Column(JSON, nullable=True)
     entity_id = Column(String, nullable=True)
 
-async def cache_anomalies():
+class AnomalyCacheWindow(Base):
+    """One cached day: the input fingerprint its anomalies were detected from"""
+    __tablename__ = 'anomaly_cache_windows'
+    day = Column(Date, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    anomaly_count = Column(Integer, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
+
+# Rows per multi-row INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 1000
+
+def upsert(conn, table, rows: List[Dict], key: str):
+    """Bulk INSERT ... ON CONFLICT (key) DO UPDATE in batches"""
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={column.name: stmt.excluded[column.name] for column in table.columns if column.name != key}
+    )
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        conn.execute(stmt, rows[i:i + UPSERT_BATCH_SIZE])
+
+def cache_anomalies(full_refresh: bool = False):
     """
-    Main function to fetch all historical anomalies and cache them in PostgreSQL.
+    Refresh the PostgreSQL anomaly cache from Neo4j, re-detecting only changed days
+
+    Each cached day stores a fingerprint of its input data. Anomalies are
+    always detected one fixed day at a time, so an incremental refresh writes
+    the same rows a full one would. Changed days and their neighbours are
+    re-detected and replaced in a single transaction, so readers see either
+    the old cache or the new one. Days where a detector failed keep their old
+    anomalies and are retried next time. full_refresh re-detects every day.
+    Blocking; async callers run it with asyncio.to_thread().
     """
     logger.info("Starting anomaly caching process...")
 
     # Initialize database connection
     try:
         engine = create_engine(DATABASE_URL)
-        # Drop and recreate the table to ensure schema is up to date
-        Base.metadata.drop_all(engine)
+        # Only creates missing tables; the cache is never dropped so readers always see one
         Base.metadata.create_all(engine)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        db = SessionLocal()
-        logger.info("Database connection successful and table created/verified.")
+        with engine.connect() as conn:
+            cached = {row.day: row.fingerprint for row in conn.execute(select(AnomalyCacheWindow))}
+        logger.info("Database connection successful and tables created/verified.")
     except Exception as e:
         logger.error(f"Error connecting to the database: {e}")
         return
 
     # Initialize anomaly detection service
     try:
-        anomaly_service = AnomalyDetectionService(
-            neo4j_uri=settings.NEO4J_URI,
-            neo4j_user=settings.NEO4J_USER,
-            neo4j_password=settings.NEO4J_PASSWORD
-        )
+        anomaly_service = AnomalyDetectionService(driver=get_driver())
         logger.info("AnomalyDetectionService initialized.")
     except Exception as e:
         logger.error(f"Error initializing AnomalyDetectionService: {e}")
-        db.close()
         return
 
     try:
-        # 1. Fetch all historical anomalies (including entity-specific ones)
-        logger.info("Fetching all historical anomalies...")
-        all_anomalies = anomaly_service.get_all_historical_anomalies()
-        logger.info(f"Fetched {len(all_anomalies)} anomalies in total.")
-
-        if not all_anomalies:
-            logger.info("No anomalies to cache.")
+        # 1. Find days whose input data (or a neighbouring day's) changed since they were cached
+        fingerprints = anomaly_service.get_daily_data_fingerprints()
+        days = days_to_refresh(fingerprints, cached, full_refresh)
+        if not days:
+            logger.info("Anomaly cache is up to date.")
+            return
+        logger.info(f"Re-detecting {len(days)} days...")
+
+        # 2. Detect each day as its own window; detectors run concurrently within a day
+        refreshed_days, rows = detect_days(
+            lambda day: anomaly_service.detect_all_anomalies_with_report(
+                start_date=day.isoformat(), end_date=day.isoformat()
+            ),
+            days
+        )
+        if not refreshed_days:
+            logger.warning("No days were refreshed.")
             return
 
-        # 2. Add new anomalies to the database
-        logger.info("Caching new anomalies...")
-        cached_count = 0
-        unique_ids = set()
-        for anomaly_data in all_anomalies:
-            anomaly_id = str(anomaly_data.get('id'))
-            if anomaly_id in unique_ids:
-                logger.warning(f"Duplicate anomaly ID found: {anomaly_id}. Skipping.")
-                continue
-            unique_ids.add(anomaly_id)
-
-            # Ensure timestamp is a datetime object
-            timestamp = anomaly_data.get('timestamp')
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                except ValueError:
-                    logger.warning(f"Could not parse timestamp string: {timestamp}. Skipping anomaly.")
-                    continue
-            
-            if not isinstance(timestamp, datetime):
-                 timestamp = datetime.now()
-
-            # Create Anomaly object
-            anomaly = Anomaly(
-                id=anomaly_id,
-                type=anomaly_data.get('type'),
-                location=anomaly_data.get('location'),
-                severity=anomaly_data.get('severity'),
-                timestamp=timestamp,
-                description=anomaly_data.get('description'),
-                details=anomaly_data.get('details'),
-                recommended_actions=anomaly_data.get('recommended_actions'),
-                entity_id=anomaly_data.get('entity_id')
-            )
-            db.add(anomaly)
-            cached_count += 1
-
-        db.commit()
-        logger.info(f"Successfully cached {cached_count} anomalies.")
+        # 3. Swap the refreshed days in one transaction
+        windows = window_rows(refreshed_days, rows, fingerprints, datetime.now())
+        with engine.begin() as conn:
+            if full_refresh and len(refreshed_days) == len(days):
+                conn.execute(delete(Anomaly))
+            else:
+                for first_day, last_day in day_ranges(refreshed_days):
+                    conn.execute(delete(Anomaly).where(
+                        Anomaly.timestamp >= day_start(first_day),
+                        Anomaly.timestamp < day_start(last_day + timedelta(days=1))
+                    ))
+            upsert(conn, Anomaly.__table__, rows, 'id')
+            # Days that no longer have any data are forgotten
+            conn.execute(delete(AnomalyCacheWindow).where(
+                AnomalyCacheWindow.day.in_([day for day in refreshed_days if day not in fingerprints])
+            ))
+            upsert(conn, AnomalyCacheWindow.__table__, windows, 'day')
+
+        logger.info(f"Successfully cached {len(rows)} anomalies for {len(refreshed_days)} days.")
 
     except Exception as e:
         logger.error(f"An error occurred during the caching process: {e}")
-        db.rollback()
-    finally:
-        db.close()
-        logger.info("Database connection closed.")
 
 if __name__ == "__main__":
-    asyncio.run(cache_anomalies())
+    parser = argparse.ArgumentParser(description="Refresh the PostgreSQL anomaly cache")
+    parser.add_argument('--full', action='store_true', help="Re-detect every day instead of only changed ones")
+    args = parser.parse_args()
+    cache_anomalies(full_refresh=args.full)
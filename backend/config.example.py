@@ -6,6 +6,9 @@ class Settings(BaseSettings):
     NEO4J_URI: str = "<neo4j-url>"
     NEO4J_USER: str = "<neo4j-user>"
     NEO4J_PASSWORD: str = "<neo4j-password>"
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = 50
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = 30.0
+    NEO4J_MAX_CONNECTION_LIFETIME: int = 3600
     POSTGRES_SERVER: str = "<postgres-server>"
     POSTGRES_USER: str = "<postgres-user>"
     POSTGRES_PASSWORD: str = "<postgres-password>"
@@ -1,11 +1,11 @@
 # backend/app/api/entity_routes.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from services.entity_resolver import get_resolver
-from services.confidence_scorer import ConfidenceScorer
-from models.entity import Entity
+from services.entity_resolver import PROFILE_IDENTIFIER_TYPES, get_resolver
+from models.entity import Entity, Observation
 
 router = APIRouter(prefix="/api/v1/entities", tags=["entities"])
 
@@ -19,6 +19,11 @@ class EntitySearchResponse(BaseModel):
     linked_entities: List[Entity]
     confidence: float
 
+class FuzzyBatchRequest(BaseModel):
+    names: List[str] = Field(..., min_length=1, max_length=50000)
+    threshold: float = Field(0.85, ge=0.0, le=1.0)
+    limit: int = Field(1, ge=1, le=10, description="Matches to return per name")
+
 @router.post("/search", response_model=EntitySearchResponse)
 async def search_entity(request: EntitySearchRequest):
     """Search for entity by identifier"""
@@ -67,6 +72,58 @@ async def fuzzy_search_by_name(
         ]
     }
 
+@router.post("/fuzzy-search/batch")
+async def fuzzy_search_batch(request: FuzzyBatchRequest):
+    """Fuzzy name search for many names at once, e.g. reconciling an external roster"""
+    resolver = get_resolver()
+    # CPU-bound scoring; keep it off the event loop
+    results = await run_in_threadpool(
+        resolver.resolve_batch_by_fuzzy_name, request.names, request.threshold, request.limit
+    )
+    
+    return {
+        "threshold": request.threshold,
+        "total": len(request.names),
+        "matched": sum(1 for matches in results if matches),
+        "results": [
+            {
+                "query": name,
+                "matches": [
+                    {
+                        "entity": match[0],
+                        "similarity": match[1]
+                    }
+                    for match in matches
+                ]
+            }
+            for name, matches in zip(request.names, results)
+        ]
+    }
+
+@router.post("/observations")
+async def observe_identifiers(observations: List[Observation] = Body(..., max_length=50000)):
+    """Feed identifiers seen in swipes, Wi-Fi, CCTV etc. into the live resolver"""
+    unknown = sorted({
+        id_type for observation in observations for id_type in observation.identifiers
+        if id_type not in PROFILE_IDENTIFIER_TYPES
+    })
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown identifier types: {', '.join(unknown)}. "
+                   f"Must be one of: {', '.join(PROFILE_IDENTIFIER_TYPES)}"
+        )
+
+    resolver = get_resolver()
+    results = await run_in_threadpool(resolver.observe, observations)
+    
+    return {
+        "processed": len(results),
+        "resolved": sum(1 for result in results if result['status'] == 'resolved'),
+        "conflicts": sum(len(result['conflicts']) for result in results),
+        "results": results
+    }
+
 @router.get("/{entity_id}")
 async def get_entity(entity_id: str):
     """Get entity by ID"""
@@ -87,26 +144,24 @@ async def get_entity(entity_id: str):
 
 @router.get("/")
 async def list_entities(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     department: Optional[str] = Query(None, description="Filter by department"),
     entity_type: Optional[str] = Query(None, description="Filter by role")
 ):
-    """List all entities"""
+    """List entities, filtered through precomputed indexes and paged by cursor or skip"""
     resolver = get_resolver()
-    entities = list(resolver.entities.values())
-    if department and entity_type:
-        entities = [e for e in entities if e.department == department and e.entity_type == entity_type][skip:skip+limit]
-    elif department:
-        entities = [e for e in entities if e.department == department][skip:skip+limit]
-    elif entity_type:
-        entities = [e for e in entities if e.entity_type == entity_type][skip:skip+limit]
-    else:
-        entities = entities[skip:skip+limit]
+    try:
+        entities, total, next_cursor = resolver.list_entities(department, entity_type, cursor, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     return {
-        "total": len(resolver.entities),
+        "total": total,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
         "entities": entities
     }
 
@@ -138,34 +193,8 @@ async def get_entity_fusion_report(entity_id: str):
             'last_seen': identifier.last_seen
         })
     
-    # Get linked entities with confidence scores
-    linked = resolver.resolve_transitive(entity_id)
-    linked_with_confidence = []
-    
-    for linked_entity in linked:
-        # Find shared identifiers
-        shared = []
-        for id1 in entity.identifiers:
-            for id2 in linked_entity.identifiers:
-                if id1.type == id2.type and id1.value == id2.value:
-                    shared.append(f"{id1.type}:{id1.value}")
-        
-        entity1_ids = [{'type': id.type, 'source': id.source} for id in entity.identifiers]
-        entity2_ids = [{'type': id.type, 'source': id.source} for id in linked_entity.identifiers]
-        
-        link_confidence = ConfidenceScorer.calculate_link_confidence(
-            entity1_ids, entity2_ids, shared
-        )
-        
-        linked_with_confidence.append({
-            'entity_id': linked_entity.entity_id,
-            'name': linked_entity.name,
-            'confidence': link_confidence,
-            'shared_identifiers': shared
-        })
-    
-    # Sort by confidence
-    linked_with_confidence.sort(key=lambda x: x['confidence'], reverse=True)
+    # Link scores are precomputed per cluster when the graph is built
+    linked_with_confidence = resolver.linked_with_confidence(entity_id)
     
     # Get provenance
     provenance = entity.get_provenance()
@@ -1,5 +1,6 @@
 # backend/app/api/graph_routes.py
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List
 from datetime import datetime, timedelta, timezone
 
@@ -21,7 +22,7 @@ async def get_entity_timeline(
     graph = get_graph_builder()
     
     try:
-        events = graph.get_entity_timeline(entity_id, start_date, end_date)
+        events = await graph.get_entity_timeline_async(entity_id, start_date, end_date)
         
         return {
             "entity_id": entity_id,
@@ -45,7 +46,7 @@ async def get_entities_at_location(
         timestamp = datetime.now(timezone.utc).isoformat()
     
     try:
-        entities = graph.find_entities_at_location(location_id, timestamp)
+        entities = await graph.find_entities_at_location_async(location_id, timestamp)
         
         return {
             "location_id": location_id,
@@ -64,7 +65,7 @@ async def get_missing_entities(
     graph = get_graph_builder()
     
     try:
-        missing = graph.find_missing_entities(hours)
+        missing = await graph.find_missing_entities_async(hours)
         
         return {
             "threshold_hours": hours,
@@ -79,25 +80,15 @@ async def get_graph_stats():
     """Get database statistics"""
     graph = get_graph_builder()
     
-    query = """
-    MATCH (e:Entity) WITH count(e) as entity_count
-    MATCH (ev:Event) WITH entity_count, count(ev) as event_count
-    MATCH (l:Location) WITH entity_count, event_count, count(l) as location_count
-    MATCH ()-[r:SAME_AS]->() WITH entity_count, event_count, location_count, count(r) as relationship_count
-    RETURN entity_count, event_count, location_count, relationship_count
-    """
-    
     try:
-        with graph.driver.session() as session:
-            result = session.run(query)
-            record = result.single()
-            
-            return {
-                "entities": record['entity_count'],
-                "events": record['event_count'],
-                "locations": record['location_count'],
-                "relationships": record['relationship_count']
-            }
+        record = await graph.get_graph_stats_async()
+        
+        return {
+            "entities": record['entity_count'],
+            "events": record['event_count'],
+            "locations": record['location_count'],
+            "relationships": record['relationship_count']
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -114,7 +105,8 @@ async def get_timeline_summary(
     timeline_service = TimelineService(graph)
     
     try:
-        summary = timeline_service.generate_summary(entity_id, start_date, end_date)
+        # Timeline analysis is pandas-heavy; keep it off the event loop
+        summary = await run_in_threadpool(timeline_service.generate_summary, entity_id, start_date, end_date)
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -133,7 +125,8 @@ async def get_timeline_with_gaps(
     timeline_service = TimelineService(graph)
     
     try:
-        result = timeline_service.get_timeline_with_gaps(
+        result = await run_in_threadpool(
+            timeline_service.get_timeline_with_gaps,
             entity_id, start_date, end_date, gap_threshold_hours
         )
         return result
@@ -152,7 +145,7 @@ async def get_activity_heatmap(
     timeline_service = TimelineService(graph)
     
     try:
-        heatmap = timeline_service.get_activity_heatmap(entity_id, days)
+        heatmap = await run_in_threadpool(timeline_service.get_activity_heatmap, entity_id, days)
         return heatmap
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -177,7 +170,7 @@ async def get_daily_summary(
     timeline_service = TimelineService(graph)
     
     try:
-        summary = timeline_service.generate_summary(entity_id, start_date, end_date)
+        summary = await run_in_threadpool(timeline_service.generate_summary, entity_id, start_date, end_date)
         return {
             'date': date,
             'entity_id': entity_id,
@@ -200,7 +193,7 @@ async def detect_activity_patterns(
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days)
     
-    events = graph.get_entity_timeline(
+    events = await graph.get_entity_timeline_async(
         entity_id,
         start_date.isoformat(),
         end_date.isoformat()
@@ -247,7 +240,7 @@ async def predict_location(
     
     # Get recent events
     start_date = target_datetime - timedelta(days=lookback_days)
-    events = graph.get_entity_timeline(
+    events = await graph.get_entity_timeline_async(
         entity_id,
         start_date.isoformat(),
         target_datetime.isoformat()
@@ -272,7 +265,7 @@ async def predict_location(
         else:
             # Train on-the-fly if no saved model
             print(f"Training new model for {entity_id}")
-            train_result = predictor.train(events)
+            train_result = await run_in_threadpool(predictor.train, events)
             if not train_result['success']:
                 # Fall back to rule-based
                 pass
@@ -308,7 +301,7 @@ async def predict_during_gap(
     lookback_start = gap_start_dt - timedelta(days=7)
     
     graph = get_graph_builder()
-    events = graph.get_entity_timeline(
+    events = await graph.get_entity_timeline_async(
         entity_id,
         lookback_start.isoformat(),
         gap_start
@@ -330,7 +323,7 @@ async def predict_during_gap(
         if model_path.exists():
             predictor.load_model(model_path)
         else:
-            train_result = predictor.train(events)
+            train_result = await run_in_threadpool(predictor.train, events)
             if not train_result['success']:
                 raise HTTPException(status_code=400, detail="Insufficient data for prediction")
         
@@ -1,12 +1,33 @@
 # backend/app/main.py - UPDATE THIS
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import logging
 import entity_routes, graph_routes, spatial_routes, anomaly_routes
+from services.fuzzy_index import close_pool
+from services.neo4j_driver import close_async_driver, close_driver, get_driver
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared Neo4j connection pool on startup and close all pools on shutdown"""
+    try:
+        get_driver().verify_connectivity()
+    except Exception as e:
+        # Keep serving; requests will retry through the pool once Neo4j is reachable
+        logger.warning(f"Neo4j not reachable at startup: {str(e)}")
+    yield
+    close_driver()
+    await close_async_driver()
+    await anomaly_routes.engine.dispose()
+    close_pool()
 
 app = FastAPI(
     title="Campus Entity Resolution API",
     description="API for campus security monitoring and entity tracking",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -27,6 +27,7 @@ class Entity(BaseModel):
     
     # Linking metadata
     linked_entity_ids: List[str] = []  # Other entity_ids this might be
+    cluster_id: Optional[str] = None  # Shared by all entities linked through identifiers
     confidence_score: float = Field(ge=0.0, le=1.0, default=1.0)
     
     # Provenance
@@ -35,15 +36,9 @@ class Entity(BaseModel):
     
     def recalculate_confidence(self):
         """Recalculate confidence score based on identifiers"""
-        identifier_dicts = [
-            {
-                'type': id.type,
-                'source': id.source,
-                'confidence': id.confidence
-            }
-            for id in self.identifiers
-        ]
-        self.confidence_score = ConfidenceScorer.calculate_entity_confidence(identifier_dicts)
+        self.confidence_score = ConfidenceScorer.entity_confidence_for(
+            tuple((id.type, id.source) for id in self.identifiers)
+        ) if self.identifiers else 0.0
         self.updated_at = datetime.now()
     
     def get_provenance(self) -> Dict[str, List[str]]:
@@ -72,6 +67,12 @@ class Entity(BaseModel):
             # Conflict - lower confidence
             self.confidence_score *= 0.9
 
+class Observation(BaseModel):
+    """Identifiers seen together in one record of a source dataset"""
+    identifiers: Dict[str, str]  # identifier type -> value, e.g. {"card_id": "C1234"}
+    source: str  # e.g. "swipes", "wifi", "cctv"
+    timestamp: datetime
+
 class ActivityEvent(BaseModel):
     """Single activity event from any source"""
     event_id: str
@@ -0,0 +1,99 @@
+# backend/scripts/benchmark_entity_store.py
+"""
+Compare the columnar EntityStore against a dict of pydantic Entity objects
+
+Builds both from the resolver's profiles (replicated --scale times with
+fresh ids for larger populations) and reports traced memory plus the cost
+of common lookups.
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.entity_resolver import EntityResolver
+from services.entity_store import EntityStore
+
+def traced(build):
+    """Return (value, bytes allocated while building it and still alive)"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6  # microseconds per call
+
+def scaled_entities(store: EntityStore, scale: int):
+    """Materialised entities, copied scale times under new ids"""
+    entities = {}
+    for copy in range(scale):
+        for entity_id in store:
+            entity = store[entity_id]
+            if copy:
+                entity.entity_id = f"{entity_id}-{copy}"
+            entities[entity.entity_id] = entity
+    return entities
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar entity store")
+    parser.add_argument('--data-dir', default=str(Path(__file__).parent.parent / "augmented"))
+    parser.add_argument('--scale', type=int, default=1, help="Replicate the profiles this many times")
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    resolver = EntityResolver(Path(args.data_dir))
+    resolver.build_entity_graph()
+
+    source = scaled_entities(resolver.entities, args.scale)
+    del resolver
+    # Drop the source objects from the measurement by rebuilding each side from scratch
+    entities, pydantic_bytes = traced(lambda: {k: e.model_copy(deep=True) for k, e in source.items()})
+    store, store_bytes = traced(lambda: EntityStore.from_entities(source.values()))
+
+    rng = random.Random(42)
+    ids = rng.choices(list(entities.keys()), k=args.lookups)
+    department = next(e.department for e in entities.values() if e.department)
+
+    def per_lookup(fn):
+        it = iter(ids)
+        return timed(lambda: fn(next(it)), len(ids))
+
+    results = [
+        ("get_identifier('card_id')",
+         per_lookup(lambda eid: entities[eid].get_identifier('card_id')),
+         per_lookup(lambda eid: store.get_identifier(eid, 'card_id'))),
+        ("attribute (name)",
+         per_lookup(lambda eid: entities[eid].name),
+         per_lookup(lambda eid: store.value(eid, 'name'))),
+        ("full Entity",
+         per_lookup(lambda eid: entities[eid]),
+         per_lookup(lambda eid: store[eid])),
+        (f"filter department={department}",
+         timed(lambda: [e for e in entities.values() if e.department == department], 20),
+         timed(lambda: store.positions_where('department', department), 20)),
+    ]
+
+    print("=" * 70)
+    print(f"📊 Entity store: {len(store)} entities, {len(store.identifier_value)} identifiers")
+    print("=" * 70)
+    print(f"  Memory, pydantic dict:  {pydantic_bytes / 1e6:8.1f} MB")
+    print(f"  Memory, EntityStore:    {store_bytes / 1e6:8.1f} MB  "
+          f"({pydantic_bytes / max(store_bytes, 1):.1f}x smaller)")
+    print(f"\n  {'Lookup':34} {'pydantic µs':>12} {'store µs':>12}")
+    for label, pydantic_us, store_us in results:
+        print(f"  {label:34} {pydantic_us:12.2f} {store_us:12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# backend/scripts/benchmark_fuzzy_search.py
+"""
+Compare the blocked fuzzy name index against a brute-force Levenshtein scan
+
+Names come from the profiles dataset, or are generated with --synthetic to
+test larger populations. Queries are sampled names with random typos; every
+query is checked for identical results from both paths, and the batch API
+(search_many) is timed over the same queries.
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+import Levenshtein
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.dataset_reader import read_dataset
+from services.fuzzy_index import FuzzyNameIndex
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Neha", "Vikram", "Ananya", "Arjun", "Kavya", "Ishaan", "Diya"]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Gupta", "Kumar", "Reddy", "Nair", "Iyer", "Das", "Bose"]
+
+def brute_force_search(names, name, threshold):
+    """The original scan: score every name"""
+    matches = []
+    for key, candidate in names:
+        if candidate:
+            ratio = Levenshtein.ratio(name.lower(), candidate.lower())
+            if ratio >= threshold:
+                matches.append((key, ratio))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+def with_typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(len(name))
+    edit = rng.choice(['insert', 'delete', 'replace'])
+    if edit == 'insert':
+        return name[:position] + rng.choice(string.ascii_lowercase) + name[position:]
+    if edit == 'delete':
+        return name[:position] + name[position + 1:]
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1:]
+
+def load_names(args, rng: random.Random):
+    if args.synthetic:
+        return [
+            (f"E{i:06d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(string.ascii_uppercase)}")
+            for i in range(args.synthetic)
+        ]
+    profiles = read_dataset(Path(args.data_dir), 'profiles')
+    return list(zip(profiles['entity_id'].astype(str), profiles['name'].fillna('')))
+
+def timed(fn, queries):
+    started = time.perf_counter()
+    results = [fn(query) for query in queries]
+    return results, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy name search")
+    parser.add_argument('--data-dir', default=str(Path(__file__).parent.parent / "augmented"))
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate this many names instead of reading profiles")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--threshold', type=float, default=0.85)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, help="Process pool size for the batch run (default: CPU count)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = load_names(args, rng)
+    named = [name for _, name in names if name]
+    queries = [with_typo(rng.choice(named), rng) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    index = FuzzyNameIndex(names)
+    build_seconds = time.perf_counter() - started
+
+    brute, brute_seconds = timed(lambda q: brute_force_search(names, q, args.threshold), queries)
+    blocked, blocked_seconds = timed(lambda q: index.search(q, args.threshold), queries)
+
+    started = time.perf_counter()
+    batch = index.search_many(queries, args.threshold, limit=None, max_workers=args.workers)
+    batch_seconds = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(brute, blocked) if a != b)
+    mismatches += sum(1 for a, b in zip(brute, batch) if a != b)
+    scored = sum(len(index.candidates(q.lower(), args.threshold)) for q in queries) / len(queries)
+
+    print("=" * 60)
+    print(f"📊 Fuzzy search: {len(index)} names, {len(queries)} queries, threshold {args.threshold}")
+    print("=" * 60)
+    print(f"  Index build:        {build_seconds:8.3f}s")
+    print(f"  Brute-force scan:   {brute_seconds:8.3f}s  ({len(index)} names scored per query)")
+    print(f"  Blocked index:      {blocked_seconds:8.3f}s  ({scored:.0f} names scored per query)")
+    print(f"  Batch (search_many):{batch_seconds:8.3f}s")
+    if blocked_seconds > 0:
+        print(f"  Speedup:            {brute_seconds / blocked_seconds:8.1f}x")
+    print(f"  Result mismatches:  {mismatches}")
+
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# backend/scripts/benchmark_ingestion.py
+"""
+Compare the neo4j-admin bulk import path against transactional ingestion
+
+The bulk path is timed as CSV conversion plus, when --neo4j-admin is given,
+the offline import itself (the target database must be stopped). The
+transactional path deletes everything in the configured Neo4j and then runs
+RealDataIngestion with --full-reload, so both paths are timed as a cold
+rebuild; only point it at a database you can overwrite.
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from ingest_real_data import RealDataIngestion
+from services.bulk_import import BulkImportExporter
+from config import settings
+
+def timed(label: str, fn):
+    print(f"\n⏱️  {label}...")
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+def clear_graph(driver):
+    """Delete every node and relationship in batches, leaving indexes and constraints"""
+    with driver.session() as session:
+        session.run("""
+            MATCH (n)
+            CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+        """).consume()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk import against transactional ingestion")
+    parser.add_argument('--data-dir', default=str(Path(__file__).parent.parent / "augmented"))
+    parser.add_argument('--export-dir', help="Where to write import files (default: temp dir)")
+    parser.add_argument('--neo4j-admin', help="Path to neo4j-admin; runs the offline import when set")
+    parser.add_argument('--database', default='neo4j')
+    parser.add_argument('--transactional', action='store_true',
+                        help="Also run the transactional path against settings.NEO4J_URI")
+    args = parser.parse_args()
+
+    export_dir = args.export_dir or tempfile.mkdtemp(prefix="neo4j_import_")
+    results = []
+
+    with RealDataIngestion(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD,
+                           args.data_dir, full_reload=True) as ingestion:
+        exporter = BulkImportExporter(ingestion.data_dir, Path(export_dir), ingestion.ap_to_zone)
+        counts, seconds = timed("Bulk export (CSV conversion)", exporter.export)
+        rows = sum(counts.values())
+        results.append(("bulk: export", seconds))
+
+        if args.neo4j_admin:
+            command = exporter.import_command(args.database, neo4j_admin=args.neo4j_admin)
+            _, seconds = timed("neo4j-admin import", lambda: subprocess.run(command, check=True))
+            results.append(("bulk: neo4j-admin import", seconds))
+
+        if args.transactional:
+            # Start from an empty graph, not one already populated by an earlier run
+            print("\n🧹 Clearing the graph before the transactional run...")
+            clear_graph(ingestion.driver)
+            _, seconds = timed("Transactional ingestion", ingestion.execute_ingestion)
+            results.append(("transactional", seconds))
+
+    print("\n" + "=" * 60)
+    print(f"📊 Results ({rows} nodes + relationships)")
+    print("=" * 60)
+    bulk_total = sum(seconds for name, seconds in results if name.startswith("bulk"))
+    for name, seconds in results + [("bulk: total", bulk_total)]:
+        print(f"  {name:<28} {seconds:8.1f}s  {rows / max(seconds, 1e-9):>12,.0f} rows/sec")
+
+    transactional = dict(results).get("transactional")
+    if transactional and args.neo4j_admin:
+        print(f"\n  Bulk import is {transactional / max(bulk_total, 1e-9):.1f}x faster end to end")
+
+if __name__ == "__main__":
+    main()
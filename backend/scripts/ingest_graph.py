@@ -7,8 +7,9 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from services.entity_resolver import EntityResolver
 from services.graph_builder import CampusGraphBuilder
+from services.ingestion_pipeline import IngestionPipeline
+from services.dataset_reader import iter_dataset_chunks
 from config import settings
-import pandas as pd
 
 # backend/scripts/ingest_graph.py - SIMPLIFIED VERSION
 
@@ -46,41 +47,33 @@ def main():
     
     # Step 5: Enrich with role (if not already in entity_type)
     print("\n📊 Step 5: Enriching Profile Metadata")
-    profiles_df = pd.read_csv(data_dir / "student_staff_profiles.csv")
-    graph.create_profile_metadata(profiles_df)
+    graph.create_profile_metadata(resolver.profiles)
+    
+    # Resolve card_id/device_hash/face_id in memory instead of per-event lookups
+    graph.load_identifier_map(resolver)
     
     # Step 6: Ingest events
     print("\n📊 Step 6: Ingesting Events")
     
-    # Load all datasets
-    swipes_df = pd.read_csv(data_dir / "campus_card_swipes_augmented.csv")
-    wifi_df = pd.read_csv(data_dir / "wifi_associations_logs_augmented.csv")
-    library_df = pd.read_csv(data_dir / "library_checkouts_augmented.csv")
-    bookings_df = pd.read_csv(data_dir / "lab_bookings_augmented.csv")
-    cctv_df = pd.read_csv(data_dir / "cctv_frames_augmented.csv")
-    helpdesk_df = pd.read_csv(data_dir / "helpdesk_augmented.csv")
-    
-    # How many events to ingest?
+    # How many events to ingest, and how many rows per UNWIND batch?
     event_limit = 40000
-    print(f"\n⚙️  Ingesting up to {event_limit} events from each dataset...")
-    
-    print("\n1️⃣  Ingesting card swipes...")
-    graph.ingest_swipe_events(swipes_df.head(event_limit))
-    
-    print("\n2️⃣  Ingesting Wi-Fi connections...")
-    graph.ingest_wifi_events(wifi_df.head(event_limit))
-    
-    print("\n3️⃣  Ingesting library checkouts...")
-    graph.ingest_library_events(library_df.head(event_limit))
-    
-    print("\n4️⃣  Ingesting room bookings...")
-    graph.ingest_booking_events(bookings_df.head(event_limit))
-    
-    print("\n5️⃣  Ingesting CCTV sightings...")
-    graph.ingest_cctv_events(cctv_df.head(event_limit))
-    
-    print("\n6️⃣  Ingesting helpdesk tickets...")
-    graph.ingest_helpdesk_events(helpdesk_df.head(event_limit))
+    graph.batch_size = 5000
+    print(f"\n⚙️  Ingesting up to {event_limit} events from each dataset "
+          f"in batches of {graph.batch_size}...")
+    
+    # Stream each dataset in chunks so memory stays flat regardless of file size
+    def stream(dataset):
+        return iter_dataset_chunks(data_dir, dataset, chunk_size=graph.batch_size, nrows=event_limit)
+    
+    # Each source writes its own events, so the loaders can run concurrently
+    pipeline = IngestionPipeline(max_workers=4)
+    pipeline.add_stage("card swipes", graph.ingest_swipe_events, stream('swipes'))
+    pipeline.add_stage("Wi-Fi connections", graph.ingest_wifi_events, stream('wifi'))
+    pipeline.add_stage("library checkouts", graph.ingest_library_events, stream('library'))
+    pipeline.add_stage("room bookings", graph.ingest_booking_events, stream('bookings'))
+    pipeline.add_stage("CCTV sightings", graph.ingest_cctv_events, stream('cctv'))
+    pipeline.add_stage("helpdesk tickets", graph.ingest_helpdesk_events, stream('helpdesk'))
+    pipeline.run()
     
     print("\n" + "="*60)
     print("✅ Ingestion Complete!")
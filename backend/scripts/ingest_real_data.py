@@ -5,38 +5,40 @@ This script creates Entity nodes and links them to Zone activities
 """
 
 from neo4j import GraphDatabase
-import csv
+import argparse
+import sys
 from datetime import datetime
 from pathlib import Path
 import logging
 
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.bulk_import import BulkImportExporter
+from services.campus_zones import AP_TO_ZONE
+from services.dataset_reader import dataset_path, iter_dataset_records
+from services.ingestion_pipeline import IngestionPipeline
+from services.ingestion_state import IngestionWatermarkStore
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class RealDataIngestion:
-    def __init__(self, uri: str, user: str, password: str, data_dir: str):
+    def __init__(self, uri: str, user: str, password: str, data_dir: str,
+                 max_workers: int = 4, batch_size: int = 1000, full_reload: bool = False,
+                 include_presence: bool = False):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
         self.data_dir = Path(data_dir)
+        self.max_workers = max_workers
+        # Rows per streamed CSV chunk and per UNWIND write
+        self.batch_size = batch_size
+        # Ignore stored watermarks and reload every dataset from the first row
+        self.full_reload = full_reload
+        self.watermarks = IngestionWatermarkStore(self.driver)
+        # Also count distinct WiFi/CCTV presence per hourly bucket
+        self.include_presence = include_presence
 
         # Zone to WiFi AP mapping
-        self.ap_to_zone = {
-            'AP_ADMIN_1': 'ADMIN_LOBBY', 'AP_ADMIN_2': 'ADMIN_LOBBY', 'AP_ADMIN_3': 'ADMIN_LOBBY',
-            'AP_ADMIN_4': 'ADMIN_LOBBY', 'AP_ADMIN_5': 'ADMIN_LOBBY',
-            'AP_AUD_1': 'AUDITORIUM', 'AP_AUD_2': 'AUDITORIUM', 'AP_AUD_3': 'AUDITORIUM',
-            'AP_AUD_4': 'AUDITORIUM', 'AP_AUD_5': 'AUDITORIUM',
-            'AP_CAF_1': 'CAF_01', 'AP_CAF_2': 'CAF_01', 'AP_CAF_3': 'CAF_01',
-            'AP_CAF_4': 'CAF_01', 'AP_CAF_5': 'CAF_01',
-            'AP_LAB_1': 'LAB_101', 'AP_LAB_2': 'LAB_101',
-            'AP_LAB_3': 'LAB_102', 'AP_LAB_4': 'LAB_305', 'AP_LAB_5': 'LAB_305',
-            'AP_LIB_1': 'LIB_ENT', 'AP_LIB_2': 'LIB_ENT', 'AP_LIB_3': 'LIB_ENT',
-            'AP_LIB_4': 'LIB_ENT', 'AP_LIB_5': 'LIB_ENT',
-            'AP_GYM_1': 'GYM', 'AP_GYM_2': 'GYM',
-            'AP_HOSTEL_1': 'HOSTEL_GATE', 'AP_HOSTEL_2': 'HOSTEL_GATE',
-            'AP_HOSTEL_3': 'HOSTEL_GATE', 'AP_HOSTEL_4': 'HOSTEL_GATE', 'AP_HOSTEL_5': 'HOSTEL_GATE',
-            'AP_ENG_1': 'LAB_102', 'AP_ENG_2': 'LAB_102', 'AP_ENG_3': 'LAB_305',
-            'AP_ENG_4': 'LAB_305', 'AP_ENG_5': 'LAB_102',
-            'AP_SEM_1': 'SEM_01'
-        }
+        self.ap_to_zone = dict(AP_TO_ZONE)
 
     def __enter__(self):
         return self
@@ -51,25 +53,19 @@ class RealDataIngestion:
         print("=" * 80)
 
         try:
+            self.watermarks.ensure_schema()
+            self._create_activity_indexes()
+            if self.full_reload:
+                self.watermarks.reset()
+
             # Step 1: Ingest Entities
             self._ingest_entities()
 
-            # Step 2: Ingest Card Swipes
-            self._ingest_card_swipes()
-
-            # Step 3: Ingest WiFi Associations
-            self._ingest_wifi_logs()
-
-            # Step 4: Ingest CCTV Frames
-            self._ingest_cctv_frames()
-
-            # Step 5: Ingest Library Checkouts
-            self._ingest_library_checkouts()
-
-            # Step 6: Ingest Lab Bookings
-            self._ingest_lab_bookings()
+            # Steps 2-6: Ingest event sources concurrently - each one writes
+            # its own relationship type
+            self._ingest_event_sources()
 
-            # Step 7: Create hourly occupancy aggregations
+            # Step 7: Refresh hourly occupancy for the buckets this run touched
             self._create_occupancy_aggregations()
 
             # Step 8: Verify
@@ -86,25 +82,48 @@ class RealDataIngestion:
             traceback.print_exc()
             return False
 
-    def _ingest_entities(self):
-        """Ingest student/staff profiles as Entity nodes"""
-        print("\n📋 Ingesting Entities...")
-
-        csv_path = self.data_dir / "student_staff_profiles.csv"
+    def export_bulk_import(self, output_dir: str, database: str = 'neo4j') -> dict:
+        """Convert the CSVs into neo4j-admin import files for an offline cold rebuild"""
+        print("\n" + "=" * 80)
+        print("BULK IMPORT EXPORT")
+        print("=" * 80)
 
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            entities = list(reader)
+        exporter = BulkImportExporter(self.data_dir, Path(output_dir), self.ap_to_zone,
+                                      chunk_size=max(self.batch_size, 10000))
+        counts = exporter.export()
 
-        logger.info(f"Found {len(entities)} entities to ingest")
+        print(f"\n✅ Import files written to {output_dir}")
+        print("\nStop the database, then run:")
+        print("  " + " \\\n    ".join(exporter.import_command(database)))
+        print("\nAfterwards start the database and run this script with --mode aggregate")
+        return counts
 
+    def rebuild_occupancy_aggregations(self):
+        """Aggregate every zone/hour bucket in the graph, e.g. after a bulk import"""
+        self.watermarks.ensure_schema()
+        self._create_activity_indexes()
         with self.driver.session() as session:
-            # Batch insert for performance
-            batch_size = 1000
-            for i in range(0, len(entities), batch_size):
-                batch = entities[i:i+batch_size]
+            presence_types = ['CONNECTED_TO_WIFI', 'DETECTED_IN'] if self.include_presence else []
+            result = session.run("""
+                MATCH (:Entity)-[r]->(z:Zone)
+                WHERE type(r) = 'SWIPED_CARD' OR type(r) IN $presence_types
+                RETURN DISTINCT z.zone_id as zone_id,
+                       toString(date(r.timestamp)) as date,
+                       r.timestamp.hour as hour
+            """, presence_types=presence_types)
+            buckets = [(record['zone_id'], record['date'], record['hour']) for record in result]
+        self.watermarks.add_pending_buckets(buckets)
+        self._create_occupancy_aggregations()
 
-                session.run("""
+    def _ingest_entities(self):
+        """Ingest student/staff profiles as Entity nodes"""
+        print("\n📋 Ingesting Entities...")
+
+        ingested = 0
+        with self.driver.session() as session:
+            # Batch insert for performance, streaming the CSV chunk by chunk
+            for batch in self._iter_new_batches('profiles'):
+                self._write_batch(session, """
                     UNWIND $entities AS entity
                     MERGE (e:Entity {entity_id: entity.entity_id})
                     SET e.name = entity.name,
@@ -119,222 +138,267 @@ class RealDataIngestion:
                         e.ingested_at = datetime()
                 """, {'entities': batch})
 
-                logger.info(f"  Ingested {min(i+batch_size, len(entities))}/{len(entities)} entities")
-
-        print(f"  ✅ Ingested {len(entities)} entities")
+                ingested += len(batch)
+                logger.info(f"  Ingested {ingested} entities")
+
+        print(f"  ✅ Ingested {ingested} entities")
+
+    def _ingest_event_sources(self):
+        """Run the per-source loaders on a bounded worker pool"""
+        pipeline = IngestionPipeline(max_workers=self.max_workers)
+        pipeline.add_stage("card swipes", self._ingest_card_swipes)
+        pipeline.add_stage("WiFi logs", self._ingest_wifi_logs)
+        pipeline.add_stage("CCTV frames", self._ingest_cctv_frames)
+        pipeline.add_stage("library checkouts", self._ingest_library_checkouts)
+        pipeline.add_stage("lab bookings", self._ingest_lab_bookings)
+        results = pipeline.run()
+
+        failed = [result['stage'] for result in results if result['status'] == 'failed']
+        if failed:
+            raise RuntimeError(f"Ingestion stages failed: {', '.join(failed)}")
+
+    @staticmethod
+    def _write_batch(session, query: str, params: dict):
+        """Write one batch in a managed transaction so transient deadlocks are retried"""
+        session.execute_write(lambda tx: tx.run(query, params).consume())
+
+    def _create_activity_indexes(self):
+        """Index activity timestamps and aggregation buckets used by the incremental aggregation"""
+        indexes = [
+            "CREATE INDEX swiped_card_timestamp IF NOT EXISTS FOR ()-[s:SWIPED_CARD]-() ON (s.timestamp)",
+            "CREATE INDEX wifi_timestamp IF NOT EXISTS FOR ()-[w:CONNECTED_TO_WIFI]-() ON (w.timestamp)",
+            "CREATE INDEX detected_in_timestamp IF NOT EXISTS FOR ()-[d:DETECTED_IN]-() ON (d.timestamp)",
+            "CREATE INDEX spatial_activity_bucket IF NOT EXISTS "
+            "FOR (sa:SpatialActivity) ON (sa.zone_id, sa.date, sa.hour)",
+        ]
+        with self.driver.session() as session:
+            for index_query in indexes:
+                session.run(index_query)
+
+    def _track_buckets(self, rows: list, zone_field: str):
+        """
+        Queue the hourly (zone, date, hour) buckets a batch of rows falls into
+
+        Runs after the batch is written and before _iter_new_batches advances
+        its watermark, so the buckets of every loaded row survive a failed or
+        crashed run until _create_occupancy_aggregations handles them.
+        """
+        buckets = set()
+        for row in rows:
+            try:
+                ts = datetime.fromisoformat(row['timestamp'])
+            except (TypeError, ValueError):
+                continue
+            buckets.add((row[zone_field], ts.date().isoformat(), ts.hour))
+
+        self.watermarks.add_pending_buckets(buckets)
+
+    def _iter_new_batches(self, dataset: str, timestamp_field: str = None):
+        """
+        Stream only the rows of a dataset past its stored watermark
+
+        The watermark is advanced when the caller asks for the next batch, i.e.
+        after the previous one has been written, so a crashed run resumes at
+        the last committed batch. Writes are MERGEs, so replaying that batch
+        is harmless.
+        """
+        path = dataset_path(self.data_dir, dataset)
+        start_row, reason, fingerprint = self.watermarks.plan(dataset, path)
+        if start_row is None:
+            logger.info(f"  {dataset}: {reason}, skipping")
+            return
+        logger.info(f"  {dataset}: {reason}, starting at row {start_row}")
+
+        row_offset = start_row
+        last_timestamp = fingerprint.get('last_timestamp')
+        for batch in iter_dataset_records(self.data_dir, dataset,
+                                          chunk_size=self.batch_size, skip_rows=start_row):
+            yield batch
+
+            row_offset += len(batch)
+            if timestamp_field:
+                timestamps = [row[timestamp_field] for row in batch if row[timestamp_field]]
+                if timestamps:
+                    last_timestamp = max(timestamps + ([last_timestamp] if last_timestamp else []))
+            self.watermarks.save(dataset, row_offset, last_timestamp, fingerprint['head_checksum'],
+                                 loaded_bytes=fingerprint['loaded_bytes'],
+                                 loaded_checksum=fingerprint['loaded_checksum'])
+
+        # Whole file loaded - record its checksum so an unchanged file is skipped next time
+        self.watermarks.save(dataset, row_offset, last_timestamp,
+                             fingerprint['head_checksum'], fingerprint['file_checksum'],
+                             loaded_bytes=fingerprint['loaded_bytes'],
+                             loaded_checksum=fingerprint['loaded_checksum'])
 
     def _ingest_card_swipes(self):
         """Ingest card swipes and link to entities and zones"""
         print("\n💳 Ingesting Card Swipes...")
 
-        csv_path = self.data_dir / "campus_card_swipes_augmented.csv"
-
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            swipes = list(reader)
-
-        logger.info(f"Found {len(swipes)} card swipes to ingest")
-
+        ingested = 0
         with self.driver.session() as session:
-            batch_size = 1000
-            for i in range(0, len(swipes), batch_size):
-                batch = swipes[i:i+batch_size]
-
-                session.run("""
+            for batch in self._iter_new_batches('swipes', 'timestamp'):
+                self._write_batch(session, """
                     UNWIND $swipes AS swipe
                     MATCH (e:Entity {card_id: swipe.card_id})
                     MATCH (z:Zone {zone_id: swipe.location_id})
-                    CREATE (e)-[:SWIPED_CARD {
+                    MERGE (e)-[:SWIPED_CARD {
                         timestamp: datetime(swipe.timestamp),
                         location_id: swipe.location_id
                     }]->(z)
                 """, {'swipes': batch})
+                self._track_buckets(batch, 'location_id')
 
-                logger.info(f"  Ingested {min(i+batch_size, len(swipes))}/{len(swipes)} card swipes")
+                ingested += len(batch)
+                logger.info(f"  Ingested {ingested} card swipes")
 
-        print(f"  ✅ Ingested {len(swipes)} card swipes")
+        print(f"  ✅ Ingested {ingested} card swipes")
 
     def _ingest_wifi_logs(self):
         """Ingest WiFi associations and link to entities and zones"""
         print("\n📶 Ingesting WiFi Logs...")
 
-        csv_path = self.data_dir / "wifi_associations_logs_augmented.csv"
-
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            logs = list(reader)
-
-        logger.info(f"Found {len(logs)} WiFi logs to ingest")
-
-        # Map AP to Zone and prepare data
-        enhanced_logs = []
-        for log in logs:
-            zone_id = self.ap_to_zone.get(log['ap_id'])
-            if zone_id:
-                enhanced_logs.append({
-                    'device_hash': log['device_hash'],
-                    'ap_id': log['ap_id'],
-                    'zone_id': zone_id,
-                    'timestamp': log['timestamp']
-                })
-
-        logger.info(f"Mapped {len(enhanced_logs)} WiFi logs to zones")
-
+        read = 0
+        ingested = 0
         with self.driver.session() as session:
-            batch_size = 1000
-            for i in range(0, len(enhanced_logs), batch_size):
-                batch = enhanced_logs[i:i+batch_size]
-
-                session.run("""
+            for logs in self._iter_new_batches('wifi', 'timestamp'):
+                read += len(logs)
+
+                # Map AP to Zone and prepare data
+                enhanced_logs = []
+                for log in logs:
+                    zone_id = self.ap_to_zone.get(log['ap_id'])
+                    if zone_id:
+                        enhanced_logs.append({
+                            'device_hash': log['device_hash'],
+                            'ap_id': log['ap_id'],
+                            'zone_id': zone_id,
+                            'timestamp': log['timestamp']
+                        })
+
+                self._write_batch(session, """
                     UNWIND $logs AS log
                     MATCH (e:Entity {device_hash: log.device_hash})
                     MATCH (z:Zone {zone_id: log.zone_id})
-                    CREATE (e)-[:CONNECTED_TO_WIFI {
+                    MERGE (e)-[r:CONNECTED_TO_WIFI {
                         timestamp: datetime(log.timestamp),
-                        ap_id: log.ap_id,
-                        zone_id: log.zone_id
+                        ap_id: log.ap_id
                     }]->(z)
-                """, {'logs': batch})
+                    SET r.zone_id = log.zone_id
+                """, {'logs': enhanced_logs})
+                if self.include_presence:
+                    self._track_buckets(enhanced_logs, 'zone_id')
 
-                logger.info(f"  Ingested {min(i+batch_size, len(enhanced_logs))}/{len(enhanced_logs)} WiFi logs")
+                ingested += len(enhanced_logs)
+                logger.info(f"  Ingested {ingested}/{read} WiFi logs mapped to zones")
 
-        print(f"  ✅ Ingested {len(enhanced_logs)} WiFi associations")
+        print(f"  ✅ Ingested {ingested} WiFi associations")
 
     def _ingest_cctv_frames(self):
         """Ingest CCTV detections and link to entities and zones"""
         print("\n📹 Ingesting CCTV Frames...")
 
-        csv_path = self.data_dir / "cctv_frames_augmented.csv"
-
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            frames = list(reader)
-
-        logger.info(f"Found {len(frames)} CCTV frames to ingest")
-
-        # Only process frames with face_id
-        frames_with_faces = [f for f in frames if f['face_id']]
-        logger.info(f"  {len(frames_with_faces)} frames have face detections")
-
+        read = 0
+        ingested = 0
         with self.driver.session() as session:
-            batch_size = 1000
-            for i in range(0, len(frames_with_faces), batch_size):
-                batch = frames_with_faces[i:i+batch_size]
+            for frames in self._iter_new_batches('cctv', 'timestamp'):
+                read += len(frames)
+
+                # Only process frames with face_id
+                frames_with_faces = [f for f in frames if f['face_id']]
 
-                session.run("""
+                self._write_batch(session, """
                     UNWIND $frames AS frame
                     MATCH (e:Entity {face_id: frame.face_id})
                     MATCH (z:Zone {zone_id: frame.location_id})
-                    CREATE (e)-[:DETECTED_IN {
-                        timestamp: datetime(frame.timestamp),
-                        frame_id: frame.frame_id,
-                        face_id: frame.face_id,
-                        location_id: frame.location_id
-                    }]->(z)
-                """, {'frames': batch})
+                    MERGE (e)-[r:DETECTED_IN {frame_id: frame.frame_id}]->(z)
+                    SET r.timestamp = datetime(frame.timestamp),
+                        r.face_id = frame.face_id,
+                        r.location_id = frame.location_id
+                """, {'frames': frames_with_faces})
+                if self.include_presence:
+                    self._track_buckets(frames_with_faces, 'location_id')
 
-                logger.info(f"  Ingested {min(i+batch_size, len(frames_with_faces))}/{len(frames_with_faces)} CCTV detections")
+                ingested += len(frames_with_faces)
+                logger.info(f"  Ingested {ingested}/{read} CCTV frames with face detections")
 
-        print(f"  ✅ Ingested {len(frames_with_faces)} CCTV detections")
+        print(f"  ✅ Ingested {ingested} CCTV detections")
 
     def _ingest_library_checkouts(self):
         """Ingest library checkouts"""
         print("\n📚 Ingesting Library Checkouts...")
 
-        csv_path = self.data_dir / "library_checkouts_augmented.csv"
-
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            checkouts = list(reader)
-
-        logger.info(f"Found {len(checkouts)} library checkouts")
-
+        ingested = 0
         with self.driver.session() as session:
-            batch_size = 1000
-            for i in range(0, len(checkouts), batch_size):
-                batch = checkouts[i:i+batch_size]
-
-                session.run("""
+            for batch in self._iter_new_batches('library', 'timestamp'):
+                self._write_batch(session, """
                     UNWIND $checkouts AS checkout
                     MATCH (e:Entity {entity_id: checkout.entity_id})
-                    CREATE (e)-[:CHECKED_OUT_BOOK {
-                        timestamp: datetime(checkout.timestamp),
-                        checkout_id: checkout.checkout_id,
-                        book_id: checkout.book_id
-                    }]->(:Book {book_id: checkout.book_id})
+                    MERGE (b:Book {book_id: checkout.book_id})
+                    MERGE (e)-[r:CHECKED_OUT_BOOK {checkout_id: checkout.checkout_id}]->(b)
+                    SET r.timestamp = datetime(checkout.timestamp),
+                        r.book_id = checkout.book_id
                 """, {'checkouts': batch})
 
-                logger.info(f"  Ingested {min(i+batch_size, len(checkouts))}/{len(checkouts)} checkouts")
+                ingested += len(batch)
+                logger.info(f"  Ingested {ingested} checkouts")
 
-        print(f"  ✅ Ingested {len(checkouts)} library checkouts")
+        print(f"  ✅ Ingested {ingested} library checkouts")
 
     def _ingest_lab_bookings(self):
         """Ingest lab/room bookings"""
         print("\n🔬 Ingesting Lab Bookings...")
 
-        csv_path = self.data_dir / "lab_bookings_augmented.csv"
-
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            bookings = list(reader)
-
-        logger.info(f"Found {len(bookings)} lab bookings")
-
+        ingested = 0
         with self.driver.session() as session:
-            batch_size = 1000
-            for i in range(0, len(bookings), batch_size):
-                batch = bookings[i:i+batch_size]
-
+            for batch in self._iter_new_batches('bookings', 'start_time'):
                 # Create bookings - link to zone if exists, otherwise create placeholder
-                session.run("""
+                self._write_batch(session, """
                     UNWIND $bookings AS booking
                     MATCH (e:Entity {entity_id: booking.entity_id})
                     MERGE (z:Zone {zone_id: booking.room_id})
                     ON CREATE SET z.name = booking.room_id,
                                   z.is_placeholder = true,
                                   z.capacity = 30
-                    CREATE (e)-[:BOOKED_ROOM {
-                        booking_id: booking.booking_id,
-                        start_time: datetime(booking.start_time),
-                        end_time: datetime(booking.end_time),
-                        attended: booking.attended,
-                        room_id: booking.room_id
-                    }]->(z)
+                    MERGE (e)-[r:BOOKED_ROOM {booking_id: booking.booking_id}]->(z)
+                    SET r.start_time = datetime(booking.start_time),
+                        r.end_time = datetime(booking.end_time),
+                        r.attended = booking.attended,
+                        r.room_id = booking.room_id
                 """, {'bookings': batch})
 
-                logger.info(f"  Ingested {min(i+batch_size, len(bookings))}/{len(bookings)} bookings")
+                ingested += len(batch)
+                logger.info(f"  Ingested {ingested} bookings")
 
-        print(f"  ✅ Ingested {len(bookings)} lab bookings")
+        print(f"  ✅ Ingested {ingested} lab bookings")
 
     def _create_occupancy_aggregations(self):
-        """Create hourly occupancy counts per zone for anomaly detection"""
+        """Recompute hourly occupancy counts for the queued zone buckets"""
         print("\n📊 Creating Occupancy Aggregations...")
 
+        pending = self.watermarks.pending_buckets()
+        if not pending:
+            print("  ✅ No new activity, occupancy aggregations are up to date")
+            return
+
+        buckets = [
+            {'zone_id': zone_id, 'date': activity_date, 'hour': hour}
+            for zone_id, activity_date, hour in pending
+        ]
+
+        refreshed = 0
         with self.driver.session() as session:
-            # Aggregate card swipes by zone and hour
-            logger.info("  Aggregating card swipes...")
+            logger.info(f"  Re-aggregating {len(buckets)} touched zone/hour buckets...")
+            # Buckets exist only for hours with swipes; WiFi/CCTV presence annotates them
+            # (a presence-only bucket would read as an empty zone to occupancy consumers)
+            for i in range(0, len(buckets), self.batch_size):
+                result = session.execute_write(self._aggregate_buckets, buckets[i:i + self.batch_size])
+                refreshed += result
+
+            # Earlier runs created empty buckets for presence-only hours
             session.run("""
-                MATCH (e:Entity)-[s:SWIPED_CARD]->(z:Zone)
-                WITH z,
-                     date(s.timestamp) as activity_date,
-                     s.timestamp.hour as hour,
-                     s.timestamp.dayOfWeek as day_of_week,
-                     count(DISTINCT e) as occupancy_count,
-                     s.timestamp.year as year,
-                     s.timestamp.month as month,
-                     s.timestamp.day as day
-                MERGE (sa:SpatialActivity {
-                    zone_id: z.zone_id,
-                    date: activity_date,
-                    hour: hour
-                })
-                SET sa.occupancy = occupancy_count,
-                    sa.day_of_week = day_of_week,
-                    sa.is_weekend = (day_of_week >= 6),
-                    sa.timestamp = datetime({year: year, month: month, day: day, hour: hour, minute: 0}),
-                    sa.activity_type = 'CARD_SWIPE_AGGREGATED',
-                    sa.created_at = datetime()
-                MERGE (sa)-[:OCCURRED_IN]->(z)
+                MATCH (sa:SpatialActivity {activity_type: 'CARD_SWIPE_AGGREGATED'})
+                WHERE sa.occupancy = 0
+                DETACH DELETE sa
             """)
 
             # Count aggregated activities
@@ -344,7 +408,58 @@ class RealDataIngestion:
             """)
             agg_count = result.single()['aggregated_count']
 
-            print(f"  ✅ Created {agg_count} hourly occupancy aggregations")
+        print(f"  ✅ Refreshed {refreshed} hourly buckets ({agg_count} occupancy aggregations in total)")
+
+    def _aggregate_buckets(self, tx, batch: list) -> int:
+        """Re-aggregate one batch of buckets and dequeue them in the same transaction"""
+        refreshed = tx.run("""
+            UNWIND $buckets AS bucket
+            MATCH (z:Zone {zone_id: bucket.zone_id})
+            WITH z,
+                 date(bucket.date) as activity_date,
+                 bucket.hour as hour,
+                 datetime({date: date(bucket.date), hour: bucket.hour}) as hour_start
+            WITH z, activity_date, hour, hour_start,
+                 hour_start + duration({hours: 1}) as hour_end
+            WITH z, activity_date, hour, hour_start,
+                 COUNT {
+                     MATCH (e:Entity)-[s:SWIPED_CARD]->(z)
+                     WHERE hour_start <= s.timestamp < hour_end
+                     RETURN DISTINCT e
+                 } as occupancy_count,
+                 CASE WHEN $include_presence THEN COUNT {
+                     MATCH (e:Entity)-[w:CONNECTED_TO_WIFI]->(z)
+                     WHERE hour_start <= w.timestamp < hour_end
+                     RETURN DISTINCT e
+                 } END as wifi_presence,
+                 CASE WHEN $include_presence THEN COUNT {
+                     MATCH (e:Entity)-[d:DETECTED_IN]->(z)
+                     WHERE hour_start <= d.timestamp < hour_end
+                     RETURN DISTINCT e
+                 } END as cctv_presence
+            WHERE occupancy_count > 0
+            MERGE (sa:SpatialActivity {
+                zone_id: z.zone_id,
+                date: activity_date,
+                hour: hour
+            })
+            SET sa.occupancy = occupancy_count,
+                sa.day_of_week = activity_date.dayOfWeek,
+                sa.is_weekend = (activity_date.dayOfWeek >= 6),
+                sa.timestamp = hour_start,
+                sa.activity_type = 'CARD_SWIPE_AGGREGATED',
+                sa.created_at = datetime()
+            FOREACH (_ IN CASE WHEN $include_presence THEN [1] ELSE [] END |
+                SET sa.wifi_presence = wifi_presence,
+                    sa.cctv_presence = cctv_presence
+            )
+            MERGE (sa)-[:OCCURRED_IN]->(z)
+            RETURN count(sa) as refreshed
+        """, buckets=batch, include_presence=self.include_presence).single()['refreshed']
+        self.watermarks.clear_pending_buckets(
+            tx, [(bucket['zone_id'], bucket['date'], bucket['hour']) for bucket in batch]
+        )
+        return refreshed
 
     def _verify_ingestion(self):
         """Verify data was ingested correctly"""
@@ -391,13 +506,35 @@ class RealDataIngestion:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Ingest real CSV data into Neo4j")
+    parser.add_argument('--mode', choices=['transactional', 'bulk-export', 'aggregate'],
+                        default='transactional',
+                        help="transactional: incremental Cypher load; bulk-export: write "
+                             "neo4j-admin import files; aggregate: rebuild all hourly occupancy")
+    parser.add_argument('--export-dir', help="Output directory for --mode bulk-export")
+    parser.add_argument('--full-reload', action='store_true',
+                        help="Ignore stored watermarks and reload every dataset")
+    parser.add_argument('--with-presence', action='store_true',
+                        help="Also record WiFi and CCTV presence on the hourly swipe aggregations")
+    args = parser.parse_args()
+
     NEO4J_URI = "neo4j://localhost:7687"
     NEO4J_USER = "neo4j"
     NEO4J_PASSWORD = "Pressword@69"
     DATA_DIR = "/Users/dinokage/dev/fazri-analyzer/backend/augmented"
 
     try:
-        with RealDataIngestion(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DATA_DIR) as ingestion:
+        with RealDataIngestion(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DATA_DIR,
+                               full_reload=args.full_reload,
+                               include_presence=args.with_presence) as ingestion:
+            if args.mode == 'bulk-export':
+                export_dir = args.export_dir or str(Path(DATA_DIR).parent / "neo4j_import")
+                ingestion.export_bulk_import(export_dir)
+                return
+            if args.mode == 'aggregate':
+                ingestion.rebuild_occupancy_aggregations()
+                return
+
             success = ingestion.execute_ingestion()
 
             if success:
@@ -0,0 +1,109 @@
+# backend/app/services/anomaly_cache.py
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+def days_to_refresh(fingerprints: Dict[date, str], cached: Dict[date, str], full_refresh: bool = False) -> List[date]:
+    """
+    Days whose cached anomalies may be stale, oldest first
+
+    A day's anomalies also read its neighbours (travel pairs and presence
+    conflicts across midnight, bookings running past it), so the days either
+    side of a changed day are refreshed with it.
+    """
+    days = set(fingerprints) | set(cached)
+    if full_refresh:
+        return sorted(days)
+
+    changed = {day for day in days if fingerprints.get(day) != cached.get(day)}
+    return sorted({day + timedelta(days=offset) for day in changed for offset in (-1, 0, 1)} & days)
+
+def day_ranges(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Collapse days into inclusive (first, last) runs of consecutive days"""
+    ranges = []
+    for day in sorted(days):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+def day_start(day: date) -> datetime:
+    """Naive UTC midnight, matching how anomaly timestamps are stored"""
+    return datetime.combine(day, time.min)
+
+def anomaly_row(anomaly_data: Dict) -> Optional[Dict]:
+    """Column values for one detected anomaly, or None if its timestamp is unusable"""
+    # Ensure timestamp is a datetime object
+    timestamp = anomaly_data.get('timestamp')
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        except ValueError:
+            logger.warning(f"Could not parse timestamp string: {timestamp}. Skipping anomaly.")
+            return None
+
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.now()
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return {
+        'id': str(anomaly_data.get('id')),
+        'type': anomaly_data.get('type'),
+        'location': anomaly_data.get('location'),
+        'severity': anomaly_data.get('severity'),
+        'timestamp': timestamp,
+        'description': anomaly_data.get('description'),
+        'details': anomaly_data.get('details'),
+        'recommended_actions': anomaly_data.get('recommended_actions'),
+        'entity_id': anomaly_data.get('entity_id')
+    }
+
+def detect_days(detect_day: Callable[[date], Dict], days: Iterable[date]) -> Tuple[List[date], List[Dict]]:
+    """
+    Detect anomalies one fixed day window at a time
+
+    detect_day returns a detect_all_anomalies_with_report() result for one
+    day. Detecting per day in both full and incremental mode keeps window
+    aggregates (underutilization, data integrity) and their ids identical.
+    Days where any detector did not complete are left out so their cached
+    rows are kept and retried. Returns (refreshed days, deduplicated rows).
+    """
+    refreshed_days, rows, seen_ids = [], [], set()
+    for day in days:
+        report = detect_day(day)
+        for detector in report['detectors']:
+            log = logger.info if detector['status'] == 'completed' else logger.warning
+            log(f"  {day} {detector['detector']}: {detector['status']} in {detector['seconds']:.2f}s, "
+                f"{detector['anomaly_count']} anomalies" + (f" ({detector['error']})" if detector['error'] else ""))
+        if any(detector['status'] != 'completed' for detector in report['detectors']):
+            logger.warning(f"Keeping cached anomalies for {day} until its detectors succeed.")
+            continue
+
+        refreshed_days.append(day)
+        for anomaly_data in report['anomalies']:
+            row = anomaly_row(anomaly_data)
+            if row is None:
+                continue
+            if row['id'] in seen_ids:
+                logger.warning(f"Duplicate anomaly ID found: {row['id']}. Skipping.")
+                continue
+            seen_ids.add(row['id'])
+            rows.append(row)
+
+    return refreshed_days, rows
+
+def window_rows(refreshed_days: List[date], rows: List[Dict], fingerprints: Dict[date, str],
+                refreshed_at: datetime) -> List[Dict]:
+    """anomaly_cache_windows rows for the refreshed days that still have data"""
+    counts = {day: 0 for day in refreshed_days}
+    for row in rows:
+        if row['timestamp'].date() in counts:
+            counts[row['timestamp'].date()] += 1
+    return [
+        {'day': day, 'fingerprint': fingerprints[day], 'anomaly_count': counts[day], 'refreshed_at': refreshed_at}
+        for day in refreshed_days if day in fingerprints
+    ]
@@ -1,12 +1,33 @@
 # backend/app/services/anomaly_detection_fixed.py
-from neo4j import GraphDatabase
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional, Tuple
+from neo4j import Driver, GraphDatabase
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, Dict, Optional, Tuple
 from enum import Enum
+import hashlib
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
+# A detector still running after this long is reported as timed out and its results dropped
+DEFAULT_DETECTOR_TIMEOUT_SECONDS = 600
+
+# Per-day volume of everything the detectors read; used to tell which days changed
+DAILY_EVENT_COUNTS_QUERY = """
+    MATCH ()-[r:SWIPED_CARD|CONNECTED_TO_WIFI|DETECTED_IN]->()
+    RETURN date(r.timestamp) as day, type(r) as kind, count(r) as events, 0 as total
+    UNION ALL
+    MATCH ()-[b:BOOKED_ROOM]->()
+    RETURN date(b.start_time) as day, 'BOOKED_ROOM' as kind, count(b) as events, 0 as total
+    UNION ALL
+    MATCH (sa:SpatialActivity)
+    RETURN date(sa.timestamp) as day, 'SpatialActivity' as kind, count(sa) as events,
+           sum(coalesce(sa.occupancy, 0)) as total
+"""
+
 class AnomalyType(Enum):
     OVERCROWDING = "overcrowding"
     UNAUTHORIZED_ACCESS = "unauthorized_access"
@@ -23,11 +44,15 @@ class SeverityLevel(Enum):
     CRITICAL = "critical"
 
 class AnomalyDetectionService:
-    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str):
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        self.neo4j_uri = neo4j_uri
-        self.neo4j_user = neo4j_user
-        self.neo4j_password = neo4j_password
+    def __init__(self, neo4j_uri: str = None, neo4j_user: str = None, neo4j_password: str = None,
+                 driver: Optional[Driver] = None, detector_workers: int = 4,
+                 detector_timeout_seconds: float = DEFAULT_DETECTOR_TIMEOUT_SECONDS):
+        # Reuse the application's pooled driver when given one, otherwise own a private one
+        self._owns_driver = driver is None
+        self.driver = driver or GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+        # Detectors run concurrently, each holding one Neo4j session (entity detection holds three)
+        self.detector_workers = detector_workers
+        self.detector_timeout_seconds = detector_timeout_seconds
         
         # Zone capacity definitions
         self.zone_capacities = {
@@ -82,14 +107,86 @@ class AnomalyDetectionService:
                     'dataset_span_days': 0
                 }
 
+    def get_daily_data_fingerprints(self) -> Dict[date, str]:
+        """
+        Fingerprint of each day's detector input, keyed by date
+
+        Built from per-day event counts (and summed occupancy), so appending or
+        re-aggregating a day's data changes its fingerprint.
+        """
+        parts = defaultdict(list)
+        with self.driver.session() as session:
+            for rec in session.run(DAILY_EVENT_COUNTS_QUERY):
+                if rec['day'] is None:
+                    continue
+                day = rec['day'].to_native() if hasattr(rec['day'], 'to_native') else rec['day']
+                parts[day].append(f"{rec['kind']}:{rec['events']}:{rec['total']}")
+
+        return {
+            day: hashlib.sha256("|".join(sorted(day_parts)).encode()).hexdigest()[:32]
+            for day, day_parts in parts.items()
+        }
+
     def detect_all_anomalies(self, time_window_hours: Optional[int] = None,
                            start_date: Optional[str] = None,
                            end_date: Optional[str] = None,
                            include_entity_anomalies: bool = True) -> List[Dict]:
         """Detect anomalies - SIMPLIFIED for current data structure"""
-        anomalies = []
+        return self.detect_all_anomalies_with_report(
+            time_window_hours, start_date, end_date, include_entity_anomalies
+        )['anomalies']
+
+    def detect_all_anomalies_with_report(self, time_window_hours: Optional[int] = None,
+                                         start_date: Optional[str] = None,
+                                         end_date: Optional[str] = None,
+                                         include_entity_anomalies: bool = True) -> Dict:
+        """
+        Run every detector concurrently and report how each one did
+
+        Returns {'anomalies': [...], 'detectors': [...], 'seconds': wall clock}.
+        A detector that fails or exceeds detector_timeout_seconds is reported
+        in 'detectors' and the others' anomalies are still returned.
+        """
+        start_time, end_time = self._resolve_time_range(time_window_hours, start_date, end_date)
+        logger.info(f"Detecting anomalies from {start_time} to {end_time}")
+
+        detectors = [
+            # Overcrowding works with SpatialActivity data
+            ('overcrowding', self._detect_overcrowding_simplified),
+            ('underutilization', self._detect_underutilization_simplified),
+            ('data_integrity', self._detect_data_integrity_anomalies_simplified),
+        ]
+        if include_entity_anomalies:
+            detectors.append(('entity', self._detect_entity_anomalies))
+
+        started = time.perf_counter()
+        reports = self._run_detectors(detectors, start_time, end_time)
+        anomalies = [anomaly for report in reports for anomaly in report.pop('anomalies')]
 
-        # Determine time range, ensuring all datetimes are timezone-aware (UTC)
+        # Convert all timestamps to datetime objects before sorting
+        for anomaly in anomalies:
+            if isinstance(anomaly['timestamp'], str):
+                anomaly['timestamp'] = datetime.fromisoformat(anomaly['timestamp'].replace('Z', '+00:00'))
+
+        # Sort by severity and timestamp
+        anomalies.sort(key=lambda x: (
+            x['severity'] == 'critical',
+            x['severity'] == 'high',
+            x['severity'] == 'medium',
+            x['timestamp']
+        ), reverse=True)
+
+        logger.info(f"Detected {len(anomalies)} total anomalies")
+        return {
+            'anomalies': anomalies,
+            'detectors': reports,
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+
+    def _resolve_time_range(self, time_window_hours: Optional[int],
+                            start_date: Optional[str],
+                            end_date: Optional[str]) -> Tuple[datetime, datetime]:
+        """Detection window, ensuring all datetimes are timezone-aware (UTC)"""
         if start_date and end_date:
             start_time = datetime.fromisoformat(f"{start_date}T00:00:00").replace(tzinfo=timezone.utc)
             end_time = datetime.fromisoformat(f"{end_date}T23:59:59").replace(tzinfo=timezone.utc)
@@ -117,50 +214,84 @@ class AnomalyDetectionService:
                 end_time = datetime.now(timezone.utc)
                 start_time = end_time - timedelta(days=30)
 
-        try:
-            logger.info(f"Detecting anomalies from {start_time} to {end_time}")
+        return start_time, end_time
 
-            # Detect overcrowding (works with SpatialActivity data)
-            anomalies.extend(self._detect_overcrowding_simplified(start_time, end_time))
+    def _detect_entity_anomalies(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+        """Entity-level anomalies; errors propagate so the detector report shows them"""
+        from services.entity_anomaly_detection import EntityAnomalyDetectionService
+        entity_service = EntityAnomalyDetectionService(driver=self.driver)
+        return entity_service.detect_entity_anomalies(start_time, end_time, raise_errors=True)
 
-            # Detect underutilization
-            anomalies.extend(self._detect_underutilization_simplified(start_time, end_time))
+    def _run_detectors(self, detectors: List[Tuple[str, Callable]], start_time: datetime,
+                       end_time: datetime) -> List[Dict]:
+        """Run detectors on a bounded thread pool; per-detector reports in registration order"""
+        timeout = self.detector_timeout_seconds
+        running_since: Dict[str, float] = {}
+        reports: Dict[str, Dict] = {}
 
-            # Detect data integrity issues
-            anomalies.extend(self._detect_data_integrity_anomalies_simplified(start_time, end_time))
+        def run(name: str, detector: Callable) -> List[Dict]:
+            running_since[name] = time.perf_counter()
+            return detector(start_time, end_time)
 
-            # Add entity-level anomalies if requested
-            if include_entity_anomalies:
-                try:
-                    from services.entity_anomaly_detection import EntityAnomalyDetectionService
-                    entity_service = EntityAnomalyDetectionService(
-                        self.neo4j_uri, self.neo4j_user, self.neo4j_password
+        # Threads cannot be interrupted, so a timed-out detector is abandoned rather than
+        # awaited; queued detectors give up once every slot ahead of them could have timed out
+        submitted = time.perf_counter()
+        queue_deadline = submitted + timeout * math.ceil(len(detectors) / self.detector_workers)
+        pool = ThreadPoolExecutor(max_workers=self.detector_workers, thread_name_prefix="detect")
+        try:
+            futures = {pool.submit(run, name, detector): name for name, detector in detectors}
+            pending = set(futures)
+            while pending:
+                deadlines = {
+                    future: running_since[futures[future]] + timeout
+                    if futures[future] in running_since else queue_deadline
+                    for future in pending
+                }
+                done, pending = wait(
+                    pending,
+                    timeout=max(0.0, min(deadlines.values()) - time.perf_counter()),
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    name = futures[future]
+                    seconds = time.perf_counter() - running_since.get(name, submitted)
+                    try:
+                        reports[name] = self._detector_report(name, 'completed', seconds, future.result())
+                    except Exception as e:
+                        logger.error(f"Anomaly detector '{name}' failed: {str(e)}")
+                        reports[name] = self._detector_report(name, 'failed', seconds, error=str(e))
+
+                now = time.perf_counter()
+                for future in [f for f in pending if deadlines[f] <= now]:
+                    name = futures[future]
+                    pending.discard(future)
+                    future.cancel()
+                    logger.error(f"Anomaly detector '{name}' timed out after {timeout}s")
+                    reports[name] = self._detector_report(
+                        name, 'timeout', now - running_since.get(name, submitted),
+                        error=f"Exceeded {timeout}s timeout"
                     )
-                    entity_anomalies = entity_service.detect_entity_anomalies(start_time, end_time)
-                    anomalies.extend(entity_anomalies)
-                    logger.info(f"Detected {len(entity_anomalies)} entity-level anomalies")
-                except Exception as e:
-                    logger.warning(f"Could not detect entity anomalies: {str(e)}")
-
-            # Convert all timestamps to datetime objects before sorting
-            for anomaly in anomalies:
-                if isinstance(anomaly['timestamp'], str):
-                    anomaly['timestamp'] = datetime.fromisoformat(anomaly['timestamp'].replace('Z', '+00:00'))
-
-            # Sort by severity and timestamp
-            anomalies.sort(key=lambda x: (
-                x['severity'] == 'critical',
-                x['severity'] == 'high',
-                x['severity'] == 'medium',
-                x['timestamp']
-            ), reverse=True)
-
-            logger.info(f"Detected {len(anomalies)} total anomalies")
-            return anomalies
-
-        except Exception as e:
-            logger.error(f"Error detecting anomalies: {str(e)}")
-            return []
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        ordered = [reports[name] for name, _ in detectors]
+        for report in ordered:
+            logger.info(f"Detector {report['detector']}: {report['status']} in {report['seconds']:.2f}s, "
+                        f"{report['anomaly_count']} anomalies")
+        return ordered
+
+    @staticmethod
+    def _detector_report(name: str, status: str, seconds: float,
+                         anomalies: Optional[List[Dict]] = None, error: Optional[str] = None) -> Dict:
+        anomalies = anomalies or []
+        return {
+            'detector': name,
+            'status': status,
+            'seconds': round(seconds, 2),
+            'anomaly_count': len(anomalies),
+            'error': error,
+            'anomalies': anomalies
+        }
 
     def _detect_overcrowding_simplified(self, start_time: datetime, end_time: datetime) -> List[Dict]:
         """Detect overcrowding using SpatialActivity data"""
@@ -468,4 +599,9 @@ class AnomalyDetectionService:
             for date, count in sorted_dates[:5]
         ]
         
-        return trends
\ No newline at end of file
+        return trends
+
+    def close(self):
+        """Close database connection (a shared driver is left to its owner)"""
+        if self._owns_driver:
+            self.driver.close()
@@ -0,0 +1,277 @@
+# backend/app/services/bulk_import.py
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+import time
+import pandas as pd
+
+from services.dataset_reader import (
+    DEFAULT_CHUNK_SIZE, ISO_TIMESTAMP_FORMAT, dataset_path, iter_dataset_chunks,
+    normalize_timestamps, read_dataset
+)
+from services.ingestion_state import file_checksum, head_checksum
+
+# Header line for every node and relationship file, in neo4j-admin import syntax.
+# Node files carry an :ID in their own ID space; relationship files join on them.
+NODE_HEADERS: Dict[str, List[str]] = {
+    'Entity': [
+        'entity_id:ID(Entity)', 'name', 'role', 'email', 'department', 'student_id',
+        'staff_id', 'card_id', 'device_hash', 'face_id', 'ingested_at:datetime'
+    ],
+    'Zone': ['zone_id:ID(Zone)', 'name', 'is_placeholder:boolean', 'capacity:int'],
+    'Book': ['book_id:ID(Book)'],
+    'IngestionWatermark': [
+        'dataset:ID(IngestionWatermark)', 'row_offset:long', 'last_timestamp',
+        'head_checksum', 'file_checksum', 'loaded_bytes:long', 'loaded_checksum'
+    ],
+}
+
+RELATIONSHIP_HEADERS: Dict[str, List[str]] = {
+    'SWIPED_CARD': [':START_ID(Entity)', ':END_ID(Zone)', 'timestamp:datetime', 'location_id'],
+    'CONNECTED_TO_WIFI': [
+        ':START_ID(Entity)', ':END_ID(Zone)', 'timestamp:datetime', 'ap_id', 'zone_id'
+    ],
+    'DETECTED_IN': [
+        ':START_ID(Entity)', ':END_ID(Zone)', 'timestamp:datetime', 'frame_id', 'face_id', 'location_id'
+    ],
+    'CHECKED_OUT_BOOK': [
+        ':START_ID(Entity)', ':END_ID(Book)', 'timestamp:datetime', 'checkout_id', 'book_id'
+    ],
+    'BOOKED_ROOM': [
+        ':START_ID(Entity)', ':END_ID(Zone)', 'booking_id', 'start_time:datetime',
+        'end_time:datetime', 'attended', 'room_id'
+    ],
+}
+
+# Source dataset and timestamp column for each relationship type
+RELATIONSHIP_SOURCES = {
+    'SWIPED_CARD': ('swipes', 'timestamp'),
+    'CONNECTED_TO_WIFI': ('wifi', 'timestamp'),
+    'DETECTED_IN': ('cctv', 'timestamp'),
+    'CHECKED_OUT_BOOK': ('library', 'timestamp'),
+    'BOOKED_ROOM': ('bookings', 'start_time'),
+}
+
+def to_import_datetime(series: pd.Series) -> pd.Series:
+    """Format timestamps as ISO-8601 strings neo4j-admin parses as datetime (NaN when unparseable)"""
+    return normalize_timestamps(series)[0]
+
+class BulkImportExporter:
+    """
+    Convert the augmented CSVs into node/relationship files for
+    `neo4j-admin database import full`
+
+    Produces the same graph shape as RealDataIngestion for a cold rebuild:
+    identifiers are joined to entity_ids and APs mapped to zones during the
+    conversion, so the import itself does no lookups. Event files are
+    streamed chunk by chunk, so memory is bounded by the profiles table.
+    """
+
+    def __init__(self, data_dir: Path, output_dir: Path, ap_to_zone: Dict[str, str],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.data_dir = Path(data_dir)
+        self.output_dir = Path(output_dir)
+        self.ap_to_zone = ap_to_zone
+        self.chunk_size = chunk_size
+
+        self.profiles: Optional[pd.DataFrame] = None
+        self.zones: Dict[str, bool] = {}  # zone_id -> only seen as a booked room
+        self.books: Set[str] = set()
+        self.watermarks: List[Dict] = []
+
+    def export(self) -> Dict[str, int]:
+        """Write all import files and return the row count per node label / relationship type"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._write_headers()
+
+        counts = {'Entity': self._export_entities()}
+        counts['SWIPED_CARD'] = self._export_relationships(
+            'SWIPED_CARD', self._swipe_rows)
+        counts['CONNECTED_TO_WIFI'] = self._export_relationships(
+            'CONNECTED_TO_WIFI', self._wifi_rows)
+        counts['DETECTED_IN'] = self._export_relationships(
+            'DETECTED_IN', self._cctv_rows)
+        counts['CHECKED_OUT_BOOK'] = self._export_relationships(
+            'CHECKED_OUT_BOOK', self._checkout_rows)
+        counts['BOOKED_ROOM'] = self._export_relationships(
+            'BOOKED_ROOM', self._booking_rows)
+
+        counts['Zone'] = self._export_zones()
+        counts['Book'] = self._write_rows('Book', pd.DataFrame({'book_id': sorted(self.books)}))
+        counts['IngestionWatermark'] = self._write_rows(
+            'IngestionWatermark', pd.DataFrame(self.watermarks, columns=[
+                'dataset', 'row_offset', 'last_timestamp', 'head_checksum', 'file_checksum',
+                'loaded_bytes', 'loaded_checksum'
+            ])
+        )
+        return counts
+
+    def import_command(self, database: str = 'neo4j', neo4j_admin: str = 'neo4j-admin') -> List[str]:
+        """Build the neo4j-admin invocation for the exported files"""
+        command = [neo4j_admin, 'database', 'import', 'full', database, '--overwrite-destination']
+        for label in NODE_HEADERS:
+            command.append(f"--nodes={label}={self._header_path(label)},{self._data_path(label)}")
+        for rel_type in RELATIONSHIP_HEADERS:
+            command.append(
+                f"--relationships={rel_type}={self._header_path(rel_type)},{self._data_path(rel_type)}"
+            )
+        return command
+
+    def _header_path(self, name: str) -> Path:
+        return self.output_dir / f"{name.lower()}_header.csv"
+
+    def _data_path(self, name: str) -> Path:
+        return self.output_dir / f"{name.lower()}.csv"
+
+    def _write_headers(self):
+        """Write header files and truncate the matching data files"""
+        for name, header in {**NODE_HEADERS, **RELATIONSHIP_HEADERS}.items():
+            self._header_path(name).write_text(",".join(header) + "\n")
+            self._data_path(name).write_text("")
+
+    def _write_rows(self, name: str, rows: pd.DataFrame) -> int:
+        """Append rows to a data file; columns must follow the header order"""
+        rows.to_csv(self._data_path(name), mode='a', header=False, index=False)
+        return len(rows)
+
+    def _export_entities(self) -> int:
+        """Write Entity nodes and keep the identifier columns for the event joins"""
+        started = time.perf_counter()
+        profiles = read_dataset(self.data_dir, 'profiles')
+        # The watermark counts file rows, as a transactional resume skips them
+        file_rows = len(profiles)
+        profiles = profiles.drop_duplicates('entity_id')
+        self.profiles = profiles[['entity_id', 'card_id', 'device_hash', 'face_id']]
+
+        columns = [header.split(':')[0] for header in NODE_HEADERS['Entity'][1:-1]]
+        nodes = profiles.reindex(columns=['entity_id'] + columns)
+        nodes['ingested_at'] = pd.Timestamp.now().strftime(ISO_TIMESTAMP_FORMAT)
+        written = self._write_rows('Entity', nodes)
+
+        self._record_watermark('profiles', file_rows, None)
+        print(f"  ✅ Entity: {written} nodes in {time.perf_counter() - started:.1f}s")
+        return written
+
+    def _export_relationships(self, rel_type: str, build_rows) -> int:
+        """Stream one source dataset through build_rows into a relationship file"""
+        dataset, timestamp_column = RELATIONSHIP_SOURCES[rel_type]
+        started = time.perf_counter()
+        read = 0
+        written = 0
+        last_timestamp = None
+
+        for chunk in iter_dataset_chunks(self.data_dir, dataset, chunk_size=self.chunk_size):
+            read += len(chunk)
+            chunk_max = chunk[timestamp_column].dropna().max()
+            if isinstance(chunk_max, str) and (last_timestamp is None or chunk_max > last_timestamp):
+                last_timestamp = chunk_max
+
+            rows = build_rows(chunk)
+            rows = rows.dropna(subset=[column for column in rows.columns if column.endswith('_time')
+                                       or column == 'timestamp'])
+            written += self._write_rows(rel_type, rows)
+
+        self._record_watermark(dataset, read, last_timestamp)
+        print(f"  ✅ {rel_type}: {written}/{read} rows in {time.perf_counter() - started:.1f}s")
+        return written
+
+    def _join_entities(self, chunk: pd.DataFrame, identifier: str) -> pd.DataFrame:
+        """Inner-join a chunk to entity_ids on an identifier column, like MATCH (e:Entity {...})"""
+        keys = self.profiles[['entity_id', identifier]].dropna(subset=[identifier])
+        return chunk.dropna(subset=[identifier]).merge(keys, on=identifier, how='inner')
+
+    def _track_zones(self, zone_ids: pd.Series, placeholder: bool = False):
+        """Remember referenced zones; a zone stays a placeholder only if no event source names it"""
+        for zone_id in zone_ids.dropna().unique():
+            if placeholder:
+                self.zones.setdefault(zone_id, True)
+            else:
+                self.zones[zone_id] = False
+
+    def _swipe_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        rows = self._join_entities(chunk, 'card_id')
+        self._track_zones(rows['location_id'])
+        return pd.DataFrame({
+            'entity_id': rows['entity_id'],
+            'zone_id': rows['location_id'],
+            'timestamp': to_import_datetime(rows['timestamp']),
+            'location_id': rows['location_id'],
+        })
+
+    def _wifi_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk = chunk.assign(zone_id=chunk['ap_id'].map(self.ap_to_zone)).dropna(subset=['zone_id'])
+        rows = self._join_entities(chunk, 'device_hash')
+        self._track_zones(rows['zone_id'])
+        return pd.DataFrame({
+            'entity_id': rows['entity_id'],
+            'end_zone': rows['zone_id'],
+            'timestamp': to_import_datetime(rows['timestamp']),
+            'ap_id': rows['ap_id'],
+            'zone_id': rows['zone_id'],
+        })
+
+    def _cctv_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        rows = self._join_entities(chunk, 'face_id')
+        self._track_zones(rows['location_id'])
+        return pd.DataFrame({
+            'entity_id': rows['entity_id'],
+            'zone_id': rows['location_id'],
+            'timestamp': to_import_datetime(rows['timestamp']),
+            'frame_id': rows['frame_id'],
+            'face_id': rows['face_id'],
+            'location_id': rows['location_id'],
+        })
+
+    def _checkout_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        rows = chunk[chunk['entity_id'].isin(self.profiles['entity_id'])].dropna(subset=['book_id'])
+        self.books.update(rows['book_id'].unique())
+        return pd.DataFrame({
+            'entity_id': rows['entity_id'],
+            'end_book': rows['book_id'],
+            'timestamp': to_import_datetime(rows['timestamp']),
+            'checkout_id': rows['checkout_id'],
+            'book_id': rows['book_id'],
+        })
+
+    def _booking_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        rows = chunk[chunk['entity_id'].isin(self.profiles['entity_id'])].dropna(subset=['room_id'])
+        # Rooms never seen as a zone elsewhere become placeholder zones, as in the MERGE
+        self._track_zones(rows['room_id'], placeholder=True)
+        return pd.DataFrame({
+            'entity_id': rows['entity_id'],
+            'zone_id': rows['room_id'],
+            'booking_id': rows['booking_id'],
+            'start_time': to_import_datetime(rows['start_time']),
+            'end_time': to_import_datetime(rows['end_time']),
+            'attended': rows['attended'],
+            'room_id': rows['room_id'],
+        })
+
+    def _export_zones(self) -> int:
+        """
+        Write a Zone node for every zone an event refers to
+
+        Zone metadata (type, capacity, coordinates) is not in the event CSVs;
+        the zone migration MERGEs it onto these nodes after the import.
+        """
+        zones = pd.DataFrame(
+            [(zone_id, zone_id, placeholder, 30 if placeholder else None)
+             for zone_id, placeholder in sorted(self.zones.items())],
+            columns=['zone_id', 'name', 'is_placeholder', 'capacity']
+        )
+        zones['is_placeholder'] = zones['is_placeholder'].map({True: 'true', False: None})
+        zones['capacity'] = zones['capacity'].astype('Int64')
+        return self._write_rows('Zone', zones)
+
+    def _record_watermark(self, dataset: str, rows: int, last_timestamp: Optional[str]):
+        """Seed the ingestion watermark so the next incremental run skips unchanged files"""
+        path = dataset_path(self.data_dir, dataset)
+        checksum = file_checksum(path)
+        self.watermarks.append({
+            'dataset': dataset,
+            'row_offset': rows,
+            'last_timestamp': last_timestamp,
+            'head_checksum': head_checksum(path),
+            'file_checksum': checksum,
+            'loaded_bytes': path.stat().st_size,
+            'loaded_checksum': checksum,
+        })
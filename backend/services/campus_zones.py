@@ -0,0 +1,42 @@
+# backend/app/services/campus_zones.py
+from collections import defaultdict
+from typing import Dict, FrozenSet, Optional
+
+# WiFi access point to the zone it is installed in
+AP_TO_ZONE = {
+    'AP_ADMIN_1': 'ADMIN_LOBBY', 'AP_ADMIN_2': 'ADMIN_LOBBY', 'AP_ADMIN_3': 'ADMIN_LOBBY',
+    'AP_ADMIN_4': 'ADMIN_LOBBY', 'AP_ADMIN_5': 'ADMIN_LOBBY',
+    'AP_AUD_1': 'AUDITORIUM', 'AP_AUD_2': 'AUDITORIUM', 'AP_AUD_3': 'AUDITORIUM',
+    'AP_AUD_4': 'AUDITORIUM', 'AP_AUD_5': 'AUDITORIUM',
+    'AP_CAF_1': 'CAF_01', 'AP_CAF_2': 'CAF_01', 'AP_CAF_3': 'CAF_01',
+    'AP_CAF_4': 'CAF_01', 'AP_CAF_5': 'CAF_01',
+    'AP_LAB_1': 'LAB_101', 'AP_LAB_2': 'LAB_101',
+    'AP_LAB_3': 'LAB_102', 'AP_LAB_4': 'LAB_305', 'AP_LAB_5': 'LAB_305',
+    'AP_LIB_1': 'LIB_ENT', 'AP_LIB_2': 'LIB_ENT', 'AP_LIB_3': 'LIB_ENT',
+    'AP_LIB_4': 'LIB_ENT', 'AP_LIB_5': 'LIB_ENT',
+    'AP_GYM_1': 'GYM', 'AP_GYM_2': 'GYM',
+    'AP_HOSTEL_1': 'HOSTEL_GATE', 'AP_HOSTEL_2': 'HOSTEL_GATE',
+    'AP_HOSTEL_3': 'HOSTEL_GATE', 'AP_HOSTEL_4': 'HOSTEL_GATE', 'AP_HOSTEL_5': 'HOSTEL_GATE',
+    'AP_ENG_1': 'LAB_102', 'AP_ENG_2': 'LAB_102', 'AP_ENG_3': 'LAB_305',
+    'AP_ENG_4': 'LAB_305', 'AP_ENG_5': 'LAB_102',
+    'AP_SEM_1': 'SEM_01'
+}
+
+
+def ap_group(ap_id: str) -> str:
+    """Building/area an AP belongs to, e.g. AP_ENG_3 -> AP_ENG"""
+    return ap_id.rsplit('_', 1)[0]
+
+def _coverage(ap_to_zone: Dict[str, str]) -> Dict[str, FrozenSet[str]]:
+    zones_by_group = defaultdict(set)
+    for ap_id, zone_id in ap_to_zone.items():
+        zones_by_group[ap_group(ap_id)].add(zone_id)
+    return {ap_id: frozenset(zones_by_group[ap_group(ap_id)]) for ap_id in ap_to_zone}
+
+# Zones an AP can plausibly be heard from: every zone served by its AP group
+# (AP_ENG_* covers both LAB_102 and LAB_305)
+AP_COVERAGE = _coverage(AP_TO_ZONE)
+
+def ap_covers(ap_id: Optional[str], zone_id: str) -> bool:
+    """True if a connection to ap_id is consistent with being in zone_id"""
+    return ap_id is not None and zone_id in AP_COVERAGE.get(ap_id, ())
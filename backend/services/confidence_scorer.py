@@ -1,5 +1,7 @@
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
 
 class ConfidenceScorer:
     """Calculate confidence scores for entity resolution and predictions"""
@@ -39,12 +41,19 @@ class ConfidenceScorer:
         if not identifiers:
             return 0.0
         
+        # Only (type, source) pairs affect the score, so equal identifier sets share a result
+        return ConfidenceScorer.entity_confidence_for(tuple(
+            (identifier.get('type', 'unknown'), identifier.get('source', 'unknown'))
+            for identifier in identifiers
+        ))
+    
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def entity_confidence_for(signature: Tuple[Tuple[str, str], ...]) -> float:
+        """Entity confidence for a sequence of (type, source) pairs"""
         # Base confidence from identifier types
         identifier_scores = []
-        for identifier in identifiers:
-            id_type = identifier.get('type', 'unknown')
-            source = identifier.get('source', 'unknown')
-            
+        for id_type, source in signature:
             id_weight = ConfidenceScorer.IDENTIFIER_WEIGHTS.get(id_type, 0.5)
             source_weight = ConfidenceScorer.SOURCE_WEIGHTS.get(source, 0.5)
             
@@ -54,7 +63,7 @@ class ConfidenceScorer:
         
         # Average score, with bonus for multiple identifiers
         avg_score = sum(identifier_scores) / len(identifier_scores)
-        diversity_bonus = min(0.2, len(set([i['type'] for i in identifiers])) * 0.05)
+        diversity_bonus = min(0.2, len(set([id_type for id_type, _ in signature])) * 0.05)
         
         final_confidence = min(1.0, avg_score + diversity_bonus)
         return round(final_confidence, 2)
@@ -76,10 +85,18 @@ class ConfidenceScorer:
         if not shared_identifiers:
             return 0.0
         
+        return ConfidenceScorer.link_confidence_for(tuple(
+            shared_id.split(':')[0] if ':' in shared_id else 'unknown'
+            for shared_id in shared_identifiers
+        ))
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def link_confidence_for(shared_types: Tuple[str, ...]) -> float:
+        """Link confidence for the types of the shared identifiers"""
         # Base confidence from shared identifiers
         shared_scores = []
-        for shared_id in shared_identifiers:
-            id_type = shared_id.split(':')[0] if ':' in shared_id else 'unknown'
+        for id_type in shared_types:
             weight = ConfidenceScorer.IDENTIFIER_WEIGHTS.get(id_type, 0.5)
             shared_scores.append(weight)
         
@@ -92,6 +109,58 @@ class ConfidenceScorer:
         final_confidence = min(1.0, base_confidence + multi_match_bonus)
         return round(final_confidence, 2)
     
+    @staticmethod
+    def score_entities(owners: np.ndarray, types: Sequence[str], sources: Sequence[str],
+                       entity_count: int) -> np.ndarray:
+        """
+        calculate_entity_confidence for every entity at once
+        
+        owners[i] is the entity position of identifier i; identifiers of one
+        entity must keep their order. Returns one score per entity position.
+        """
+        owners = np.asarray(owners, dtype=np.int64)
+        if len(owners) == 0:
+            return np.zeros(entity_count, dtype=np.float64)
+        
+        type_values, type_codes = np.unique(np.asarray(types, dtype=object), return_inverse=True)
+        source_values, source_codes = np.unique(np.asarray(sources, dtype=object), return_inverse=True)
+        id_weights = np.array([ConfidenceScorer.IDENTIFIER_WEIGHTS.get(t, 0.5) for t in type_values])
+        source_weights = np.array([ConfidenceScorer.SOURCE_WEIGHTS.get(s, 0.5) for s in source_values])
+        scores = (id_weights[type_codes] * 0.7) + (source_weights[source_codes] * 0.3)
+        
+        # bincount accumulates in input order, matching the scalar sum exactly
+        totals = np.bincount(owners, weights=scores, minlength=entity_count)
+        counts = np.bincount(owners, minlength=entity_count)
+        distinct_pairs = np.unique(owners * len(type_values) + type_codes)
+        distinct_types = np.bincount(distinct_pairs // len(type_values), minlength=entity_count)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            final = np.minimum(1.0, totals / counts + np.minimum(0.2, distinct_types * 0.05))
+        # Python round() so results equal the scalar path digit for digit
+        return np.array([
+            round(value, 2) if count else 0.0
+            for value, count in zip(final.tolist(), counts.tolist())
+        ], dtype=np.float64)
+    
+    @staticmethod
+    def score_links(shared: Dict[Tuple[str, str], List[str]]) -> Dict[Tuple[str, str], Tuple[float, List[str]]]:
+        """
+        calculate_link_confidence for every pair of entities that shares identifiers
+        
+        shared maps an (earlier, later) pair to its shared identifier keys. Pairs
+        sharing the same identifier types are scored once per type combination.
+        Pairs linked only transitively are left out; their confidence is 0.0.
+        """
+        signatures = {
+            pair: tuple(key.split(':')[0] if ':' in key else 'unknown' for key in keys)
+            for pair, keys in shared.items() if keys
+        }
+        scores = {
+            signature: ConfidenceScorer.link_confidence_for(signature)
+            for signature in set(signatures.values())
+        }
+        return {pair: (scores[signature], shared[pair]) for pair, signature in signatures.items()}
+    
     @staticmethod
     def calculate_event_confidence(
         event_type: str,
@@ -0,0 +1,153 @@
+# backend/app/services/dataset_reader.py
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Timestamp format written to Neo4j's datetime() and neo4j-admin datetime columns
+ISO_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# File name and the columns each loader needs, with dtype hints. Identifiers and
+# timestamps stay strings; timestamps are parsed by the consumers.
+DATASET_SCHEMAS: Dict[str, Dict] = {
+    'profiles': {
+        'file': 'student_staff_profiles.csv',
+        'dtypes': {
+            'entity_id': str, 'name': str, 'role': str, 'email': str, 'department': str,
+            'student_id': str, 'staff_id': str, 'card_id': str, 'device_hash': str, 'face_id': str,
+            'faculty_id': str
+        }
+    },
+    'swipes': {
+        'file': 'campus_card_swipes_augmented.csv',
+        'dtypes': {'card_id': str, 'location_id': str, 'timestamp': str}
+    },
+    'wifi': {
+        'file': 'wifi_associations_logs_augmented.csv',
+        'dtypes': {'device_hash': str, 'ap_id': str, 'timestamp': str}
+    },
+    'cctv': {
+        'file': 'cctv_frames_augmented.csv',
+        'dtypes': {'frame_id': str, 'location_id': str, 'timestamp': str, 'face_id': str}
+    },
+    'library': {
+        'file': 'library_checkouts_augmented.csv',
+        'dtypes': {'checkout_id': str, 'entity_id': str, 'book_id': str, 'timestamp': str}
+    },
+    'bookings': {
+        'file': 'lab_bookings_augmented.csv',
+        'dtypes': {
+            'booking_id': str, 'entity_id': str, 'room_id': str,
+            'start_time': str, 'end_time': str, 'attended': str
+        }
+    },
+    'helpdesk': {
+        'file': 'helpdesk_augmented.csv',
+        'dtypes': {'note_id': str, 'entity_id': str, 'timestamp': str, 'text': str, 'category': str}
+    },
+    'face_embeddings': {
+        'file': 'face_embeddings.csv',
+        'dtypes': None  # Embedding columns vary, read everything
+    },
+}
+
+def dataset_path(data_dir: Path, dataset: str) -> Path:
+    """Resolve the CSV path for a dataset name"""
+    return Path(data_dir) / DATASET_SCHEMAS[dataset]['file']
+
+def iter_csv_chunks(
+    path: Path,
+    dtypes: Optional[Dict] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    nrows: Optional[int] = None,
+    na_filter: bool = True,
+    skip_rows: int = 0
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV as fixed-size DataFrame chunks
+
+    Only the columns named in dtypes are parsed (missing optional columns are
+    skipped), so memory stays bounded by chunk_size regardless of file size.
+    Chunks keep a continuous row index across the file, including when the
+    first skip_rows data rows are skipped to resume a load.
+    """
+    usecols = None
+    if dtypes:
+        usecols = lambda column: column in dtypes
+
+    reader = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype=dtypes,
+        chunksize=chunk_size,
+        nrows=nrows,
+        na_filter=na_filter,
+        skiprows=range(1, skip_rows + 1) if skip_rows else None
+    )
+    with reader:
+        for chunk in reader:
+            if skip_rows:
+                chunk.index += skip_rows
+            yield chunk
+
+def iter_dataset_chunks(
+    data_dir: Path,
+    dataset: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    nrows: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """Stream a known dataset as typed DataFrame chunks"""
+    yield from iter_csv_chunks(
+        dataset_path(data_dir, dataset),
+        dtypes=DATASET_SCHEMAS[dataset]['dtypes'],
+        chunk_size=chunk_size,
+        nrows=nrows
+    )
+
+def iter_dataset_records(
+    data_dir: Path,
+    dataset: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    nrows: Optional[int] = None,
+    skip_rows: int = 0
+) -> Iterator[List[Dict[str, str]]]:
+    """
+    Stream a known dataset as lists of row dicts, ready to pass to UNWIND
+
+    Values are plain strings with empty cells kept as '', matching what
+    csv.DictReader produced.
+    """
+    chunks = iter_csv_chunks(
+        dataset_path(data_dir, dataset),
+        dtypes=DATASET_SCHEMAS[dataset]['dtypes'],
+        chunk_size=chunk_size,
+        nrows=nrows,
+        na_filter=False,
+        skip_rows=skip_rows
+    )
+    for chunk in chunks:
+        yield chunk.to_dict('records')
+
+def normalize_timestamps(values: pd.Series) -> Tuple[pd.Series, int]:
+    """
+    Parse a whole timestamp column into ISO-8601 strings in one pass
+
+    ISO values take pandas' fast path; anything else (e.g. "9/5/2025 16:46")
+    is retried with per-value format inference. Returns the normalised column,
+    NaN where a value could not be parsed, and the count of such values
+    (missing values included).
+    """
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], errors='coerce', format='mixed')
+
+    return parsed.dt.strftime(ISO_TIMESTAMP_FORMAT), int(parsed.isna().sum())
+
+def read_dataset(data_dir: Path, dataset: str) -> pd.DataFrame:
+    """Read a whole dataset with its dtype hints and column selection"""
+    schema = DATASET_SCHEMAS[dataset]
+    dtypes = schema['dtypes']
+    usecols = (lambda column: column in dtypes) if dtypes else None
+    return pd.read_csv(dataset_path(data_dir, dataset), usecols=usecols, dtype=dtypes)
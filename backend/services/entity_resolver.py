@@ -1,93 +1,430 @@
 # backend/app/services/entity_resolver.py
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 from pathlib import Path
-from datetime import datetime
-from collections import defaultdict
-import Levenshtein  # pip install python-Levenshtein
+from datetime import datetime, timezone
+from collections import Counter, defaultdict, deque
+import threading
 
-from models.entity import Entity, Identifier, ActivityEvent
+from models.entity import Entity, Observation
 from services.confidence_scorer import ConfidenceScorer
+from services.dataset_reader import DEFAULT_CHUNK_SIZE, DATASET_SCHEMAS, dataset_path, iter_dataset_chunks, read_dataset
+from services.entity_store import EntityStore
+from services.face_index import FaceEmbeddingIndex, embedding_matrix
+from services.fuzzy_index import FuzzyNameIndex
+from services.identity_clusters import cluster_identities
+from services import resolver_snapshot
+
+# Resolver snapshots live here, keyed on input CSV checksums
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "cache"
+
+# Identifier columns copied from each profile, in the order they are attached
+PROFILE_IDENTIFIER_TYPES = [
+    'entity_id', 'student_id', 'staff_id', 'email',
+    'card_id', 'device_hash', 'face_id'
+]
+
+def _texts(profiles: pd.DataFrame, column: str) -> List[Optional[str]]:
+    """Profile column as strings, None where missing"""
+    if column not in profiles:
+        return [None] * len(profiles)
+    values = profiles[column]
+    return values.astype(object).where(values.notna(), None).tolist()
+
+# Confidence multiplier per conflicting observation, as in Entity.add_identifier
+CONFLICT_PENALTY = 0.9
+
+# Most recent identifier conflicts kept for inspection
+MAX_RECORDED_CONFLICTS = 10000
+
+# Attribute combinations GET /entities can filter on
+LISTING_FILTERS = (('department',), ('entity_type',), ('department', 'entity_type'))
 
 class EntityResolver:
     """Core entity resolution engine"""
     
     def __init__(self, data_dir: Path):
         self.data_dir = data_dir
-        self.entities: Dict[str, Entity] = {}
+        # Columnar store; entities[entity_id] builds a pydantic Entity on demand
+        self.entities: EntityStore = EntityStore.empty()
         self.identifier_index: Dict[str, List[str]] = defaultdict(list)
-        
-        # Load datasets
-        self._load_datasets()
+        # Built from entity names on first fuzzy search, reset when entities are rebuilt
+        self.name_index: Optional[FuzzyNameIndex] = None
+        # Transitive identity clusters: {cluster_id: member entity_ids}
+        self.clusters: Dict[str, List[str]] = {}
+        # Link confidence of cluster pairs that share identifiers: {(earlier, later): (confidence, shared keys)};
+        # pairs linked only transitively are absent and score 0.0
+        self.link_scores: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        # Identifier keys seen together in one observation that resolved to both
+        # entities of an (earlier, later) pair; links and clusters them like a shared identifier
+        self.co_observed: Dict[Tuple[str, str], List[str]] = {}
+        # Sorted store positions per department / entity_type / (department, entity_type)
+        self.attribute_index: Dict[Tuple[str, ...], Dict] = {}
+        # Embeddings of profile faces keyed by entity_id, built on first use
+        self.face_index: Optional[FaceEmbeddingIndex] = None
+        # Incremental resolution state, reset whenever entities are rebuilt
+        self.conflicts: deque = deque(maxlen=MAX_RECORDED_CONFLICTS)
+        self.conflict_counts: Counter = Counter()
+        self._observe_lock = threading.Lock()
         
     def _load_datasets(self):
-        """Load all CSV datasets"""
-        self.profiles = pd.read_csv(self.data_dir / "student_staff_profiles.csv")
-        self.swipes = pd.read_csv(self.data_dir / "campus_card_swipes_augmented.csv")
-        self.wifi = pd.read_csv(self.data_dir / "wifi_associations_logs_augmented.csv")
-        self.library = pd.read_csv(self.data_dir / "library_checkouts_augmented.csv")
-        self.bookings = pd.read_csv(self.data_dir / "lab_bookings_augmented.csv")
-        self.helpdesk = pd.read_csv(self.data_dir / "helpdesk_augmented.csv")
-        self.cctv = pd.read_csv(self.data_dir / "cctv_frames_augmented.csv")
-        self.face_embeddings = pd.read_csv(self.data_dir / "face_embeddings.csv")
+        """Load profiles; event datasets are streamed or loaded on first access"""
+        self.profiles = read_dataset(self.data_dir, 'profiles')
         
         print(f"✅ Loaded {len(self.profiles)} profiles")
+    
+    def __getattr__(self, name: str):
+        # Profiles load on first use so a snapshot load never reads the CSV
+        if name == 'profiles':
+            self._load_datasets()
+            return self.profiles
+        # Lazily load event datasets (self.swipes, self.wifi, ...) on first access
+        if name in DATASET_SCHEMAS:
+            # A missing file is a missing attribute, so hasattr()/getattr(..., default) keep working
+            if not dataset_path(self.data_dir, name).exists():
+                raise AttributeError(
+                    f"{type(self).__name__!r} object has no attribute {name!r} "
+                    f"({dataset_path(self.data_dir, name)} not found)"
+                )
+            dataset = read_dataset(self.data_dir, name)
+            setattr(self, name, dataset)
+            return dataset
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+    
+    def iter_dataset(self, dataset: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Stream a dataset in typed chunks without loading it all into memory"""
+        return iter_dataset_chunks(self.data_dir, dataset, chunk_size)
         
     def build_entity_graph(self):
         """Build complete entity graph from profiles"""
         print("\n🔧 Building entity graph from profiles...")
         
-        for idx, row in self.profiles.iterrows():
-            entity_id = str(row['entity_id'])
-            
-            # Create entity
-            entity = Entity(
-                entity_id=entity_id,
-                name=row.get('name'),
-                role=row.get('role'),
-                email=row.get('email'),
-                entity_type=self._determine_entity_type(row),
-                department=row.get('department')
-            )
-            
-            # Add all identifiers from profile
-            identifier_types = [
-                'entity_id', 'student_id', 'staff_id', 'email', 
-                'card_id', 'device_hash', 'face_id'
-            ]
-            
-            for id_type in identifier_types:
-                if id_type in row and pd.notna(row[id_type]):
-                    identifier = Identifier(
-                        type=id_type,
-                        value=str(row[id_type]),
-                        source="profiles",
-                        confidence=1.0,
-                        first_seen=datetime.now(),
-                        last_seen=datetime.now()
-                    )
-                    entity.add_identifier(identifier)
-                    
-                    # Index for fast lookup
-                    self.identifier_index[f"{id_type}:{row[id_type]}"].append(entity_id)
-            
-            # Calculate confidence score
-            entity.recalculate_confidence()
-            
-            self.entities[entity_id] = entity
+        built_at = datetime.now()
+        profiles = self.profiles
+        entity_ids = profiles['entity_id'].astype(str).tolist()
+        
+        # One row per present identifier: (entity position, type rank, value)
+        types = [id_type for id_type in PROFILE_IDENTIFIER_TYPES if id_type in profiles]
+        masks = [profiles[id_type].notna().to_numpy() for id_type in types]
+        positions = np.concatenate([np.flatnonzero(mask) for mask in masks])
+        ranks = np.concatenate([np.full(mask.sum(), rank) for rank, mask in enumerate(masks)])
+        values = np.concatenate([
+            profiles[id_type].to_numpy()[mask].astype(str) for id_type, mask in zip(types, masks)
+        ])
+        
+        # Entity-major, identifier types in PROFILE_IDENTIFIER_TYPES order
+        order = np.lexsort((ranks, positions))
+        positions, ranks, values = positions[order], ranks[order], values[order]
+        id_types = np.array(types, dtype=object)[ranks]
+        
+        # Index for fast lookup
+        keys = (pd.Series(id_types, dtype=object) + ':' + pd.Series(values, dtype=object)).tolist()
+        owners = np.array(entity_ids, dtype=object)[positions].tolist()
+        for key, entity_id in zip(keys, owners):
+            self.identifier_index[key].append(entity_id)
+        
+        self.entities = EntityStore.from_columns(
+            entity_ids,
+            attributes={
+                'name': _texts(profiles, 'name'),
+                'email': _texts(profiles, 'email'),
+                'department': _texts(profiles, 'department'),
+                'entity_type': self._determine_entity_types(profiles).tolist()
+            },
+            confidence=ConfidenceScorer.score_entities(positions, id_types, ['profiles'] * len(values), len(entity_ids)),
+            identifier_offsets=np.concatenate([[0], np.cumsum(np.bincount(positions, minlength=len(entity_ids)))]),
+            identifier_type=id_types,
+            identifier_value=values,
+            identifier_source=['profiles'] * len(values),
+            identifier_confidence=np.ones(len(values)),
+            created_at=built_at
+        )
+        self.name_index = None
+        self.face_index = None
+        self.conflicts.clear()
+        self.conflict_counts.clear()
+        self.co_observed = {}
+        self.build_clusters()
+        self.build_attribute_index()
         
         print(f"✅ Created {len(self.entities)} entities")
         print(f"✅ Indexed {len(self.identifier_index)} identifiers")
+        print(f"✅ Grouped into {len(self.clusters)} identity clusters")
+    
+    def build_clusters(self):
+        """Assign every entity a cluster id via union-find over shared identifiers and co-observations"""
+        self.clusters = cluster_identities(self.entities.keys(), self.identifier_index, self.co_observed)
+        
+        cluster_ids = {
+            entity_id: cluster_id
+            for cluster_id, member_ids in self.clusters.items()
+            for entity_id in member_ids
+        }
+        self.entities.set_column('cluster_id', [cluster_ids[entity_id] for entity_id in self.entities])
+        shared = self._shared_identifiers(self.identifier_index)
+        for pair, keys in self.co_observed.items():
+            shared[pair] = list(dict.fromkeys(shared[pair] + keys))
+        self.link_scores = ConfidenceScorer.score_links(shared)
+    
+    def _shared_identifiers(self, keys: Iterable[str]) -> Dict[Tuple[str, str], List[str]]:
+        """Identifier keys held by each pair of entities, pairs ordered by store position"""
+        positions = self.entities.positions
+        shared = defaultdict(list)
+        for key in keys:
+            owners = self.identifier_index.get(key, ())
+            if len(owners) < 2:
+                continue
+            owners = sorted(owners, key=positions.__getitem__)
+            for i in range(len(owners)):
+                for j in range(i + 1, len(owners)):
+                    shared[(owners[i], owners[j])].append(key)
+        return shared
+    
+    def cluster_of(self, entity_id: str) -> Optional[str]:
+        """Cluster id of an entity"""
+        return self.entities.value(entity_id, 'cluster_id')
+    
+    def cluster_members(self, entity_id: str) -> List[str]:
+        """All entity ids in the same cluster, including the entity itself"""
+        cluster_id = self.cluster_of(entity_id)
+        if cluster_id is None:
+            return []
+        return self.clusters.get(cluster_id, [entity_id])
+    
+    def linked_with_confidence(self, entity_id: str) -> List[Dict]:
+        """Other cluster members with their precomputed link confidence, most confident first"""
+        positions = self.entities.positions
+        linked = []
+        for member_id in self.cluster_members(entity_id):
+            if member_id == entity_id:
+                continue
+            pair = (entity_id, member_id) if positions[entity_id] < positions[member_id] else (member_id, entity_id)
+            confidence, shared = self.link_scores.get(pair, (0.0, []))
+            linked.append({
+                'entity_id': member_id,
+                'name': self.entities.value(member_id, 'name'),
+                'confidence': confidence,
+                'shared_identifiers': list(shared)
+            })
+        linked.sort(key=lambda x: x['confidence'], reverse=True)
+        return linked
+    
+    def observe(self, observations: Iterable[Observation]) -> List[Dict]:
+        """
+        Apply identifiers seen in event data without rebuilding the graph
+        
+        Each observation resolves through the identifiers it carries. Known
+        identifiers get first_seen/last_seen widened (a new source adds its own
+        identifier record); unknown ones attach to the first resolved entity
+        unless it already holds another value of that type, which is recorded
+        as a conflict. Observations resolving to several entities merge their
+        clusters, and the co-observed identifiers become link evidence for
+        each pair of them. Only touched entities are re-scored. Observed
+        identifiers and co-observations are written by save_snapshot();
+        recorded conflicts are not, and a rebuild from the CSVs drops all three.
+        """
+        with self._observe_lock:
+            return [self._observe(observation) for observation in observations]
+    
+    def _observe(self, observation: Observation) -> Dict:
+        seen_at = observation.timestamp
+        if seen_at.tzinfo is not None:
+            seen_at = seen_at.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        pairs = [(id_type, str(value)) for id_type, value in observation.identifiers.items() if value]
+        owners = list(dict.fromkeys(
+            entity_id
+            for id_type, value in pairs
+            for entity_id in self.identifier_index.get(f"{id_type}:{value}", ())
+        ))
+        if not owners:
+            return {'status': 'unresolved', 'entity_ids': [], 'added': [], 'conflicts': [], 'merged_cluster': None}
+        
+        confidence = ConfidenceScorer.SOURCE_WEIGHTS.get(observation.source, 0.5)
+        touched, added, conflicts = set(), [], []
+        
+        for id_type, value in pairs:
+            lookup_key = f"{id_type}:{value}"
+            for entity_id in list(self.identifier_index.get(lookup_key) or owners[:1]):
+                outcome = self.entities.record_identifier(
+                    entity_id, id_type, value, observation.source, seen_at, confidence
+                )
+                if outcome == 'conflict':
+                    conflict = {
+                        'entity_id': entity_id,
+                        'identifier_type': id_type,
+                        'existing': self.entities.get_identifier(entity_id, id_type),
+                        'observed': value,
+                        'source': observation.source,
+                        'timestamp': seen_at
+                    }
+                    self.conflicts.append(conflict)
+                    conflicts.append(conflict)
+                    self.conflict_counts[entity_id] += 1
+                elif outcome == 'added':
+                    if entity_id not in self.identifier_index[lookup_key]:
+                        self.identifier_index[lookup_key].append(entity_id)
+                    if id_type == 'face_id':
+                        self.face_index = None
+                    added.append({'entity_id': entity_id, 'identifier': lookup_key, 'source': observation.source})
+                if outcome != 'updated':
+                    touched.add(entity_id)
+        
+        merged_cluster = None
+        if len(owners) > 1:
+            self._link_co_observed(owners, [f"{id_type}:{value}" for id_type, value in pairs])
+            merged_cluster = self._merge_clusters(owners)
+        for entity_id in touched:
+            self._rescore(entity_id)
+        
+        return {
+            'status': 'resolved',
+            'entity_ids': owners,
+            'added': added,
+            'conflicts': conflicts,
+            'merged_cluster': merged_cluster
+        }
+    
+    def _link_co_observed(self, entity_ids: List[str], keys: List[str]):
+        """Record identifiers seen together as link evidence between the entities they resolve to"""
+        positions = self.entities.positions
+        held = {entity_id: [key for key in keys if entity_id in self.identifier_index.get(key, ())]
+                for entity_id in entity_ids}
+        entity_ids = sorted(entity_ids, key=positions.__getitem__)
+        for i in range(len(entity_ids)):
+            for j in range(i + 1, len(entity_ids)):
+                pair = (entity_ids[i], entity_ids[j])
+                evidence = list(dict.fromkeys(self.co_observed.get(pair, []) + held[pair[0]] + held[pair[1]]))
+                self.co_observed[pair] = evidence
+                shared = [
+                    f"{id_type}:{value}"
+                    for id_type, value, _, _, _, _ in self.entities.identifier_records(positions[pair[0]])
+                    if pair[1] in self.identifier_index.get(f"{id_type}:{value}", ())
+                ]
+                self.link_scores.update(
+                    ConfidenceScorer.score_links({pair: list(dict.fromkeys(shared + evidence))})
+                )
+    
+    def _merge_clusters(self, entity_ids: List[str]) -> Optional[str]:
+        """Union the clusters of the given entities; returns the new cluster id if any merged"""
+        cluster_ids = list(dict.fromkeys(self.cluster_of(entity_id) for entity_id in entity_ids))
+        if len(cluster_ids) < 2:
+            return None
+        
+        # Same convention as a full build: members in store order, id is the first member
+        positions = self.entities.positions
+        members = sorted(
+            {member for cluster_id in cluster_ids for member in self.clusters.pop(cluster_id, [cluster_id])},
+            key=positions.__getitem__
+        )
+        cluster_id = members[0]
+        self.clusters[cluster_id] = members
+        for member in members:
+            self.entities.set_value(member, 'cluster_id', cluster_id)
+        return cluster_id
+    
+    def _rescore(self, entity_id: str):
+        """Recalculate one entity's confidence from its identifiers and conflicts"""
+        position = self.entities.positions[entity_id]
+        records = self.entities.identifier_records(position)
+        score = ConfidenceScorer.entity_confidence_for(
+            tuple((id_type, source) for id_type, _, source, _, _, _ in records)
+        ) if records else 0.0
+        self.entities.confidence[position] = score * CONFLICT_PENALTY ** self.conflict_counts[entity_id]
     
-    def _determine_entity_type(self, row: pd.Series) -> str:
-        """Determine if entity is student or staff"""
-        if row.role == 'student' and pd.notna(row.get('student_id')):
-            return "student"
-        elif row.role == 'staff' and pd.notna(row.get('staff_id')):
-            return "staff"
-        elif row.role == "faculty" and pd.notna(row.get('faculty_id')):
-            return "faculty"
-        return "unknown"
+    def build_attribute_index(self):
+        """Precompute entity positions for every department/entity_type filter combination"""
+        self.attribute_index = {
+            fields: self.entities.group_positions(*fields)
+            for fields in LISTING_FILTERS
+        }
+    
+    def list_entities(
+        self,
+        department: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> Tuple[List[Entity], int, Optional[str]]:
+        """
+        One page of entities matching the filters, in store order
+        
+        Returns (entities, filtered total, next cursor). The cursor is the last
+        entity_id of the page; only the page itself is materialised.
+        """
+        filters = {'department': department, 'entity_type': entity_type}
+        fields = tuple(field for field, value in filters.items() if value is not None)
+        
+        if fields:
+            key = tuple(filters[field] for field in fields)
+            positions = self.attribute_index[fields].get(key[0] if len(key) == 1 else key)
+            if positions is None:
+                return [], 0, None
+        else:
+            positions = None  # every position, without allocating them
+        total = len(self.entities) if positions is None else len(positions)
+        
+        start = skip
+        if cursor is not None:
+            after = self.entities.positions.get(cursor)
+            if after is None:
+                raise ValueError(f"Unknown cursor: {cursor}")
+            start = after + 1 if positions is None else int(np.searchsorted(positions, after, side='right'))
+        
+        end = min(start + limit, total)
+        page = range(start, end) if positions is None else positions[start:end].tolist()
+        entities = [self.entities.entity_at(position) for position in page]
+        next_cursor = entities[-1].entity_id if entities and end < total else None
+        return entities, total, next_cursor
+    
+    def save_snapshot(self, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+        """Persist entities, the identifier index and co-observations, keyed on the input CSV checksums"""
+        path = resolver_snapshot.snapshot_path(cache_dir, resolver_snapshot.snapshot_key(self.data_dir))
+        resolver_snapshot.save_snapshot(self.entities, self.identifier_index, path, self.co_observed)
+        print(f"💾 Saved resolver snapshot to {path}")
+        return path
+    
+    def load_snapshot(self, cache_dir: Path = DEFAULT_CACHE_DIR) -> bool:
+        """Restore state from a snapshot matching the current CSVs; False if there is none"""
+        path = resolver_snapshot.snapshot_path(cache_dir, resolver_snapshot.snapshot_key(self.data_dir))
+        if not path.exists():
+            return False
+        
+        try:
+            store, identifier_index, co_observed = resolver_snapshot.load_snapshot(path)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable resolver snapshot {path}: {e}")
+            return False
+        
+        self.entities = store
+        self.identifier_index = defaultdict(list, identifier_index)
+        self.co_observed = co_observed
+        self.name_index = None
+        self.face_index = None
+        self.conflicts.clear()
+        self.conflict_counts.clear()
+        self.build_clusters()
+        self.build_attribute_index()
+        
+        print(f"✅ Loaded {len(self.entities)} entities from snapshot")
+        return True
+    
+    @staticmethod
+    def _determine_entity_types(profiles: pd.DataFrame) -> np.ndarray:
+        """Determine if each entity is student, staff or faculty"""
+        role = profiles['role']
+        has = lambda column: profiles[column].notna() if column in profiles else False
+        return np.select(
+            [
+                (role == 'student') & has('student_id'),
+                (role == 'staff') & has('staff_id'),
+                (role == 'faculty') & has('faculty_id')
+            ],
+            ['student', 'staff', 'faculty'],
+            default='unknown'
+        )
     
     def resolve_by_identifier(
         self, 
@@ -103,47 +440,121 @@ class EntityResolver:
         
         return None
     
+    def build_identifier_map(
+        self,
+        identifier_types: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """Flatten the identifier index into {identifier_type: {value: entity_id}}"""
+        identifier_map = defaultdict(dict)
+        
+        for lookup_key, entity_ids in self.identifier_index.items():
+            id_type, value = lookup_key.split(':', 1)
+            if identifier_types is None or id_type in identifier_types:
+                # First match wins, same as resolve_by_identifier
+                identifier_map[id_type].setdefault(value, entity_ids[0])
+        
+        return dict(identifier_map)
+    
     def resolve_by_fuzzy_name(
         self, 
         name: str, 
         threshold: float = 0.85
     ) -> List[Tuple[Entity, float]]:
-        """Fuzzy name matching using Levenshtein distance"""
-        matches = []
+        """Fuzzy name matching using Levenshtein distance, scoring only indexed candidates"""
+        if self.name_index is None:
+            self.name_index = FuzzyNameIndex.from_entities(self.entities)
         
-        for entity in self.entities.values():
-            if entity.name:
-                # Calculate similarity ratio
-                ratio = Levenshtein.ratio(name.lower(), entity.name.lower())
-                
-                if ratio >= threshold:
-                    matches.append((entity, ratio))
+        return [
+            (self.entities[entity_id], ratio)
+            for entity_id, ratio in self.name_index.search(name, threshold)
+        ]
+    
+    def resolve_batch_by_fuzzy_name(self, names: List[str], threshold: float = 0.85, limit: int = 1,
+                                    max_workers: Optional[int] = None) -> List[List[Tuple[Entity, float]]]:
+        """Best fuzzy matches for each of many names, in input order"""
+        if self.name_index is None:
+            self.name_index = FuzzyNameIndex.from_entities(self.entities)
         
-        # Sort by similarity descending
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches
+        return [
+            [(self.entities[entity_id], ratio) for entity_id, ratio in matches]
+            for matches in self.name_index.search_many(names, threshold, limit, max_workers)
+        ]
+    
+    def build_face_index(self, approximate: bool = False) -> FaceEmbeddingIndex:
+        """Index the embeddings of faces that belong to a known entity"""
+        if not hasattr(self, 'face_embeddings'):
+            print("⚠️  No face embeddings dataset, face index is empty")
+            self.face_index = FaceEmbeddingIndex([], np.empty((0, 0), dtype=np.float32), approximate=approximate)
+            return self.face_index
+        face_ids, vectors = embedding_matrix(self.face_embeddings)
+        owners = [self.identifier_index.get(f"face_id:{face_id}") for face_id in face_ids]
+        known = np.array([bool(owner) for owner in owners], dtype=bool)
+        
+        self.face_index = FaceEmbeddingIndex(
+            [owner[0] for owner in owners if owner], vectors[known], approximate=approximate
+        )
+        print(f"✅ Indexed {len(self.face_index)} face embeddings")
+        return self.face_index
+    
+    def resolve_unmatched_faces(
+        self,
+        frames: Optional[pd.DataFrame] = None,
+        k: int = 3,
+        min_similarity: float = 0.8,
+        approximate: bool = False
+    ) -> pd.DataFrame:
+        """
+        Suggest entities for CCTV detections whose face_id matches no profile
+        
+        Each unmatched face with an embedding is compared against profile faces
+        in one batch; returns frame_id, face_id, entity_id, similarity, rank.
+        Without a face embeddings dataset there is nothing to compare, so the
+        result is empty.
+        """
+        columns = ['frame_id', 'face_id', 'entity_id', 'similarity', 'rank']
+        if not hasattr(self, 'face_embeddings'):
+            return pd.DataFrame(columns=columns)
+        
+        if self.face_index is None or (approximate and self.face_index.planes is None):
+            self.build_face_index(approximate=approximate)
+        
+        frames = self.cctv if frames is None else frames
+        face_ids = frames['face_id'].dropna().astype(str)
+        known = face_ids.map(lambda face_id: f"face_id:{face_id}" in self.identifier_index)
+        unmatched = frames.loc[face_ids.index[~known.to_numpy()]]
+        
+        embedding_ids, vectors = embedding_matrix(self.face_embeddings)
+        row_of = pd.Series(np.arange(len(embedding_ids)), index=embedding_ids)
+        row_of = row_of[~row_of.index.duplicated()]
+        
+        # Score each distinct unmatched face once, then fan back out to its frames
+        query_ids = pd.Index(unmatched['face_id'].astype(str).unique()).intersection(row_of.index)
+        search = self.face_index.search_approximate if approximate else self.face_index.search
+        candidates = dict(zip(query_ids, search(vectors[row_of[query_ids].to_numpy()], k, min_similarity)))
+        
+        records = [
+            {
+                'frame_id': frame_id,
+                'face_id': face_id,
+                'entity_id': entity_id,
+                'similarity': similarity,
+                'rank': rank
+            }
+            for frame_id, face_id in zip(unmatched['frame_id'], unmatched['face_id'].astype(str))
+            for rank, (entity_id, similarity) in enumerate(candidates.get(face_id, []), start=1)
+        ]
+        return pd.DataFrame(records, columns=columns)
     
     def resolve_transitive(
         self, 
         entity_id: str
     ) -> List[Entity]:
-        """Find all entities linked through shared identifiers"""
-        if entity_id not in self.entities:
-            return []
-        
-        entity = self.entities[entity_id]
-        linked_entities = set()
-        
-        # For each identifier, find other entities with same identifier
-        for identifier in entity.identifiers:
-            lookup_key = f"{identifier.type}:{identifier.value}"
-            related_entity_ids = self.identifier_index.get(lookup_key, [])
-            
-            for related_id in related_entity_ids:
-                if related_id != entity_id:
-                    linked_entities.add(related_id)
-        
-        return [self.entities[eid] for eid in linked_entities]
+        """Find all entities linked through shared identifiers, at any number of hops"""
+        return [
+            self.entities[member_id]
+            for member_id in self.cluster_members(entity_id)
+            if member_id != entity_id
+        ]
     
     def get_all_identifiers_for_entity(
         self, 
@@ -153,21 +564,14 @@ class EntityResolver:
         if entity_id not in self.entities:
             return {}
         
-        entity = self.entities[entity_id]
-        all_identifiers = defaultdict(list)
-        
-        # Direct identifiers
-        for identifier in entity.identifiers:
-            all_identifiers[identifier.type].append(identifier.value)
-        
-        # Transitive identifiers
-        linked = self.resolve_transitive(entity_id)
-        for linked_entity in linked:
-            for identifier in linked_entity.identifiers:
-                if identifier.value not in all_identifiers[identifier.type]:
-                    all_identifiers[identifier.type].append(identifier.value)
+        # Direct identifiers first, then the rest of the cluster
+        all_identifiers = defaultdict(dict)
+        members = [entity_id] + [m for m in self.cluster_members(entity_id) if m != entity_id]
+        for member_id in members:
+            for id_type, value in self.entities.identifiers(member_id):
+                all_identifiers[id_type].setdefault(value, None)
         
-        return dict(all_identifiers)
+        return {id_type: list(values) for id_type, values in all_identifiers.items()}
 
 # Initialize resolver (will be used in API)
 resolver = None
@@ -178,5 +582,10 @@ def get_resolver() -> EntityResolver:
     if resolver is None:
         data_dir = Path(__file__).parent.parent / "augmented"
         resolver = EntityResolver(data_dir)
-        resolver.build_entity_graph()
+        if not resolver.load_snapshot():
+            resolver.build_entity_graph()
+            try:
+                resolver.save_snapshot()
+            except OSError as e:
+                print(f"⚠️  Could not save resolver snapshot: {e}")
     return resolver
\ No newline at end of file
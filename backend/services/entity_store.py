@@ -0,0 +1,403 @@
+# backend/app/services/entity_store.py
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import sys
+import numpy as np
+import pandas as pd
+
+from models.entity import Entity, Identifier
+
+# Entity attributes stored as dictionary-encoded string columns
+ENTITY_FIELDS = ('name', 'email', 'entity_type', 'department', 'cluster_id')
+
+# (type, value, source, confidence, first_seen, last_seen)
+IdentifierRecord = Tuple[str, str, str, float, datetime, datetime]
+
+class StringColumn:
+    """Nullable strings stored as int32 codes into a table of distinct, interned values"""
+
+    def __init__(self, codes: np.ndarray, values: List[str]):
+        self.codes = codes
+        self.values = values
+        self._lookup = {value: code for code, value in enumerate(values)}
+
+    @classmethod
+    def encode(cls, items: Iterable[Optional[str]]) -> "StringColumn":
+        # factorize numbers values by first appearance and gives None/NaN code -1
+        codes, uniques = pd.factorize(pd.Series(list(items), dtype=object))
+        return cls(codes.astype(np.int32), [sys.intern(str(value)) for value in uniques])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, position: int) -> Optional[str]:
+        code = self.codes[position]
+        return self.values[code] if code >= 0 else None
+
+    def code_of(self, value: str) -> int:
+        """Code for a value, or -2 (matches nothing) if the column never holds it"""
+        return self._lookup.get(value, -2)
+
+    def set(self, position: int, value: Optional[str]):
+        if value is None:
+            self.codes[position] = -1
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        self.codes[position] = code
+
+    def to_list(self) -> List[Optional[str]]:
+        values = self.values
+        return [values[code] if code >= 0 else None for code in self.codes.tolist()]
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f"{prefix}_codes": self.codes, f"{prefix}_values": np.array(self.values, dtype=str)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> "StringColumn":
+        return cls(arrays[f"{prefix}_codes"], [sys.intern(v) for v in arrays[f"{prefix}_values"].tolist()])
+
+class EntityStore(Mapping):
+    """
+    Columnar store of resolved entities, read-only through the Mapping API
+
+    Attributes are dictionary-encoded string columns and identifiers are kept
+    in CSR layout (one offsets array into flat identifier columns).
+    store[entity_id] builds a pydantic Entity on demand, so Entity objects only
+    exist at the API boundary; internal code should use the column accessors.
+    Identifiers observed after the build live in a per-entity overlay until
+    compact() folds them into the arrays.
+    """
+
+    def __init__(self, entity_ids: List[str], columns: Dict[str, StringColumn],
+                 confidence: np.ndarray, created_at: np.ndarray, identifier_offsets: np.ndarray,
+                 identifier_type: StringColumn, identifier_value: np.ndarray,
+                 identifier_source: StringColumn, identifier_confidence: np.ndarray,
+                 identifier_first_seen: np.ndarray, identifier_last_seen: np.ndarray):
+        self.entity_ids = entity_ids
+        self.positions: Dict[str, int] = {entity_id: i for i, entity_id in enumerate(entity_ids)}
+        self.columns = columns
+        self.confidence = confidence
+        self.created_at = created_at
+        self.identifier_offsets = identifier_offsets
+        self.identifier_type = identifier_type
+        self.identifier_value = identifier_value
+        self.identifier_source = identifier_source
+        self.identifier_confidence = identifier_confidence
+        self.identifier_first_seen = identifier_first_seen
+        self.identifier_last_seen = identifier_last_seen
+        # Identifiers observed after the build, per store position; folded in by compact()
+        self.overlay: Dict[int, List[list]] = {}
+        self.updated_at: Dict[int, datetime] = {}
+
+    @classmethod
+    def empty(cls) -> "EntityStore":
+        return cls.from_records([])
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict], created_at: Optional[datetime] = None) -> "EntityStore":
+        """
+        Build from dicts with entity_id, the ENTITY_FIELDS, confidence_score
+        and 'identifiers' as a list of IdentifierRecord tuples
+        """
+        created_at = created_at or datetime.now()
+        identifiers = [identifier for record in records for identifier in record['identifiers']]
+        offsets = np.cumsum([0] + [len(record['identifiers']) for record in records]).astype(np.int64)
+
+        return cls(
+            entity_ids=[sys.intern(str(record['entity_id'])) for record in records],
+            columns={field: StringColumn.encode(record.get(field) for record in records) for field in ENTITY_FIELDS},
+            confidence=np.array([record.get('confidence_score', 1.0) for record in records], dtype=np.float64),
+            created_at=np.full(len(records), np.datetime64(created_at, 'us')),
+            identifier_offsets=offsets,
+            identifier_type=StringColumn.encode(identifier[0] for identifier in identifiers),
+            identifier_value=np.array([identifier[1] for identifier in identifiers], dtype=str),
+            identifier_source=StringColumn.encode(identifier[2] for identifier in identifiers),
+            identifier_confidence=np.array([identifier[3] for identifier in identifiers], dtype=np.float64),
+            identifier_first_seen=np.array([identifier[4] for identifier in identifiers], dtype='datetime64[us]'),
+            identifier_last_seen=np.array([identifier[5] for identifier in identifiers], dtype='datetime64[us]'),
+        )
+
+    @classmethod
+    def from_columns(cls, entity_ids: List[str], attributes: Dict[str, Sequence[Optional[str]]],
+                     confidence: np.ndarray, identifier_offsets: np.ndarray,
+                     identifier_type: Sequence[str], identifier_value: np.ndarray,
+                     identifier_source: Sequence[str], identifier_confidence: np.ndarray,
+                     created_at: Optional[datetime] = None) -> "EntityStore":
+        """
+        Build from whole columns; identifiers are flat, grouped by entity, with
+        identifier_offsets[i]:identifier_offsets[i + 1] belonging to entity i
+        """
+        created_at = np.datetime64(created_at or datetime.now(), 'us')
+        missing = [None] * len(entity_ids)
+
+        return cls(
+            entity_ids=[sys.intern(entity_id) for entity_id in entity_ids],
+            columns={field: StringColumn.encode(attributes.get(field, missing)) for field in ENTITY_FIELDS},
+            confidence=np.asarray(confidence, dtype=np.float64),
+            created_at=np.full(len(entity_ids), created_at),
+            identifier_offsets=np.asarray(identifier_offsets, dtype=np.int64),
+            identifier_type=StringColumn.encode(identifier_type),
+            identifier_value=np.asarray(identifier_value, dtype=str),
+            identifier_source=StringColumn.encode(identifier_source),
+            identifier_confidence=np.asarray(identifier_confidence, dtype=np.float64),
+            identifier_first_seen=np.full(len(identifier_value), created_at),
+            identifier_last_seen=np.full(len(identifier_value), created_at),
+        )
+
+    @classmethod
+    def from_entities(cls, entities: Iterable[Entity]) -> "EntityStore":
+        """Build from pydantic entities"""
+        return cls.from_records([
+            {
+                'entity_id': entity.entity_id,
+                'confidence_score': entity.confidence_score,
+                'identifiers': [
+                    (i.type, i.value, i.source, i.confidence, i.first_seen, i.last_seen)
+                    for i in entity.identifiers
+                ],
+                **{field: getattr(entity, field) for field in ENTITY_FIELDS}
+            }
+            for entity in entities
+        ])
+
+    # Mapping API -----------------------------------------------------------
+
+    def __getitem__(self, entity_id: str) -> Entity:
+        position = self.positions.get(entity_id)
+        if position is None:
+            raise KeyError(entity_id)
+        return self.entity_at(position)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entity_ids)
+
+    def __len__(self) -> int:
+        return len(self.entity_ids)
+
+    def __contains__(self, entity_id) -> bool:
+        return entity_id in self.positions
+
+    # Column access ---------------------------------------------------------
+
+    def value(self, entity_id: str, field: str) -> Optional[str]:
+        """One attribute of one entity without building an Entity"""
+        position = self.positions.get(entity_id)
+        return None if position is None else self.columns[field][position]
+
+    def column(self, field: str) -> List[Optional[str]]:
+        """An attribute for every entity, in store order"""
+        return self.columns[field].to_list()
+
+    def set_column(self, field: str, values: Sequence[Optional[str]]):
+        """Replace an attribute for every entity, in store order"""
+        if len(values) != len(self.entity_ids):
+            raise ValueError(f"Expected {len(self.entity_ids)} values for {field}, got {len(values)}")
+        self.columns[field] = StringColumn.encode(values)
+
+    def positions_where(self, field: str, value: str) -> np.ndarray:
+        """Store positions whose attribute equals value"""
+        return np.flatnonzero(self.columns[field].codes == self.columns[field].code_of(value))
+
+    def group_positions(self, *fields: str) -> Dict:
+        """
+        Sorted store positions for every distinct value of one or more attributes
+
+        Keys are values for one field and tuples of values for several;
+        entities with a missing value in any of the fields are left out.
+        """
+        codes = [self.columns[field].codes.astype(np.int64) for field in fields]
+        present = np.logical_and.reduce([c >= 0 for c in codes]) if codes else np.ones(0, dtype=bool)
+
+        # One composite code per entity, then group positions by it
+        composite = np.zeros(len(self.entity_ids), dtype=np.int64)
+        for field, field_codes in zip(fields, codes):
+            composite = composite * (len(self.columns[field].values) + 1) + field_codes + 1
+        positions = np.flatnonzero(present)
+        order = positions[np.argsort(composite[positions], kind='stable')]
+        keys, starts = np.unique(composite[order], return_index=True)
+
+        groups = {}
+        for group in np.split(order, starts[1:]) if len(order) else []:
+            position = group[0]
+            values = tuple(self.columns[field][position] for field in fields)
+            groups[values[0] if len(fields) == 1 else values] = group
+        return groups
+
+    def identifiers(self, entity_id: str) -> List[Tuple[str, str]]:
+        """(type, value) pairs of an entity's identifiers"""
+        position = self.positions.get(entity_id)
+        if position is None:
+            return []
+        start, end = self._identifier_span(position)
+        types = self.identifier_type.values
+        pairs = list(zip([types[code] for code in self.identifier_type.codes[start:end].tolist()],
+                         self.identifier_value[start:end].tolist()))
+        return pairs + [(record[0], record[1]) for record in self.overlay.get(position, ())]
+
+    def get_identifier(self, entity_id: str, id_type: str) -> Optional[str]:
+        """Value of an entity's identifier of the given type"""
+        position = self.positions.get(entity_id)
+        if position is None:
+            return None
+        start, end = self._identifier_span(position)
+        codes = self.identifier_type.codes[start:end].tolist()
+        code = self.identifier_type.code_of(id_type)
+        if code in codes:
+            return str(self.identifier_value[start + codes.index(code)])
+        return next((record[1] for record in self.overlay.get(position, ()) if record[0] == id_type), None)
+
+    def _identifier_span(self, position: int) -> Tuple[int, int]:
+        return int(self.identifier_offsets[position]), int(self.identifier_offsets[position + 1])
+
+    def identifier_records(self, position: int) -> List[IdentifierRecord]:
+        """Every identifier of the entity at a store position, columnar ones first"""
+        start, end = self._identifier_span(position)
+        types, sources = self.identifier_type.values, self.identifier_source.values
+        records = [
+            (types[type_code], value, sources[source_code], confidence, first_seen, last_seen)
+            for type_code, value, source_code, confidence, first_seen, last_seen in zip(
+                self.identifier_type.codes[start:end].tolist(),
+                self.identifier_value[start:end].tolist(),
+                self.identifier_source.codes[start:end].tolist(),
+                self.identifier_confidence[start:end].tolist(),
+                self.identifier_first_seen[start:end].tolist(),
+                self.identifier_last_seen[start:end].tolist()
+            )
+        ]
+        return records + [tuple(record) for record in self.overlay.get(position, ())]
+
+    def entity_at(self, position: int) -> Entity:
+        """Materialise the pydantic Entity at a store position"""
+        identifiers = [
+            Identifier.model_construct(type=id_type, value=value, source=source, confidence=confidence,
+                                       first_seen=first_seen, last_seen=last_seen)
+            for id_type, value, source, confidence, first_seen, last_seen in self.identifier_records(position)
+        ]
+        created_at = self.created_at[position].item()
+
+        return Entity.model_construct(
+            entity_id=self.entity_ids[position],
+            identifiers=identifiers,
+            confidence_score=float(self.confidence[position]),
+            linked_entity_ids=[],
+            created_at=created_at,
+            updated_at=self.updated_at.get(position, created_at),
+            **{field: column[position] for field, column in self.columns.items()}
+        )
+
+    # Incremental updates -----------------------------------------------------
+
+    def record_identifier(self, entity_id: str, id_type: str, value: str, source: str,
+                          seen_at: datetime, confidence: float = 1.0) -> str:
+        """
+        Apply one observed identifier to an entity
+
+        Returns 'updated' when the (type, value, source) identifier exists and
+        only its first_seen/last_seen moved, 'added' when it was appended, and
+        'conflict' when the entity already holds a different value of that type
+        (the identifier is then not added, as in Entity.add_identifier).
+        """
+        position = self.positions[entity_id]
+        start, end = self._identifier_span(position)
+        seen = np.datetime64(seen_at, 'us')
+
+        type_code = self.identifier_type.code_of(id_type)
+        same_type = start + np.flatnonzero(self.identifier_type.codes[start:end] == type_code)
+        overlay = self.overlay.get(position, [])
+        overlay_same_type = [record for record in overlay if record[0] == id_type]
+
+        source_code = self.identifier_source.code_of(source)
+        for i in same_type.tolist():
+            if self.identifier_value[i] == value and self.identifier_source.codes[i] == source_code:
+                self.identifier_first_seen[i] = min(self.identifier_first_seen[i], seen)
+                self.identifier_last_seen[i] = max(self.identifier_last_seen[i], seen)
+                self.updated_at[position] = datetime.now()
+                return 'updated'
+        for record in overlay_same_type:
+            if record[1] == value and record[2] == source:
+                record[4], record[5] = min(record[4], seen_at), max(record[5], seen_at)
+                self.updated_at[position] = datetime.now()
+                return 'updated'
+
+        known_values = set(self.identifier_value[same_type].tolist()) | {record[1] for record in overlay_same_type}
+        if known_values and value not in known_values:
+            return 'conflict'
+
+        self.overlay.setdefault(position, []).append([id_type, value, source, confidence, seen_at, seen_at])
+        self.updated_at[position] = datetime.now()
+        return 'added'
+
+    def set_value(self, entity_id: str, field: str, value: Optional[str]):
+        """Change one attribute of one entity"""
+        self.columns[field].set(self.positions[entity_id], value)
+
+    def compact(self):
+        """Fold overlay identifiers back into the columnar arrays"""
+        if not self.overlay:
+            return
+
+        extra = [(position, record) for position, records in self.overlay.items() for record in records]
+        counts = np.diff(self.identifier_offsets)
+        owners = np.concatenate([
+            np.repeat(np.arange(len(self.entity_ids)), counts),
+            np.array([position for position, _ in extra], dtype=np.int64)
+        ])
+        # Stable sort keeps columnar identifiers ahead of overlay ones for each entity
+        order = np.argsort(owners, kind='stable')
+
+        def merged(base: np.ndarray, values: List, dtype) -> np.ndarray:
+            return np.concatenate([base, np.array(values, dtype=dtype)])[order]
+
+        types = self.identifier_type.to_list() + [record[0] for _, record in extra]
+        sources = self.identifier_source.to_list() + [record[2] for _, record in extra]
+        self.identifier_type = StringColumn.encode(types[i] for i in order.tolist())
+        self.identifier_source = StringColumn.encode(sources[i] for i in order.tolist())
+        self.identifier_value = merged(self.identifier_value, [r[1] for _, r in extra], str)
+        self.identifier_confidence = merged(self.identifier_confidence, [r[3] for _, r in extra], np.float64)
+        self.identifier_first_seen = merged(self.identifier_first_seen, [r[4] for _, r in extra], 'datetime64[us]')
+        self.identifier_last_seen = merged(self.identifier_last_seen, [r[5] for _, r in extra], 'datetime64[us]')
+        self.identifier_offsets = np.concatenate([
+            [0], np.cumsum(np.bincount(owners, minlength=len(self.entity_ids)))
+        ]).astype(np.int64)
+        self.overlay = {}
+
+    # Serialisation -----------------------------------------------------------
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Plain NumPy arrays (no object dtype) describing the whole store"""
+        self.compact()
+        arrays = {
+            'entity_id': np.array(self.entity_ids, dtype=str),
+            'confidence': self.confidence,
+            'created_at': self.created_at,
+            'identifier_offsets': self.identifier_offsets,
+            'identifier_value': self.identifier_value,
+            'identifier_confidence': self.identifier_confidence,
+            'identifier_first_seen': self.identifier_first_seen,
+            'identifier_last_seen': self.identifier_last_seen,
+        }
+        for field, column in self.columns.items():
+            arrays.update(column.to_arrays(field))
+        arrays.update(self.identifier_type.to_arrays('identifier_type'))
+        arrays.update(self.identifier_source.to_arrays('identifier_source'))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "EntityStore":
+        return cls(
+            entity_ids=[sys.intern(entity_id) for entity_id in arrays['entity_id'].tolist()],
+            columns={field: StringColumn.from_arrays(arrays, field) for field in ENTITY_FIELDS},
+            confidence=arrays['confidence'],
+            created_at=arrays['created_at'],
+            identifier_offsets=arrays['identifier_offsets'],
+            identifier_type=StringColumn.from_arrays(arrays, 'identifier_type'),
+            identifier_value=arrays['identifier_value'],
+            identifier_source=StringColumn.from_arrays(arrays, 'identifier_source'),
+            identifier_confidence=arrays['identifier_confidence'],
+            identifier_first_seen=arrays['identifier_first_seen'],
+            identifier_last_seen=arrays['identifier_last_seen'],
+        )
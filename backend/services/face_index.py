@@ -0,0 +1,133 @@
+# backend/app/services/face_index.py
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# Queries scored per matrix multiply; bounds the (batch x index) similarity block
+DEFAULT_QUERY_BATCH = 1024
+
+def embedding_matrix(df: pd.DataFrame, id_column: str = 'face_id') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split a face embeddings table into (ids, float32 matrix)
+
+    Accepts either one column holding serialised vectors ("[0.1, 0.2, ...]")
+    or one numeric column per dimension (embedding_0.., dim_0..).
+    """
+    ids = df[id_column].astype(str).to_numpy()
+    vector_columns = [col for col in df.columns if col != id_column and
+                      ('embed' in col.lower() or col.lower().startswith('dim_'))]
+
+    if len(vector_columns) == 1 and not pd.api.types.is_numeric_dtype(df[vector_columns[0]]):
+        text = df[vector_columns[0]].astype(str).str.strip('[]() ')
+        matrix = np.vstack([np.array(row.replace(',', ' ').split(), dtype=np.float32) for row in text])
+    else:
+        if not vector_columns:
+            vector_columns = [col for col in df.select_dtypes('number').columns if col != id_column]
+        matrix = df[vector_columns].to_numpy(dtype=np.float32)
+
+    return ids, matrix
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise rows so a dot product is the cosine similarity"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class FaceEmbeddingIndex:
+    """
+    Cosine nearest-neighbour search over face embeddings
+
+    search() scores queries against every vector in batched matrix multiplies.
+    With approximate=True a random-hyperplane LSH index is also built and
+    search_approximate() scores only vectors sharing a hash bucket with the
+    query in at least one table.
+    """
+
+    def __init__(self, keys: Sequence[str], vectors: np.ndarray, approximate: bool = False,
+                 n_planes: int = 12, n_tables: int = 4, seed: int = 42):
+        self.keys = np.asarray(keys)
+        self.vectors = normalize_rows(vectors)
+        self.planes: Optional[np.ndarray] = None
+        self.tables: List[dict] = []
+
+        if approximate:
+            self.build_lsh(n_planes, n_tables, seed)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, queries: np.ndarray, k: int = 5, min_similarity: float = 0.0,
+               batch_size: int = DEFAULT_QUERY_BATCH) -> List[List[Tuple[str, float]]]:
+        """Top-k (key, cosine similarity) for each query row, exact"""
+        queries = normalize_rows(np.atleast_2d(queries))
+        k = min(k, len(self.keys))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+        results = []
+
+        for start in range(0, len(queries), batch_size):
+            scores = queries[start:start + batch_size] @ self.vectors.T
+            # argpartition avoids sorting every similarity; only the top k are ordered
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            for positions, similarities in zip(top, top_scores):
+                results.append([
+                    (self.keys[position], float(similarity))
+                    for position, similarity in zip(positions, similarities)
+                    if similarity >= min_similarity
+                ])
+
+        return results
+
+    def build_lsh(self, n_planes: int = 12, n_tables: int = 4, seed: int = 42):
+        """Hash every vector into n_tables tables of 2**n_planes buckets"""
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, n_planes, self.vectors.shape[1])).astype(np.float32)
+        self.tables = []
+
+        for codes in self._hash(self.vectors):
+            order = np.argsort(codes, kind='stable')
+            bucket_codes, starts = np.unique(codes[order], return_index=True)
+            self.tables.append(dict(zip(bucket_codes, np.split(order, starts[1:]))))
+
+    def _hash(self, vectors: np.ndarray) -> np.ndarray:
+        """Bucket code per table for each vector, shape (n_tables, n_vectors)"""
+        bits = np.einsum('tpd,nd->tnp', self.planes, vectors) > 0
+        weights = 1 << np.arange(self.planes.shape[1], dtype=np.int64)
+        return bits.astype(np.int64) @ weights
+
+    def search_approximate(self, queries: np.ndarray, k: int = 5,
+                           min_similarity: float = 0.0) -> List[List[Tuple[str, float]]]:
+        """Top-k over LSH candidates only; falls back to exact search when no bucket matches"""
+        if self.planes is None:
+            return self.search(queries, k, min_similarity)
+
+        queries = normalize_rows(np.atleast_2d(queries))
+        codes = self._hash(queries)
+        results = []
+
+        for row, query in enumerate(queries):
+            candidates = [
+                self.tables[table].get(codes[table, row])
+                for table in range(len(self.tables))
+            ]
+            candidates = [c for c in candidates if c is not None]
+            if not candidates:
+                results.extend(self.search(query, k, min_similarity))
+                continue
+
+            positions = np.unique(np.concatenate(candidates))
+            scores = self.vectors[positions] @ query
+            top = np.argsort(-scores)[:k]
+            results.append([
+                (self.keys[positions[i]], float(scores[i]))
+                for i in top
+                if scores[i] >= min_similarity
+            ])
+
+        return results
@@ -0,0 +1,186 @@
+# backend/app/services/fuzzy_index.py
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import math
+import os
+import threading
+import numpy as np
+import Levenshtein
+
+from services.entity_store import EntityStore
+
+# Float slack so boundary candidates are never pruned by rounding
+_EPSILON = 1e-9
+
+# Below this many distinct names, pool start-up costs more than it saves
+PARALLEL_MIN_BATCH = 500
+
+logger = logging.getLogger(__name__)
+
+# Shared pool, reused while the index and worker count stay the same; closed by close_pool()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_index: Optional["FuzzyNameIndex"] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Index copy held by each pool worker
+_worker_index: Optional["FuzzyNameIndex"] = None
+
+def _init_worker(index: "FuzzyNameIndex"):
+    global _worker_index
+    _worker_index = index
+
+def _search_chunk(names: List[str], threshold: float, limit: Optional[int]) -> List[List[Tuple[str, float]]]:
+    return [_worker_index.search(name, threshold)[:limit] for name in names]
+
+def _get_pool(index: "FuzzyNameIndex", workers: int) -> ProcessPoolExecutor:
+    """The shared pool for this index, replacing one started for another index"""
+    global _pool, _pool_index, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_index is not index or _pool_workers != workers:
+            if _pool is not None:
+                # Searches already running on the old pool finish on it
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index,))
+            _pool_index, _pool_workers = index, workers
+        return _pool
+
+def close_pool():
+    """Shut down the shared search pool and its worker processes"""
+    global _pool, _pool_index
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+            _pool_index = None
+            logger.info("Closed fuzzy search process pool")
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Forget a broken pool so the next batch starts a fresh one"""
+    global _pool, _pool_index
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_index = None
+
+def bigram_counts(text: str) -> Counter:
+    """Multiset of adjacent character pairs"""
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+class FuzzyNameIndex:
+    """
+    Candidate-blocking index for Levenshtein.ratio name search
+
+    Levenshtein.ratio(a, b) = 2 * LCS / (len(a) + len(b)), so a match at
+    threshold t needs:
+
+    - a length bound: |len(a) - len(b)| <= (1 - t) * (len(a) + len(b))
+    - a bigram count bound: every character outside the LCS breaks at most one
+      adjacent pair of it, so the strings share at least
+      3 * LCS - 1 - (len(a) + len(b)) >= (1.5t - 1) * (len(a) + len(b)) - 1
+      bigrams, counted with multiplicity
+
+    Both bounds are necessary conditions, so pruning with them returns exactly
+    the matches of a full scan; only the survivors are scored.
+    """
+
+    def __init__(self, names: Iterable[Tuple[str, str]]):
+        # Keys in insertion order so ties sort like a scan over the source dict
+        self.keys: List[str] = []
+        self.names: List[str] = []
+        postings = defaultdict(list)
+
+        for key, name in names:
+            if not name or not isinstance(name, str):
+                continue
+            normalized = name.lower()
+            position = len(self.keys)
+            self.keys.append(key)
+            self.names.append(normalized)
+            for bigram, count in bigram_counts(normalized).items():
+                postings[bigram].append((position, count))
+
+        self.lengths = np.array([len(name) for name in self.names], dtype=np.int32)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            bigram: (
+                np.array([position for position, _ in entries], dtype=np.int32),
+                np.array([count for _, count in entries], dtype=np.int32)
+            )
+            for bigram, entries in postings.items()
+        }
+
+    @classmethod
+    def from_entities(cls, entities: EntityStore) -> "FuzzyNameIndex":
+        """Index the name column of an entity store"""
+        return cls(zip(entities.keys(), entities.column('name')))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def candidates(self, normalized: str, threshold: float) -> np.ndarray:
+        """Positions of indexed names that can still reach the threshold"""
+        query_length = len(normalized)
+        total_lengths = query_length + self.lengths
+
+        mask = np.abs(self.lengths - query_length) <= (1 - threshold) * total_lengths + _EPSILON
+
+        required = (1.5 * threshold - 1) * total_lengths - 1
+        if (required > _EPSILON).any():
+            shared = np.zeros(len(self.keys), dtype=np.int32)
+            for bigram, query_count in bigram_counts(normalized).items():
+                if bigram in self.postings:
+                    positions, counts = self.postings[bigram]
+                    shared[positions] += np.minimum(counts, query_count)
+            mask &= shared >= required - _EPSILON
+
+        return np.flatnonzero(mask)
+
+    def search(self, name: str, threshold: float = 0.85) -> List[Tuple[str, float]]:
+        """Return (key, ratio) pairs with ratio >= threshold, best first"""
+        normalized = name.lower()
+        matches = []
+
+        for position in self.candidates(normalized, threshold):
+            ratio = Levenshtein.ratio(normalized, self.names[position])
+            if ratio >= threshold:
+                matches.append((self.keys[position], ratio))
+
+        # Stable sort keeps insertion order between equal ratios
+        matches.sort(key=lambda x: x[1], reverse=True)
+        return matches
+
+    def search_many(self, names: List[str], threshold: float = 0.85, limit: Optional[int] = 1,
+                    max_workers: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Search a batch of names, returning the top `limit` matches for each in input order
+
+        Duplicate names are scored once. Large batches are split across a shared
+        process pool whose workers each hold one copy of the index; the pool
+        lives until the index changes or close_pool() is called.
+        """
+        unique = list(dict.fromkeys(name.lower() for name in names))
+        workers = max_workers or os.cpu_count() or 1
+
+        if workers == 1 or len(unique) < PARALLEL_MIN_BATCH:
+            found = [self.search(name, threshold)[:limit] for name in unique]
+        else:
+            # A few chunks per worker keeps the pool busy when name lengths vary
+            size = math.ceil(len(unique) / (workers * 4))
+            chunks = [unique[i:i + size] for i in range(0, len(unique), size)]
+            pool = _get_pool(self, workers)
+            try:
+                found = [
+                    matches
+                    for chunk in pool.map(_search_chunk, chunks,
+                                          [threshold] * len(chunks), [limit] * len(chunks))
+                    for matches in chunk
+                ]
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                raise
+
+        by_name = dict(zip(unique, found))
+        return [by_name[name.lower()] for name in names]
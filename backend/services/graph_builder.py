@@ -1,23 +1,115 @@
 # backend/app/services/graph_builder.py
-from neo4j import GraphDatabase
-from typing import List, Dict, Optional
+from neo4j import AsyncDriver, Driver, GraphDatabase
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Union
 import pandas as pd
-from datetime import datetime
 from pathlib import Path
+import time
 
 from config import settings
+from services.dataset_reader import normalize_timestamps
 from services.entity_resolver import EntityResolver
+from services.neo4j_driver import fetch_all_async, get_driver
+
+# Event ingestion accepts a whole DataFrame or a stream of chunks from dataset_reader
+DataFrameSource = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+# Read queries shared by the sync and async code paths
+ENTITY_TIMELINE_QUERY = """
+MATCH (e:Entity {entity_id: $entity_id})-[:PERFORMED]->(ev:Event)
+OPTIONAL MATCH (ev)-[:AT_LOCATION]->(l:Location)
+WHERE ($start_date IS NULL OR ev.timestamp >= datetime($start_date))
+AND ($end_date IS NULL OR ev.timestamp <= datetime($end_date))
+RETURN ev.event_id as event_id,
+    ev.event_type as event_type,
+    ev.timestamp as timestamp,
+    ev.location as location,
+    l.location_id as location_id,
+    l.type as location_type
+ORDER BY ev.timestamp ASC
+"""
+
+ENTITIES_AT_LOCATION_QUERY = """
+MATCH (e:Entity)-[:PERFORMED]->(ev:Event)-[:AT_LOCATION]->(l:Location {location_id: $location_id})
+WHERE ev.timestamp <= datetime($timestamp)
+WITH e, ev
+ORDER BY ev.timestamp DESC
+WITH e, collect(ev)[0] as latest_event
+WHERE latest_event.location = $location_id
+RETURN e.entity_id as entity_id,
+       e.name as name,
+       latest_event.timestamp as last_seen
+"""
+
+MISSING_ENTITIES_QUERY = """
+MATCH (e:Entity)-[:PERFORMED]->(ev:Event)
+WITH e, max(ev.timestamp) as last_seen
+WHERE last_seen < datetime() - duration({hours: $hours})
+RETURN e.entity_id as entity_id,
+       e.name as name,
+       e.entity_type as entity_type,
+       last_seen
+ORDER BY last_seen DESC
+"""
+
+GRAPH_STATS_QUERY = """
+MATCH (e:Entity) WITH count(e) as entity_count
+MATCH (ev:Event) WITH entity_count, count(ev) as event_count
+MATCH (l:Location) WITH entity_count, event_count, count(l) as location_count
+MATCH ()-[r:SAME_AS]->() WITH entity_count, event_count, location_count, count(r) as relationship_count
+RETURN entity_count, event_count, location_count, relationship_count
+"""
+
+# Batched writes used when building the graph from the resolver
+ENTITY_UPSERT_QUERY = """
+UNWIND $rows AS row
+MERGE (e:Entity {entity_id: row.entity_id})
+SET e.name = row.name,
+    e.email = row.email,
+    e.entity_type = row.entity_type,
+    e.department = row.department,
+    e.role = row.role,
+    e.card_id = row.card_id,
+    e.device_hash = row.device_hash,
+    e.face_id = row.face_id,
+    e.student_id = row.student_id,
+    e.staff_id = row.staff_id,
+    e.cluster_id = row.cluster_id,
+    e.updated_at = datetime()
+"""
+
+SAME_AS_QUERY = """
+UNWIND $rows AS row
+MATCH (e1:Entity {entity_id: row.entity_id1})
+MATCH (e2:Entity {entity_id: row.entity_id2})
+MERGE (e1)-[r:SAME_AS]->(e2)
+SET r.confidence = row.confidence,
+    r.shared_identifiers = row.shared_identifiers
+"""
 
 class CampusGraphBuilder:
     """Build and manage Neo4j graph database"""
     
-    def __init__(self, uri: str, user: str, password: str):
-        auth = (user, password)
-        self.driver = GraphDatabase.driver(uri, auth=auth)
+    # Rows pushed through a single UNWIND statement during event ingestion
+    DEFAULT_BATCH_SIZE = 5000
+    
+    # Entity properties that raw event logs carry instead of an entity_id
+    EVENT_IDENTIFIER_TYPES = ('card_id', 'device_hash', 'face_id')
+    
+    def __init__(self, uri: str = None, user: str = None, password: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, driver: Optional[Driver] = None,
+                 async_driver: Optional[AsyncDriver] = None):
+        # Reuse the application's pooled driver when given one, otherwise own a private one
+        self._owns_driver = driver is None
+        self.driver = driver or GraphDatabase.driver(uri, auth=(user, password))
+        # Used by the *_async methods; defaults to the shared async driver
+        self.async_driver = async_driver
+        self.batch_size = batch_size
+        self.identifier_map: Optional[Dict[str, Dict[str, str]]] = None
         self._verify_connectivity()
     
     def close(self):
-        self.driver.close()
+        if self._owns_driver:
+            self.driver.close()
     
     def _verify_connectivity(self):
         """Test Neo4j connection"""
@@ -36,21 +128,6 @@ class CampusGraphBuilder:
             session.run("MATCH (n) DETACH DELETE n")
             print("✅ Database cleared")
     
-    @staticmethod
-    def format_neo4j_datetime(timestamp_str: str) -> str:
-        """Convert pandas timestamp to Neo4j-compatible datetime string"""
-        try:
-            # Parse various timestamp formats
-            if isinstance(timestamp_str, pd.Timestamp):
-                dt = timestamp_str
-            else:
-                dt = pd.to_datetime(timestamp_str)
-            
-            # Format as ISO 8601 which Neo4j understands
-            return dt.strftime('%Y-%m-%dT%H:%M:%S')
-        except Exception as e:
-            print(f"Warning: Could not parse timestamp {timestamp_str}: {e}")
-            return datetime.now().strftime('%Y-%m-%dT%H:%M:%S')   
     def create_indexes(self):
         """Create indexes for faster lookups"""
         indexes = [
@@ -59,12 +136,33 @@ class CampusGraphBuilder:
             "CREATE INDEX device_hash_index IF NOT EXISTS FOR (e:Entity) ON (e.device_hash)",
             "CREATE INDEX face_id_index IF NOT EXISTS FOR (e:Entity) ON (e.face_id)",
             "CREATE INDEX email_index IF NOT EXISTS FOR (e:Entity) ON (e.email)",
+            "CREATE INDEX cluster_id_index IF NOT EXISTS FOR (e:Entity) ON (e.cluster_id)",
             "CREATE INDEX timestamp_index IF NOT EXISTS FOR (e:Event) ON (e.timestamp)",
         ]
         
         with self.driver.session() as session:
             for index_query in indexes:
                 session.run(index_query)
+            
+            # Parallel ingestion stages MERGE the same locations; the constraint
+            # makes those MERGEs lock instead of creating duplicates
+            try:
+                session.run(
+                    "CREATE CONSTRAINT location_id_unique IF NOT EXISTS "
+                    "FOR (l:Location) REQUIRE l.location_id IS UNIQUE"
+                )
+            except Exception as e:
+                print(f"⚠️  Could not create Location constraint (duplicate locations?): {str(e)[:100]}")
+
+            # Event writes MERGE on event_id, which needs an index to stay fast
+            try:
+                session.run(
+                    "CREATE CONSTRAINT event_id_unique IF NOT EXISTS "
+                    "FOR (ev:Event) REQUIRE ev.event_id IS UNIQUE"
+                )
+            except Exception as e:
+                print(f"⚠️  Could not create Event constraint (duplicate events?): {str(e)[:100]}")
+                session.run("CREATE INDEX event_id_index IF NOT EXISTS FOR (ev:Event) ON (ev.event_id)")
         
         print("✅ Created indexes")
     
@@ -90,69 +188,13 @@ class CampusGraphBuilder:
             result = session.run(query, **entity_data)
             return result.single()
     
-    def create_event_node(self, event_data: Dict):
-        """Create event node and link to entity"""
-        query = """
-        MATCH (e:Entity {entity_id: $entity_id})
-        CREATE (ev:Event {
-            event_id: $event_id,
-            event_type: $event_type,
-            timestamp: datetime($timestamp),
-            location: $location,
-            source_dataset: $source_dataset
-        })
-        CREATE (e)-[:PERFORMED]->(ev)
-        RETURN ev
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, **event_data)
-            return result.single()
-    
-    def create_location_node(self, location_id: str, location_type: str = "Unknown"):
-        """Create location node"""
-        query = """
-        MERGE (l:Location {location_id: $location_id})
-        SET l.type = $location_type
-        RETURN l
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, location_id=location_id, location_type=location_type)
-            return result.single()
-    
-    def link_event_to_location(self, event_id: str, location_id: str):
-        """Create relationship between event and location"""
-        query = """
-        MATCH (ev:Event {event_id: $event_id})
-        MATCH (l:Location {location_id: $location_id})
-        MERGE (ev)-[:AT_LOCATION]->(l)
-        RETURN ev, l
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, event_id=event_id, location_id=location_id)
-            return result.single()
-    
-    def create_same_as_relationship(self, entity_id1: str, entity_id2: str, confidence: float):
-        """Create SAME_AS relationship between potentially duplicate entities"""
-        query = """
-        MATCH (e1:Entity {entity_id: $entity_id1})
-        MATCH (e2:Entity {entity_id: $entity_id2})
-        MERGE (e1)-[r:SAME_AS {confidence: $confidence}]->(e2)
-        RETURN r
-        """
-        
-        with self.driver.session() as session:
-            result = session.run(query, entity_id1=entity_id1, entity_id2=entity_id2, confidence=confidence)
-            return result.single()
-    
     def build_from_resolver(self, resolver: EntityResolver):
         """Build complete graph from EntityResolver"""
         print("\n🔧 Building Neo4j graph from resolver...")
         
         # Create entity nodes
         print("Creating entity nodes...")
+        entity_rows = []
         for entity_id, entity in resolver.entities.items():
             entity_data = {
                 'entity_id': entity.entity_id,
@@ -160,6 +202,7 @@ class CampusGraphBuilder:
                 'email': entity.email,
                 'entity_type': entity.entity_type,
                 'department': entity.department,
+                'cluster_id': entity.cluster_id,
                 'role': None,  # Will be enriched from profiles later
                 'card_id': None,
                 'device_hash': None,
@@ -173,328 +216,321 @@ class CampusGraphBuilder:
                 if identifier.type in entity_data:
                     entity_data[identifier.type] = identifier.value
             
-            self.create_entity_node(entity_data)
+            entity_rows.append(entity_data)
         
+        self._write_rows(ENTITY_UPSERT_QUERY, entity_rows)
         print(f"✅ Created {len(resolver.entities)} entity nodes")
         
-        # Create relationships for linked entities
+        # Link cluster members that share identifiers, with the link confidence the
+        # resolver scored; members joined only transitively are reached through them
         print("Creating SAME_AS relationships...")
-        relationship_count = 0
-        processed_pairs = set()  # Avoid duplicate relationships
-        
-        for entity_id, entity in resolver.entities.items():
-            linked = resolver.resolve_transitive(entity_id)
-            for linked_entity in linked:
-                # Create unique pair key to avoid duplicates
-                pair = tuple(sorted([entity_id, linked_entity.entity_id]))
-                
-                if pair not in processed_pairs:
-                    self.create_same_as_relationship(entity_id, linked_entity.entity_id, 0.8)
-                    processed_pairs.add(pair)
-                    relationship_count += 1
+        pair_rows = [
+            {'entity_id1': entity_id1, 'entity_id2': entity_id2,
+             'confidence': confidence, 'shared_identifiers': shared}
+            for (entity_id1, entity_id2), (confidence, shared) in resolver.link_scores.items()
+            if shared
+        ]
         
-        print(f"✅ Created {relationship_count} SAME_AS relationships")
+        self._write_rows(SAME_AS_QUERY, pair_rows)
+        # Earlier builds linked every cluster pair with a fixed confidence and no identifiers
+        with self.driver.session() as session:
+            session.run("MATCH (:Entity)-[r:SAME_AS]->(:Entity) WHERE r.shared_identifiers IS NULL DELETE r").consume()
+        print(f"✅ Created {len(pair_rows)} SAME_AS relationships across "
+              f"{sum(1 for ids in resolver.clusters.values() if len(ids) > 1)} clusters")
     
-    def ingest_swipe_events(self, swipes_df: pd.DataFrame):
+    def _write_rows(self, query: str, rows: List[Dict]):
+        """Write rows through one UNWIND statement per batch"""
+        with self.driver.session() as session:
+            for start in range(0, len(rows), self.batch_size):
+                session.execute_write(
+                    lambda tx, batch: tx.run(query, rows=batch).consume(),
+                    rows[start:start + self.batch_size]
+                )
+    
+    def load_identifier_map(self, resolver: Optional[EntityResolver] = None) -> Dict[str, Dict[str, str]]:
+        """Build the card_id/device_hash/face_id -> entity_id map used to resolve events"""
+        if resolver is not None:
+            identifier_map = resolver.build_identifier_map(self.EVENT_IDENTIFIER_TYPES)
+        else:
+            # One bulk read instead of a lookup query per event
+            query = """
+            MATCH (e:Entity)
+            RETURN e.entity_id as entity_id,
+                   e.card_id as card_id,
+                   e.device_hash as device_hash,
+                   e.face_id as face_id
+            """
+            identifier_map = {}
+            with self.driver.session() as session:
+                for record in session.run(query):
+                    for id_type in self.EVENT_IDENTIFIER_TYPES:
+                        if record[id_type] is not None:
+                            identifier_map.setdefault(id_type, {}).setdefault(
+                                str(record[id_type]), record['entity_id']
+                            )
+        
+        for id_type in self.EVENT_IDENTIFIER_TYPES:
+            identifier_map.setdefault(id_type, {})
+        
+        self.identifier_map = identifier_map
+        total = sum(len(values) for values in identifier_map.values())
+        print(f"✅ Loaded {total} identifiers for event resolution")
+        return identifier_map
+    
+    def _resolve_entity_ids(self, df: pd.DataFrame, column: str) -> Tuple[pd.DataFrame, pd.Series]:
+        """Map an identifier column to entity_ids, dropping rows that do not resolve"""
+        if self.identifier_map is None:
+            self.load_identifier_map()
+        
+        entity_ids = df[column].astype(str).map(self.identifier_map[column])
+        resolved = entity_ids.notna()
+        unresolved = int((~resolved).sum())
+        if unresolved:
+            print(f"   Skipping {unresolved} rows with unknown {column}")
+        return df[resolved], entity_ids[resolved]
+
+    @staticmethod
+    def _event_batch_query(location_type: Optional[str] = None,
+                           extra_props: Tuple[str, ...] = ()) -> str:
+        """
+        Build the UNWIND statement that writes one chunk of events
+
+        Events are merged on their source-prefixed event_id (see _event_rows),
+        so re-running an ingestion over the same rows updates them instead of
+        duplicating them.
+        """
+        extra = "".join(f",\n            {prop}: row.{prop}" for prop in extra_props)
+        query = f"""
+        UNWIND $rows AS row
+        MATCH (e:Entity {{entity_id: row.entity_id}})
+        MERGE (ev:Event {{event_id: row.event_id}})
+        SET ev += {{
+            event_type: row.event_type,
+            timestamp: datetime(row.timestamp),
+            location: row.location,
+            source_dataset: row.source_dataset{extra}
+        }}
+        MERGE (e)-[:PERFORMED]->(ev)
+        """
+        if location_type:
+            query += """
+        MERGE (l:Location {location_id: row.location})
+        SET l.type = $location_type
+        MERGE (ev)-[:AT_LOCATION]->(l)
+        """
+        return query + "RETURN count(ev) AS ingested"
+
+    def _event_rows(self, df: pd.DataFrame, entity_ids: pd.Series, id_prefix: str,
+                    event_type: str, timestamps: pd.Series, location,
+                    source_dataset: str, event_ids: Optional[pd.Series] = None, **extra) -> List[Dict]:
+        """
+        Build the UNWIND parameter rows for a DataFrame with column operations
+
+        Timestamps are normalised for the whole column at once; rows whose
+        timestamp cannot be parsed are dropped and counted rather than
+        written with a substitute time. Every event_id starts with the
+        source's id_prefix so sources never share ids. Sources without their
+        own id column get one built from the row content (entity, location,
+        timestamp), so it does not depend on the row's position in the file.
+        """
+        iso_timestamps, unparseable = normalize_timestamps(timestamps)
+        if event_ids is None:
+            event_ids = entity_ids.astype(str) + '_' + pd.Series(location, index=df.index).astype(str) \
+                + '_' + iso_timestamps
+        rows = pd.DataFrame({
+            'entity_id': entity_ids,
+            'event_id': id_prefix + event_ids,
+            'event_type': event_type,
+            'timestamp': iso_timestamps,
+            'location': location,
+            'source_dataset': source_dataset,
+            **extra
+        }, index=df.index)
+
+        if unparseable:
+            print(f"   Skipping {unparseable} rows with unparseable timestamps")
+            rows = rows[iso_timestamps.notna()]
+        return rows.to_dict('records')
+
+    @staticmethod
+    def _iter_frames(data: DataFrameSource) -> Iterator[pd.DataFrame]:
+        """Accept either a whole DataFrame or a stream of DataFrame chunks"""
+        if isinstance(data, pd.DataFrame):
+            yield data
+        else:
+            yield from data
+
+    def _write_event_batches(self, label: str, row_chunks: Iterable[List[Dict]], query: str,
+                             batch_size: Optional[int] = None, **params) -> int:
+        """Write rows through one UNWIND statement per batch and report throughput"""
+        batch_size = batch_size or self.batch_size
+        total = 0
+        ingested = 0
+        failed = 0
+        started = time.perf_counter()
+
+        with self.driver.session() as session:
+            for rows in row_chunks:
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    total += len(batch)
+                    try:
+                        # Managed transactions retry transient errors such as deadlocks
+                        # between concurrently running ingestion stages
+                        ingested += session.execute_write(self._write_batch, query, rows=batch, **params)
+                    except Exception as e:
+                        if failed == 0:  # Print first error for debugging
+                            print(f"   Sample error: {str(e)[:150]}")
+                        failed += len(batch)
+                        continue
+
+                    print(f"   Progress: {total} rows, {ingested} ingested")
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed > 0 else 0.0
+        unmatched = total - ingested - failed
+        print(f"✅ Ingested {ingested} {label} in {elapsed:.1f}s ({rate:,.0f} rows/sec; "
+              f"{unmatched} unmatched, {failed} in failed batches)")
+        return ingested
+
+    @staticmethod
+    def _write_batch(tx, query: str, **params) -> int:
+        """Run one UNWIND batch inside a managed write transaction"""
+        record = tx.run(query, **params).single()
+        return record['ingested'] if record else 0
+
+    def ingest_swipe_events(self, swipes: DataFrameSource, batch_size: Optional[int] = None) -> int:
         """Ingest card swipe events"""
         print("\n📥 Ingesting swipe events...")
-        
-        # Convert timestamp column once
-        swipes_df = swipes_df.copy()
-        swipes_df['timestamp'] = pd.to_datetime(swipes_df['timestamp'])
-        
-        ingested = 0
-        for idx, row in swipes_df.iterrows():
-            try:
-                # Find entity by card_id
-                query_entity = """
-                MATCH (e:Entity {card_id: $card_id})
-                RETURN e.entity_id as entity_id
-                LIMIT 1
-                """
-                
-                with self.driver.session() as session:
-                    result = session.run(query_entity, card_id=str(row['card_id']))
-                    record = result.single()
-                    
-                    if record:
-                        entity_id = record['entity_id']
-                        
-                        # Create event with formatted timestamp
-                        event_data = {
-                            'entity_id': entity_id,
-                            'event_id': f"SWIPE_{idx}",
-                            'event_type': 'swipe',
-                            'timestamp': self.format_neo4j_datetime(row['timestamp']),
-                            'location': str(row['location_id']),
-                            'source_dataset': 'swipes'
-                        }
-                        
-                        self.create_event_node(event_data)
-                        
-                        # Create location node and link
-                        self.create_location_node(str(row['location_id']), 'swipe_location')
-                        self.link_event_to_location(f"SWIPE_{idx}", str(row['location_id']))
-                        
-                        ingested += 1
-            except Exception as e:
-                if idx % 100 == 0:  # Only print occasional errors
-                    print(f"Warning at row {idx}: {str(e)[:100]}")
-                continue
-        
-        print(f"✅ Ingested {ingested} swipe events")
-    
-    def ingest_wifi_events(self, wifi_df: pd.DataFrame):
+
+        def build_rows(swipes_df: pd.DataFrame) -> List[Dict]:
+            swipes_df, entity_ids = self._resolve_entity_ids(swipes_df, 'card_id')
+            return self._event_rows(
+                swipes_df,
+                entity_ids=entity_ids,
+                id_prefix='SWIPE_',
+                event_type='swipe',
+                timestamps=swipes_df['timestamp'],
+                location=swipes_df['location_id'].astype(str),
+                source_dataset='swipes'
+            )
+
+        query = self._event_batch_query(location_type='swipe_location')
+        return self._write_event_batches("swipe events", map(build_rows, self._iter_frames(swipes)),
+                                         query, batch_size, location_type='swipe_location')
+
+    def ingest_wifi_events(self, wifi: DataFrameSource, batch_size: Optional[int] = None) -> int:
         """Ingest Wi-Fi connection events"""
         print("\n📥 Ingesting Wi-Fi events...")
-        
-        # Convert timestamp column once
-        wifi_df = wifi_df.copy()
-        wifi_df['timestamp'] = pd.to_datetime(wifi_df['timestamp'])
-        
-        ingested = 0
-        for idx, row in wifi_df.iterrows():
-            try:
-                # Find entity by device_hash
-                query_entity = """
-                MATCH (e:Entity {device_hash: $device_hash})
-                RETURN e.entity_id as entity_id
-                LIMIT 1
-                """
-                
-                with self.driver.session() as session:
-                    result = session.run(query_entity, device_hash=str(row['device_hash']))
-                    record = result.single()
-                    
-                    if record:
-                        entity_id = record['entity_id']
-                        
-                        # Create event with formatted timestamp
-                        event_data = {
-                            'entity_id': entity_id,
-                            'event_id': f"WIFI_{idx}",
-                            'event_type': 'wifi',
-                            'timestamp': self.format_neo4j_datetime(row['timestamp']),
-                            'location': str(row['ap_id']),
-                            'source_dataset': 'wifi'
-                        }
-                        
-                        self.create_event_node(event_data)
-                        
-                        # Create location node (access point) and link
-                        self.create_location_node(str(row['ap_id']), 'access_point')
-                        self.link_event_to_location(f"WIFI_{idx}", str(row['ap_id']))
-                        
-                        ingested += 1
-            except Exception as e:
-                if idx % 100 == 0:
-                    print(f"Warning at row {idx}: {str(e)[:100]}")
-                continue
-        
-        print(f"✅ Ingested {ingested} Wi-Fi events")
-    
-    def ingest_library_events(self, library_df: pd.DataFrame):
+
+        def build_rows(wifi_df: pd.DataFrame) -> List[Dict]:
+            wifi_df, entity_ids = self._resolve_entity_ids(wifi_df, 'device_hash')
+            return self._event_rows(
+                wifi_df,
+                entity_ids=entity_ids,
+                id_prefix='WIFI_',
+                event_type='wifi',
+                timestamps=wifi_df['timestamp'],
+                location=wifi_df['ap_id'].astype(str),
+                source_dataset='wifi'
+            )
+
+        query = self._event_batch_query(location_type='access_point')
+        return self._write_event_batches("Wi-Fi events", map(build_rows, self._iter_frames(wifi)),
+                                         query, batch_size, location_type='access_point')
+
+    def ingest_library_events(self, library: DataFrameSource, batch_size: Optional[int] = None) -> int:
         """Ingest library checkout events"""
         print("\n📥 Ingesting library events...")
-        
-        # Library uses 'timestamp' column
-        library_df = library_df.copy()
-        library_df['timestamp'] = pd.to_datetime(library_df['timestamp'])
-        
-        ingested = 0
-        errors = 0
-        
-        for idx, row in library_df.iterrows():
-            try:
-                # Check if entity exists
-                event_data = {
-                    'entity_id': str(row['entity_id']),
-                    'event_id': str(row['checkout_id']),  # Use actual checkout_id
-                    'event_type': 'library_checkout',
-                    'timestamp': self.format_neo4j_datetime(row['timestamp']),
-                    'location': 'Library',
-                    'source_dataset': 'library'
-                }
-                
-                self.create_event_node(event_data)
-                ingested += 1
-                
-                # Progress indicator
-                if (idx + 1) % 200 == 0:
-                    print(f"   Progress: {idx + 1} rows processed, {ingested} ingested, {errors} errors")
-                    
-            except Exception as e:
-                errors += 1
-                if errors == 1:  # Print first error for debugging
-                    print(f"   Sample error: {str(e)[:150]}")
-                continue
-        
-        print(f"✅ Ingested {ingested} library events ({errors} errors)")
-    
-    def ingest_booking_events(self, bookings_df: pd.DataFrame):
+
+        def build_rows(library_df: pd.DataFrame) -> List[Dict]:
+            return self._event_rows(
+                library_df,
+                entity_ids=library_df['entity_id'].astype(str),
+                id_prefix='LIB_',
+                event_ids=library_df['checkout_id'].astype(str),  # Use actual checkout_id
+                event_type='library_checkout',
+                timestamps=library_df['timestamp'],
+                location='Library',
+                source_dataset='library'
+            )
+
+        query = self._event_batch_query()
+        return self._write_event_batches("library events", map(build_rows, self._iter_frames(library)),
+                                         query, batch_size)
+
+    def ingest_booking_events(self, bookings: DataFrameSource, batch_size: Optional[int] = None) -> int:
         """Ingest room booking events"""
         print("\n📥 Ingesting booking events...")
-        
-        # Bookings use 'start_time' column
-        bookings_df = bookings_df.copy()
-        
-        # Parse the date format: "9/5/2025 16:46"
-        bookings_df['start_time'] = pd.to_datetime(bookings_df['start_time'], format='ISO8601')
-        
-        ingested = 0
-        errors = 0
-        
-        for idx, row in bookings_df.iterrows():
-            try:
-                event_data = {
-                    'entity_id': str(row['entity_id']),
-                    'event_id': str(row['booking_id']),  # Use actual booking_id
-                    'event_type': 'room_booking',
-                    'timestamp': self.format_neo4j_datetime(row['start_time']),
-                    'location': str(row['room_id']),
-                    'source_dataset': 'bookings'
-                }
-                
-                self.create_event_node(event_data)
-                self.create_location_node(str(row['room_id']), 'room')
-                self.link_event_to_location(str(row['booking_id']), str(row['room_id']))
-                ingested += 1
-                
-                # Progress indicator
-                if (idx + 1) % 200 == 0:
-                    print(f"   Progress: {idx + 1} rows processed, {ingested} ingested, {errors} errors")
-                    
-            except Exception as e:
-                errors += 1
-                if errors == 1:  # Print first error for debugging
-                    print(f"   Sample error: {str(e)[:150]}")
-                continue
-        
-        print(f"✅ Ingested {ingested} booking events ({errors} errors)")
 
-    def ingest_helpdesk_events(self, helpdesk_df: pd.DataFrame):
+        def build_rows(bookings_df: pd.DataFrame) -> List[Dict]:
+            return self._event_rows(
+                bookings_df,
+                entity_ids=bookings_df['entity_id'].astype(str),
+                id_prefix='BOOK_',
+                event_ids=bookings_df['booking_id'].astype(str),  # Use actual booking_id
+                event_type='room_booking',
+                timestamps=bookings_df['start_time'],
+                location=bookings_df['room_id'].astype(str),
+                source_dataset='bookings'
+            )
+
+        query = self._event_batch_query(location_type='room')
+        return self._write_event_batches("booking events", map(build_rows, self._iter_frames(bookings)),
+                                         query, batch_size, location_type='room')
+
+    def ingest_helpdesk_events(self, helpdesk: DataFrameSource, batch_size: Optional[int] = None) -> int:
         """Ingest helpdesk ticket events"""
         print("\n📥 Ingesting helpdesk events...")
-        
-        # Convert timestamp
-        helpdesk_df = helpdesk_df.copy()
-        helpdesk_df['timestamp'] = pd.to_datetime(helpdesk_df['timestamp'])
-        
-        ingested = 0
-        errors = 0
-        
-        for idx, row in helpdesk_df.iterrows():
-            try:
-                event_data = {
-                    'entity_id': str(row['entity_id']),
-                    'event_id': str(row['note_id']),
-                    'event_type': 'helpdesk_ticket',
-                    'timestamp': self.format_neo4j_datetime(row['timestamp']),
-                    'location': 'Helpdesk',
-                    'source_dataset': 'helpdesk'
-                }
-                
-                # Create event with additional metadata
-                query = """
-                MATCH (e:Entity {entity_id: $entity_id})
-                CREATE (ev:Event {
-                    event_id: $event_id,
-                    event_type: $event_type,
-                    timestamp: datetime($timestamp),
-                    location: $location,
-                    source_dataset: $source_dataset,
-                    ticket_category: $category,
-                    notes_preview: $notes_preview
-                })
-                CREATE (e)-[:PERFORMED]->(ev)
-                RETURN ev
-                """
-
-                # Get first 100 chars of text for preview
-                notes_preview = str(row['text'])[:100] if pd.notna(row['text']) else "No text"
-
-                with self.driver.session() as session:
-                    session.run(query, 
-                        entity_id=event_data['entity_id'],
-                        event_id=event_data['event_id'],
-                        event_type=event_data['event_type'],
-                        timestamp=event_data['timestamp'],
-                        location=event_data['location'],
-                        source_dataset=event_data['source_dataset'],
-                        category=str(row['category']) if 'category' in row else 'General',
-                        notes_preview=notes_preview
-                    )
-                
-                ingested += 1
-                
-                # Progress indicator
-                if (idx + 1) % 200 == 0:
-                    print(f"   Progress: {idx + 1} rows processed, {ingested} ingested, {errors} errors")
-                    
-            except Exception as e:
-                errors += 1
-                if errors == 1:
-                    print(f"   Sample error: {str(e)[:150]}")
-                continue
-        
-        print(f"✅ Ingested {ingested} helpdesk events ({errors} errors)")
 
-    def ingest_cctv_events(self, cctv_df: pd.DataFrame):
+        def build_rows(helpdesk_df: pd.DataFrame) -> List[Dict]:
+            # Get first 100 chars of text for preview
+            notes = helpdesk_df['text']
+            notes_preview = notes.astype(str).str[:100].where(notes.notna(), "No text")
+            if 'category' in helpdesk_df.columns:
+                category = helpdesk_df['category'].astype(str)
+            else:
+                category = 'General'
+
+            return self._event_rows(
+                helpdesk_df,
+                entity_ids=helpdesk_df['entity_id'].astype(str),
+                id_prefix='NOTE_',
+                event_ids=helpdesk_df['note_id'].astype(str),
+                event_type='helpdesk_ticket',
+                timestamps=helpdesk_df['timestamp'],
+                location='Helpdesk',
+                source_dataset='helpdesk',
+                ticket_category=category,
+                notes_preview=notes_preview
+            )
+
+        query = self._event_batch_query(extra_props=('ticket_category', 'notes_preview'))
+        return self._write_event_batches("helpdesk events", map(build_rows, self._iter_frames(helpdesk)),
+                                         query, batch_size)
+
+    def ingest_cctv_events(self, cctv: DataFrameSource, batch_size: Optional[int] = None) -> int:
         """Ingest CCTV sighting events"""
         print("\n📥 Ingesting CCTV events...")
-        
-        # Convert timestamp
-        cctv_df = cctv_df.copy()
-        cctv_df['timestamp'] = pd.to_datetime(cctv_df['timestamp'])
-        
-        ingested = 0
-        errors = 0
-        
-        for idx, row in cctv_df.iterrows():
-            try:
-                # Find entity by face_id
-                query_entity = """
-                MATCH (e:Entity {face_id: $face_id})
-                RETURN e.entity_id as entity_id
-                LIMIT 1
-                """
-                
-                with self.driver.session() as session:
-                    result = session.run(query_entity, face_id=str(row['face_id']))
-                    record = result.single()
-                    
-                    if record:
-                        entity_id = record['entity_id']
-                        
-                        # Create event
-                        event_data = {
-                            'entity_id': entity_id,
-                            'event_id': str(row['frame_id']),  # Use image_id as event_id
-                            'event_type': 'cctv_sighting',
-                            'timestamp': self.format_neo4j_datetime(row['timestamp']),
-                            'location': str(row['location_id']),
-                            'source_dataset': 'cctv'
-                        }
-                        
-                        self.create_event_node(event_data)
-                        
-                        # Create location node (camera) and link
-                        self.create_location_node(str(row['location_id']), 'cctv_camera')
-                        self.link_event_to_location(str(row['frame_id']), str(row['location_id']))
-
-                        ingested += 1
-                        
-                        # Progress indicator
-                        if (idx + 1) % 200 == 0:
-                            print(f"   Progress: {idx + 1} rows processed, {ingested} ingested, {errors} errors")
-            except Exception as e:
-                errors += 1
-                if errors == 1:
-                    print(f"   Sample error: {str(e)[:150]}")
-                continue
-        
-        print(f"✅ Ingested {ingested} CCTV events ({errors} errors - likely unmapped face_ids)")
-    
+
+        def build_rows(cctv_df: pd.DataFrame) -> List[Dict]:
+            # Frames without a face detection can never be linked to an entity
+            cctv_df = cctv_df[cctv_df['face_id'].notna()]
+            cctv_df, entity_ids = self._resolve_entity_ids(cctv_df, 'face_id')
+            return self._event_rows(
+                cctv_df,
+                entity_ids=entity_ids,
+                id_prefix='CCTV_',
+                event_ids=cctv_df['frame_id'].astype(str),  # Use frame_id as event_id
+                event_type='cctv_sighting',
+                timestamps=cctv_df['timestamp'],
+                location=cctv_df['location_id'].astype(str),
+                source_dataset='cctv'
+            )
+
+        query = self._event_batch_query(location_type='cctv_camera')
+        return self._write_event_batches("CCTV events", map(build_rows, self._iter_frames(cctv)),
+                                         query, batch_size, location_type='cctv_camera')
     
     def create_profile_metadata(self, profiles_df: pd.DataFrame):
         """Add additional profile metadata to entity nodes"""
@@ -528,66 +564,51 @@ class CampusGraphBuilder:
 
     def get_entity_timeline(self, entity_id: str, start_date: str = None, end_date: str = None):
         """Get chronological timeline of events for entity"""
-        query = """
-        MATCH (e:Entity {entity_id: $entity_id})-[:PERFORMED]->(ev:Event)
-        OPTIONAL MATCH (ev)-[:AT_LOCATION]->(l:Location)
-        WHERE ($start_date IS NULL OR ev.timestamp >= datetime($start_date))
-        AND ($end_date IS NULL OR ev.timestamp <= datetime($end_date))
-        RETURN ev.event_id as event_id,
-            ev.event_type as event_type,
-            ev.timestamp as timestamp,
-            ev.location as location,
-            l.location_id as location_id,
-            l.type as location_type
-        ORDER BY ev.timestamp ASC
-        """
-        
         with self.driver.session() as session:
-            result = session.run(query, entity_id=entity_id, start_date=start_date, end_date=end_date)
-            events = []
-            for record in result:
-                event_dict = dict(record)
-                # Convert Neo4j datetime to ISO string
-                if event_dict.get('timestamp'):
-                    event_dict['timestamp'] = event_dict['timestamp'].isoformat()
-                events.append(event_dict)
-            return events
-    
+            result = session.run(ENTITY_TIMELINE_QUERY, entity_id=entity_id,
+                                 start_date=start_date, end_date=end_date)
+            return [self._timeline_event(record) for record in result]
+
+    async def get_entity_timeline_async(self, entity_id: str, start_date: str = None, end_date: str = None):
+        """Async variant of get_entity_timeline"""
+        records = await fetch_all_async(ENTITY_TIMELINE_QUERY, self.async_driver, entity_id=entity_id,
+                                        start_date=start_date, end_date=end_date)
+        return [self._timeline_event(record) for record in records]
+
+    @staticmethod
+    def _timeline_event(record) -> Dict:
+        event_dict = dict(record)
+        # Convert Neo4j datetime to ISO string
+        if event_dict.get('timestamp'):
+            event_dict['timestamp'] = event_dict['timestamp'].isoformat()
+        return event_dict
+
     def find_entities_at_location(self, location_id: str, timestamp: str):
         """Find all entities at a location at a specific time"""
-        query = """
-        MATCH (e:Entity)-[:PERFORMED]->(ev:Event)-[:AT_LOCATION]->(l:Location {location_id: $location_id})
-        WHERE ev.timestamp <= datetime($timestamp)
-        WITH e, ev
-        ORDER BY ev.timestamp DESC
-        WITH e, collect(ev)[0] as latest_event
-        WHERE latest_event.location = $location_id
-        RETURN e.entity_id as entity_id,
-               e.name as name,
-               latest_event.timestamp as last_seen
-        """
-        
         with self.driver.session() as session:
-            result = session.run(query, location_id=location_id, timestamp=timestamp)
+            result = session.run(ENTITIES_AT_LOCATION_QUERY, location_id=location_id, timestamp=timestamp)
             return [dict(record) for record in result]
-    
+
+    async def find_entities_at_location_async(self, location_id: str, timestamp: str):
+        """Async variant of find_entities_at_location"""
+        return await fetch_all_async(ENTITIES_AT_LOCATION_QUERY, self.async_driver,
+                                     location_id=location_id, timestamp=timestamp)
+
     def find_missing_entities(self, hours: int = 12):
         """Find entities with no activity in last N hours"""
-        query = """
-        MATCH (e:Entity)-[:PERFORMED]->(ev:Event)
-        WITH e, max(ev.timestamp) as last_seen
-        WHERE last_seen < datetime() - duration({hours: $hours})
-        RETURN e.entity_id as entity_id,
-               e.name as name,
-               e.entity_type as entity_type,
-               last_seen
-        ORDER BY last_seen DESC
-        """
-        
         with self.driver.session() as session:
-            result = session.run(query, hours=hours)
+            result = session.run(MISSING_ENTITIES_QUERY, hours=hours)
             return [dict(record) for record in result]
 
+    async def find_missing_entities_async(self, hours: int = 12):
+        """Async variant of find_missing_entities"""
+        return await fetch_all_async(MISSING_ENTITIES_QUERY, self.async_driver, hours=hours)
+
+    async def get_graph_stats_async(self) -> Dict:
+        """Count entities, events, locations and SAME_AS links"""
+        records = await fetch_all_async(GRAPH_STATS_QUERY, self.async_driver)
+        return records[0]
+
 # Global instance
 graph_builder = None
 
@@ -595,10 +616,6 @@ def get_graph_builder() -> CampusGraphBuilder:
     """Get or create graph builder instance"""
     global graph_builder
     if graph_builder is None:
-        graph_builder = CampusGraphBuilder(
-            uri=settings.NEO4J_URI,
-            user=settings.NEO4J_USER,
-            password=settings.NEO4J_PASSWORD
-        )
+        graph_builder = CampusGraphBuilder(driver=get_driver())
         graph_builder.create_indexes()
     return graph_builder
\ No newline at end of file
@@ -0,0 +1,60 @@
+# backend/app/services/identity_clusters.py
+from typing import Dict, Iterable, List, Tuple
+
+class DisjointSet:
+    """Union-find over entity ids with path halving and union by size"""
+
+    def __init__(self, items: Iterable[str] = ()):
+        self.parent: Dict[str, str] = {}
+        self.size: Dict[str, int] = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: str):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item: str) -> str:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: str, b: str) -> str:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+def cluster_identities(entity_ids: Iterable[str], identifier_index: Dict[str, List[str]],
+                       links: Iterable[Tuple[str, str]] = ()) -> Dict[str, List[str]]:
+    """
+    Group entities that share any identifier (or are directly linked), transitively
+
+    Returns {cluster_id: member entity_ids}. Members keep the order of
+    `entity_ids` and the cluster id is the first member, so ids are stable
+    across rebuilds of the same data.
+    """
+    entity_ids = list(entity_ids)
+    clusters = DisjointSet(entity_ids)
+
+    for linked_ids in identifier_index.values():
+        first = linked_ids[0]
+        for other in linked_ids[1:]:
+            if first in clusters.parent and other in clusters.parent:
+                clusters.union(first, other)
+    for first, other in links:
+        if first in clusters.parent and other in clusters.parent:
+            clusters.union(first, other)
+
+    members: Dict[str, List[str]] = {}
+    for entity_id in entity_ids:
+        members.setdefault(clusters.find(entity_id), []).append(entity_id)
+
+    return {ids[0]: ids for ids in members.values()}
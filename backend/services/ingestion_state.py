@@ -0,0 +1,174 @@
+# backend/app/services/ingestion_state.py
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+
+# Leading bytes hashed to tell an appended file from a rewritten one
+HEAD_BYTES = 64 * 1024
+
+def file_checksum(path: Path, block_size: int = 1024 * 1024, size: Optional[int] = None) -> str:
+    """SHA-256 of a whole file, or of its first `size` bytes, read in blocks"""
+    digest = hashlib.sha256()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            block = f.read(block_size if remaining is None else min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+def head_checksum(path: Path, size: int = HEAD_BYTES) -> str:
+    """SHA-256 of the first `size` bytes of a file"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(size)).hexdigest()
+
+class IngestionWatermarkStore:
+    """
+    Per-dataset ingestion watermarks stored as (:IngestionWatermark) nodes
+
+    Keeping the watermarks in the graph means clearing the database also
+    resets them, so the two can never disagree. Hourly occupancy buckets
+    waiting to be re-aggregated are kept there too (:PendingOccupancyBucket),
+    so rows whose watermark has advanced are never left unaggregated.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def ensure_schema(self):
+        """Create the uniqueness constraint watermarks are merged on"""
+        with self.driver.session() as session:
+            session.run(
+                "CREATE CONSTRAINT ingestion_watermark_dataset IF NOT EXISTS "
+                "FOR (w:IngestionWatermark) REQUIRE w.dataset IS UNIQUE"
+            )
+            session.run(
+                "CREATE CONSTRAINT pending_occupancy_bucket_key IF NOT EXISTS "
+                "FOR (b:PendingOccupancyBucket) REQUIRE b.key IS UNIQUE"
+            )
+
+    def get(self, dataset: str) -> Optional[Dict]:
+        """Return the stored watermark for a dataset, if any"""
+        with self.driver.session() as session:
+            record = session.run("""
+                MATCH (w:IngestionWatermark {dataset: $dataset})
+                RETURN w.row_offset as row_offset,
+                       w.last_timestamp as last_timestamp,
+                       w.head_checksum as head_checksum,
+                       w.file_checksum as file_checksum,
+                       w.loaded_bytes as loaded_bytes,
+                       w.loaded_checksum as loaded_checksum
+            """, dataset=dataset).single()
+            return dict(record) if record else None
+
+    def save(self, dataset: str, row_offset: int, last_timestamp: Optional[str],
+             head_checksum: str, file_checksum: Optional[str] = None,
+             loaded_bytes: Optional[int] = None, loaded_checksum: Optional[str] = None):
+        """
+        Record progress for a dataset
+
+        file_checksum is only set once the whole file has been loaded; while it
+        is null the dataset is treated as a partial load to resume.
+        loaded_bytes/loaded_checksum describe the file as it was read, so a
+        resume can check that the rows before row_offset are still the same.
+        """
+        with self.driver.session() as session:
+            session.run("""
+                MERGE (w:IngestionWatermark {dataset: $dataset})
+                SET w.row_offset = $row_offset,
+                    w.last_timestamp = $last_timestamp,
+                    w.head_checksum = $head_checksum,
+                    w.file_checksum = $file_checksum,
+                    w.loaded_bytes = $loaded_bytes,
+                    w.loaded_checksum = $loaded_checksum,
+                    w.updated_at = datetime()
+            """, dataset=dataset, row_offset=row_offset, last_timestamp=last_timestamp,
+                head_checksum=head_checksum, file_checksum=file_checksum,
+                loaded_bytes=loaded_bytes, loaded_checksum=loaded_checksum)
+
+    def reset(self, dataset: Optional[str] = None):
+        """Forget watermarks for one dataset, or all of them"""
+        with self.driver.session() as session:
+            session.run("""
+                MATCH (w:IngestionWatermark)
+                WHERE $dataset IS NULL OR w.dataset = $dataset
+                DELETE w
+            """, dataset=dataset)
+
+    def add_pending_buckets(self, buckets: Iterable[Tuple[str, str, int]]):
+        """
+        Queue (zone_id, date, hour) buckets for occupancy re-aggregation
+
+        Call after the rows are written and before their watermark advances;
+        the buckets stay queued until clear_pending_buckets() runs in the
+        transaction that aggregates them.
+        """
+        rows = [
+            {'key': f"{zone_id}|{activity_date}|{hour}", 'zone_id': zone_id, 'date': activity_date, 'hour': hour}
+            for zone_id, activity_date, hour in buckets
+        ]
+        if not rows:
+            return
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run("""
+                UNWIND $rows AS row
+                MERGE (b:PendingOccupancyBucket {key: row.key})
+                ON CREATE SET b.zone_id = row.zone_id, b.date = row.date, b.hour = row.hour
+            """, rows=rows).consume())
+
+    def pending_buckets(self) -> List[Tuple[str, str, int]]:
+        """Queued buckets, including any left by an earlier run that stopped before aggregating"""
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (b:PendingOccupancyBucket)
+                RETURN b.zone_id as zone_id, b.date as date, b.hour as hour
+                ORDER BY zone_id, date, hour
+            """)
+            return [(record['zone_id'], record['date'], record['hour']) for record in result]
+
+    @staticmethod
+    def clear_pending_buckets(tx, buckets: Iterable[Tuple[str, str, int]]):
+        """Dequeue buckets inside the transaction that aggregated them"""
+        tx.run("""
+            UNWIND $keys AS key
+            MATCH (b:PendingOccupancyBucket {key: key})
+            DELETE b
+        """, keys=[f"{zone_id}|{activity_date}|{hour}" for zone_id, activity_date, hour in buckets]).consume()
+
+    def plan(self, dataset: str, path: Path) -> Tuple[Optional[int], str, Dict]:
+        """
+        Decide where loading should start for a dataset file
+
+        Returns (start_row, reason, fingerprint). start_row is None when the
+        file is unchanged since the last completed load. Loading resumes at
+        the stored row offset (crashed load or appended rows) only if every
+        byte read by the previous load is unchanged; otherwise the file is
+        reloaded from the start.
+        """
+        size = path.stat().st_size
+        checksum = file_checksum(path, size=size)
+        fingerprint = {
+            'file_checksum': checksum,
+            'head_checksum': head_checksum(path),
+            'loaded_bytes': size,
+            'loaded_checksum': checksum
+        }
+        watermark = self.get(dataset)
+
+        if not watermark:
+            return 0, "initial load", fingerprint
+        if watermark['file_checksum'] == fingerprint['file_checksum']:
+            return None, "unchanged since last load", fingerprint
+        if watermark['head_checksum'] != fingerprint['head_checksum']:
+            return 0, "file rewritten, reloading", fingerprint
+        if watermark.get('loaded_bytes') is None or watermark.get('loaded_checksum') is None:
+            return 0, "no checksum of the loaded bytes stored, reloading", fingerprint
+        if size < watermark['loaded_bytes'] or \
+                file_checksum(path, size=watermark['loaded_bytes']) != watermark['loaded_checksum']:
+            return 0, "previously loaded bytes changed, reloading", fingerprint
+
+        fingerprint['last_timestamp'] = watermark['last_timestamp']
+        return watermark['row_offset'], "resuming after stored watermark", fingerprint
@@ -0,0 +1,207 @@
+# backend/app/services/movement_analysis.py
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import heapq
+
+from services.campus_zones import ap_covers
+
+# Minimum plausible time between swipes in two zones with no CONNECTED_TO edge
+DEFAULT_MIN_TRAVEL_SECONDS = 120
+
+# A swipe conflicts with WiFi/CCTV presence elsewhere within this many seconds
+DEFAULT_MISMATCH_WINDOW_SECONDS = 300
+
+ZONE_CONNECTIONS_QUERY = """
+    MATCH (z1:Zone)-[c:CONNECTED_TO]->(z2:Zone)
+    RETURN z1.zone_id as from_zone,
+           z2.zone_id as to_zone,
+           c.distance_meters as distance_meters,
+           c.walking_time_minutes as walking_time_minutes
+"""
+
+# Event queries take an {entity_filter} ("AND e.entity_id = $entity_id" or "")
+# so single-entity requests only read that entity's events
+
+# Grouped by entity and time-ordered so one pass can compare consecutive swipes.
+# Runs $lookahead_seconds past the window so travel pairs starting inside it can close
+ORDERED_SWIPES_QUERY = """
+    MATCH (e:Entity)-[r:SWIPED_CARD]->(z:Zone)
+    WHERE r.timestamp >= datetime($start_time)
+    AND r.timestamp <= datetime($end_time) + duration({{seconds: $lookahead_seconds}})
+    {entity_filter}
+    RETURN e.entity_id as entity_id,
+           e.name as entity_name,
+           e.role as role,
+           e.department as department,
+           z.zone_id as zone_id,
+           z.name as zone_name,
+           r.timestamp as timestamp
+    ORDER BY entity_id, timestamp
+"""
+
+# Presence streams share one layout so they can be merged; both are widened by
+# $window_seconds so swipes at the edges of the range still see their neighbours
+WIFI_PRESENCE_QUERY = """
+    MATCH (e:Entity)-[w:CONNECTED_TO_WIFI]->(z:Zone)
+    WHERE w.timestamp >= datetime($start_time) - duration({{seconds: $window_seconds}})
+    AND w.timestamp <= datetime($end_time) + duration({{seconds: $window_seconds}})
+    {entity_filter}
+    RETURN e.entity_id as entity_id,
+           z.zone_id as zone_id,
+           z.name as zone_name,
+           w.ap_id as ap_id,
+           'wifi' as source,
+           w.timestamp as timestamp
+    ORDER BY entity_id, timestamp
+"""
+
+CCTV_PRESENCE_QUERY = """
+    MATCH (e:Entity)-[d:DETECTED_IN]->(z:Zone)
+    WHERE d.timestamp >= datetime($start_time) - duration({{seconds: $window_seconds}})
+    AND d.timestamp <= datetime($end_time) + duration({{seconds: $window_seconds}})
+    {entity_filter}
+    RETURN e.entity_id as entity_id,
+           z.zone_id as zone_id,
+           z.name as zone_name,
+           null as ap_id,
+           'cctv' as source,
+           d.timestamp as timestamp
+    ORDER BY entity_id, timestamp
+"""
+
+def native_datetime(timestamp) -> datetime:
+    """Neo4j DateTime or Python datetime as a Python datetime"""
+    return timestamp.to_native() if hasattr(timestamp, 'to_native') else timestamp
+
+def walking_times(connections: Iterable[Dict]) -> Dict[Tuple[str, str], Tuple[float, Optional[float]]]:
+    """
+    {(zone, zone): (walking seconds, distance in meters)} from CONNECTED_TO rows
+
+    Edges are stored in one direction but walked in both; the fastest edge wins.
+    """
+    times = {}
+    for conn in connections:
+        if conn['walking_time_minutes'] is None:
+            continue
+        seconds = float(conn['walking_time_minutes']) * 60
+        for pair in ((conn['from_zone'], conn['to_zone']), (conn['to_zone'], conn['from_zone'])):
+            if pair not in times or seconds < times[pair][0]:
+                times[pair] = (seconds, conn['distance_meters'])
+    return times
+
+def travel_lookahead_seconds(
+    walking: Dict[Tuple[str, str], Tuple[float, Optional[float]]],
+    default_seconds: float = DEFAULT_MIN_TRAVEL_SECONDS
+) -> float:
+    """Longest gap that can still be impossible travel, i.e. how far past a window swipes must be read"""
+    return max([default_seconds] + [seconds for seconds, _ in walking.values()])
+
+def find_impossible_travel(
+    swipes: Iterable[Dict],
+    walking: Dict[Tuple[str, str], Tuple[float, Optional[float]]],
+    default_seconds: float = DEFAULT_MIN_TRAVEL_SECONDS
+) -> Iterator[Tuple[Dict, Dict, float, float, Optional[float]]]:
+    """
+    Sweep swipes once, comparing each with the same entity's previous swipe
+
+    Swipes must be grouped by entity_id and time-ordered within each entity
+    (ORDERED_SWIPES_QUERY). Yields (previous, current, elapsed seconds,
+    required seconds, distance) for every zone change faster than walking allows.
+    """
+    previous = None
+    previous_time = None
+    for swipe in swipes:
+        swipe_time = native_datetime(swipe['timestamp'])
+        if previous is not None and previous['entity_id'] == swipe['entity_id'] \
+                and previous['zone_id'] != swipe['zone_id']:
+            elapsed = (swipe_time - previous_time).total_seconds()
+            required, distance = walking.get((previous['zone_id'], swipe['zone_id']), (default_seconds, None))
+            if 0 < elapsed < required:
+                yield previous, swipe, elapsed, required, distance
+        previous, previous_time = swipe, swipe_time
+
+def merge_presence(*streams: Iterable[Dict]) -> Iterator[Dict]:
+    """Merge presence streams that are each ordered by (entity_id, timestamp)"""
+    return heapq.merge(*streams, key=lambda event: (event['entity_id'], native_datetime(event['timestamp'])))
+
+def group_by_entity(events: Iterable[Dict], others: Iterable[Dict]) -> Iterator[Tuple[str, List[Dict], List[Dict]]]:
+    """
+    Walk two streams ordered by entity_id together, one entity at a time
+
+    Yields (entity_id, events, others) for every entity in the first stream;
+    others is empty when the second stream has nothing for that entity.
+    """
+    other_groups = groupby(others, key=itemgetter('entity_id'))
+    head = next(other_groups, None)
+    for entity_id, group in groupby(events, key=itemgetter('entity_id')):
+        while head is not None and head[0] < entity_id:
+            head = next(other_groups, None)
+        matched = []
+        if head is not None and head[0] == entity_id:
+            matched = list(head[1])
+            head = next(other_groups, None)
+        yield entity_id, list(group), matched
+
+def windowed_pairs(
+    events: Iterable[Dict],
+    others: Iterable[Dict],
+    window_seconds: float
+) -> Iterator[Tuple[Dict, Dict, float]]:
+    """
+    Two-pointer join of two streams ordered by (entity_id, timestamp)
+
+    Yields (event, other, seconds from event to other) for every pair of the
+    same entity at most window_seconds apart. Each stream is read once; the
+    buffer only holds the other events inside the current window.
+    """
+    window = timedelta(seconds=window_seconds)
+    others = iter(others)
+    pending = next(others, None)
+    buffer = deque()
+    current = None
+    for event in events:
+        entity_id = event['entity_id']
+        event_time = native_datetime(event['timestamp'])
+        if entity_id != current:
+            buffer.clear()
+            current = entity_id
+        while pending is not None and pending['entity_id'] < entity_id:
+            pending = next(others, None)
+        while pending is not None and pending['entity_id'] == entity_id \
+                and native_datetime(pending['timestamp']) <= event_time + window:
+            buffer.append((pending, native_datetime(pending['timestamp'])))
+            pending = next(others, None)
+        while buffer and buffer[0][1] < event_time - window:
+            buffer.popleft()
+        for other, other_time in buffer:
+            yield event, other, (other_time - event_time).total_seconds()
+
+def find_location_conflicts(
+    swipes: Iterable[Dict],
+    presence: Iterable[Dict],
+    window_seconds: float = DEFAULT_MISMATCH_WINDOW_SECONDS,
+    covers: Callable[[Optional[str], str], bool] = ap_covers
+) -> Iterator[Tuple[Dict, Dict, float]]:
+    """
+    Swipes with WiFi/CCTV presence in another zone within the window
+
+    Both streams are ordered by (entity_id, timestamp). A WiFi event whose AP
+    also covers the swiped zone is not a conflict. Yields (swipe, presence,
+    offset seconds) once per swipe and conflicting zone, keeping the closest event.
+    """
+    closest = {}
+    current = None
+    for swipe, other, offset in windowed_pairs(swipes, presence, window_seconds):
+        if swipe is not current:
+            yield from closest.values()
+            closest = {}
+            current = swipe
+        if other['zone_id'] == swipe['zone_id'] or covers(other['ap_id'], swipe['zone_id']):
+            continue
+        best = closest.get(other['zone_id'])
+        if best is None or abs(offset) < abs(best[2]):
+            closest[other['zone_id']] = (swipe, other, offset)
+    yield from closest.values()
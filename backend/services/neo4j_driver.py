@@ -0,0 +1,83 @@
+# backend/app/services/neo4j_driver.py
+from neo4j import AsyncDriver, AsyncGraphDatabase, Driver, GraphDatabase
+from typing import Dict, List, Optional
+import logging
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pool defaults, overridable from settings / .env
+DEFAULT_MAX_CONNECTION_POOL_SIZE = 50
+DEFAULT_CONNECTION_ACQUISITION_TIMEOUT = 30.0  # seconds to wait for a free pooled connection
+DEFAULT_MAX_CONNECTION_LIFETIME = 3600  # seconds before a pooled connection is recycled
+
+_driver: Optional[Driver] = None
+_driver_lock = threading.Lock()
+
+# Async driver for request handlers; it belongs to the event loop that first uses it
+_async_driver: Optional[AsyncDriver] = None
+
+def driver_config() -> Dict:
+    """Connection pool settings for the shared driver"""
+    return {
+        'max_connection_pool_size': getattr(
+            settings, 'NEO4J_MAX_CONNECTION_POOL_SIZE', DEFAULT_MAX_CONNECTION_POOL_SIZE),
+        'connection_acquisition_timeout': getattr(
+            settings, 'NEO4J_CONNECTION_ACQUISITION_TIMEOUT', DEFAULT_CONNECTION_ACQUISITION_TIMEOUT),
+        'max_connection_lifetime': getattr(
+            settings, 'NEO4J_MAX_CONNECTION_LIFETIME', DEFAULT_MAX_CONNECTION_LIFETIME),
+    }
+
+def get_driver() -> Driver:
+    """Get or create the application-wide Neo4j driver (thread-safe, pooled)"""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                config = driver_config()
+                _driver = GraphDatabase.driver(
+                    settings.NEO4J_URI,
+                    auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+                    **config
+                )
+                logger.info(f"Opened shared Neo4j driver (pool size {config['max_connection_pool_size']})")
+    return _driver
+
+def close_driver():
+    """Close the shared driver and its connection pool"""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+            logger.info("Closed shared Neo4j driver")
+
+def get_async_driver() -> AsyncDriver:
+    """Get or create the application-wide async Neo4j driver used by async route handlers"""
+    global _async_driver
+    if _async_driver is None:
+        config = driver_config()
+        _async_driver = AsyncGraphDatabase.driver(
+            settings.NEO4J_URI,
+            auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            **config
+        )
+        logger.info(f"Opened shared async Neo4j driver (pool size {config['max_connection_pool_size']})")
+    return _async_driver
+
+async def close_async_driver():
+    """Close the shared async driver and its connection pool"""
+    global _async_driver
+    if _async_driver is not None:
+        await _async_driver.close()
+        _async_driver = None
+        logger.info("Closed shared async Neo4j driver")
+
+async def fetch_all_async(query: str, driver: Optional[AsyncDriver] = None, **params) -> List[Dict]:
+    """Run a read query without blocking the event loop and return its records as dicts"""
+    driver = driver or get_async_driver()
+    async with driver.session() as session:
+        result = await session.run(query, **params)
+        return [dict(record) async for record in result]
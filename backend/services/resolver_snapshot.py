@@ -0,0 +1,75 @@
+# backend/app/services/resolver_snapshot.py
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import sys
+import numpy as np
+
+from services.dataset_reader import dataset_path
+from services.entity_store import EntityStore
+from services.ingestion_state import file_checksum
+
+# Bump when the array layout changes so old snapshots are rebuilt
+SNAPSHOT_VERSION = 3
+
+# Datasets the resolver state is built from; a change to any of them invalidates the snapshot
+SNAPSHOT_INPUTS = ('profiles',)
+
+def snapshot_key(data_dir: Path) -> str:
+    """Checksum of the snapshot format and every input CSV"""
+    digest = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    for dataset in SNAPSHOT_INPUTS:
+        digest.update(f"{dataset}:{file_checksum(dataset_path(data_dir, dataset))}".encode())
+    return digest.hexdigest()
+
+def snapshot_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"resolver-{key[:16]}.npz"
+
+def save_snapshot(store: EntityStore, identifier_index: Dict[str, List[str]], path: Path,
+                  co_observed: Optional[Dict[Tuple[str, str], List[str]]] = None):
+    """Write resolver state as plain NumPy arrays (no pickle), replacing the file atomically"""
+    arrays = store.to_arrays()
+
+    # Identifier index flattened with an offset per key
+    arrays['index_keys'] = np.array(list(identifier_index.keys()), dtype=str)
+    arrays['index_offsets'] = np.cumsum([0] + [len(ids) for ids in identifier_index.values()]).astype(np.int64)
+    arrays['index_entity_ids'] = np.array([eid for ids in identifier_index.values() for eid in ids], dtype=str)
+
+    # Co-observed entity pairs, flattened the same way
+    co_observed = co_observed or {}
+    arrays['co_observed_pairs'] = np.array(list(co_observed.keys()), dtype=str).reshape(-1, 2)
+    arrays['co_observed_offsets'] = np.cumsum([0] + [len(keys) for keys in co_observed.values()]).astype(np.int64)
+    arrays['co_observed_keys'] = np.array([key for keys in co_observed.values() for key in keys], dtype=str)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+    # Older snapshots can never match again
+    for stale in path.parent.glob("resolver-*.npz"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+def load_snapshot(path: Path) -> Tuple[EntityStore, Dict[str, List[str]], Dict[Tuple[str, str], List[str]]]:
+    """Rebuild the entity store, identifier index and co-observed pairs from a snapshot"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    index_offsets = arrays['index_offsets'].tolist()
+    index_entity_ids = [sys.intern(eid) for eid in arrays['index_entity_ids'].tolist()]
+    identifier_index = {
+        key: index_entity_ids[index_offsets[i]:index_offsets[i + 1]]
+        for i, key in enumerate(arrays['index_keys'].tolist())
+    }
+
+    co_observed_offsets = arrays['co_observed_offsets'].tolist()
+    co_observed_keys = arrays['co_observed_keys'].tolist()
+    co_observed = {
+        (sys.intern(first), sys.intern(other)): co_observed_keys[co_observed_offsets[i]:co_observed_offsets[i + 1]]
+        for i, (first, other) in enumerate(arrays['co_observed_pairs'].tolist())
+    }
+
+    return EntityStore.from_arrays(arrays), identifier_index, co_observed
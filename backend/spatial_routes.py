@@ -4,23 +4,20 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime, timedelta
 from services.spatial_forecasting import SpatialForecastingService
+from services.neo4j_driver import get_driver
 import os
 
 router = APIRouter(prefix="/api/v1/spatial", tags=["spatial-forecasting"])
 
 # Dependency to get spatial service
 def get_spatial_service():
-    neo4j_uri = settings.NEO4J_URI
-    neo4j_user = settings.NEO4J_USER
-    neo4j_password = settings.NEO4J_PASSWORD
-
-    return SpatialForecastingService(neo4j_uri, neo4j_user, neo4j_password)
+    return SpatialForecastingService(driver=get_driver())
 
 @router.get("/zones")
 async def get_all_zones(spatial_service: SpatialForecastingService = Depends(get_spatial_service)):
     """Get list of all zones"""
     try:
-        zones = spatial_service.get_all_zones()
+        zones = await spatial_service.get_all_zones_async()
         return {
             "success": True,
             "data": zones,
@@ -36,7 +33,7 @@ async def get_zone_details(
 ):
     """Get detailed information about a specific zone"""
     try:
-        zone = spatial_service.get_zone_details(zone_id)
+        zone = await spatial_service.get_zone_details_async(zone_id)
         if not zone:
             raise HTTPException(status_code=404, detail=f"Zone {zone_id} not found")
         
@@ -56,7 +53,7 @@ async def get_current_occupancy(
 ):
     """Get current occupancy for a zone"""
     try:
-        occupancy = spatial_service.get_current_occupancy(zone_id)
+        occupancy = await spatial_service.get_current_occupancy_async(zone_id)
         if not occupancy:
             raise HTTPException(status_code=404, detail=f"Zone {zone_id} not found")
         
@@ -77,7 +74,7 @@ async def get_zone_history(
 ):
     """Get historical occupancy data for a zone"""
     try:
-        history = spatial_service.get_historical_occupancy(zone_id, days_back)
+        history = await spatial_service.get_historical_occupancy_async(zone_id, days_back)
         return {
             "success": True,
             "data": history,
@@ -95,13 +92,9 @@ async def get_zone_forecast(
 ):
     """Get occupancy forecast for a zone"""
     try:
-        forecasts = []
         current_time = datetime.now()
-        
-        for hour in range(1, hours_ahead + 1):
-            target_time = current_time + timedelta(hours=hour)
-            forecast = spatial_service.predict_zone_occupancy(zone_id, target_time)
-            forecasts.append(forecast)
+        target_times = [current_time + timedelta(hours=hour) for hour in range(1, hours_ahead + 1)]
+        forecasts = await spatial_service.forecast_zone_occupancy_async(zone_id, target_times)
         
         return {
             "success": True,
@@ -122,7 +115,7 @@ async def get_zone_connections(
 ):
     """Get zones connected to the specified zone"""
     try:
-        connections = spatial_service.get_zone_connections(zone_id)
+        connections = await spatial_service.get_zone_connections_async(zone_id)
         return {
             "success": True,
             "data": {
@@ -138,7 +131,7 @@ async def get_zone_connections(
 async def get_campus_summary(spatial_service: SpatialForecastingService = Depends(get_spatial_service)):
     """Get overall campus activity summary"""
     try:
-        summary = spatial_service.get_campus_summary()
+        summary = await spatial_service.get_campus_summary_async()
         return {
             "success": True,
             "data": summary
@@ -0,0 +1,121 @@
+# backend/tests/test_anomaly_cache.py
+from datetime import date, datetime, time, timedelta, timezone
+
+from neo4j.time import DateTime
+
+from services.anomaly_cache import day_ranges, days_to_refresh, detect_days, window_rows
+from services.movement_analysis import find_impossible_travel, native_datetime, travel_lookahead_seconds
+
+DAY = date(2025, 1, 6)
+WALKING = {('LIB_ENT', 'GYM'): (300.0, 250), ('GYM', 'LIB_ENT'): (300.0, 250)}
+
+def swipe(entity_id: str, zone_id: str, at: datetime) -> dict:
+    return {'entity_id': entity_id, 'zone_id': zone_id,
+            'timestamp': DateTime.from_native(at.replace(tzinfo=timezone.utc))}
+
+def at(day_offset: int, hour: int, minute: int, second: int = 0) -> datetime:
+    return datetime.combine(DAY + timedelta(days=day_offset), time(hour, minute, second))
+
+def completed(detector: str, anomalies: list) -> dict:
+    return {'detector': detector, 'status': 'completed', 'seconds': 0.0,
+            'anomaly_count': len(anomalies), 'error': None}
+
+def detector_for(swipes: list):
+    """A fixed-window detector shaped like detect_all_anomalies_with_report()"""
+    def detect_day(day: date) -> dict:
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        end = datetime.combine(day, time(23, 59, 59), tzinfo=timezone.utc)
+        lookahead = end + timedelta(seconds=travel_lookahead_seconds(WALKING))
+        window = sorted(
+            (s for s in swipes if start <= native_datetime(s['timestamp']) <= lookahead),
+            key=lambda s: (s['entity_id'], native_datetime(s['timestamp']))
+        )
+        travel = [
+            {'id': f"travel_{a['entity_id']}_{native_datetime(a['timestamp']).isoformat()}",
+             'type': 'impossible_travel', 'location': b['zone_id'], 'severity': 'high',
+             'timestamp': native_datetime(a['timestamp']), 'description': '', 'entity_id': a['entity_id']}
+            for a, b, _, _, _ in find_impossible_travel(window, WALKING)
+            if native_datetime(a['timestamp']) <= end
+        ]
+        # Window aggregate, like underutilization: keyed and timestamped by the window start
+        in_day = [s for s in window if native_datetime(s['timestamp']) <= end]
+        busy = [
+            {'id': f"busy_{day}", 'type': 'busy', 'location': 'campus', 'severity': 'low',
+             'timestamp': start, 'description': f"{len(in_day)} swipes"}
+        ] if len(in_day) > 2 else []
+        return {'anomalies': travel + busy,
+                'detectors': [completed('travel', travel), completed('busy', busy)]}
+    return detect_day
+
+def fingerprints_for(swipes: list) -> dict:
+    days = {}
+    for s in swipes:
+        days.setdefault(native_datetime(s['timestamp']).date(), []).append(
+            (s['entity_id'], s['zone_id'], native_datetime(s['timestamp']).isoformat())
+        )
+    return {day: str(sorted(events)) for day, events in days.items()}
+
+class MemoryCache:
+    """The anomalies and anomaly_cache_windows tables, refreshed like cache_anomalies()"""
+
+    def __init__(self):
+        self.anomalies = {}
+        self.windows = {}
+
+    def refresh(self, swipes: list, full_refresh: bool = False) -> list:
+        fingerprints = fingerprints_for(swipes)
+        days = days_to_refresh(fingerprints, self.windows, full_refresh)
+        refreshed_days, rows = detect_days(detector_for(swipes), days)
+        if full_refresh:
+            self.anomalies = {}
+        for first_day, last_day in day_ranges(refreshed_days):
+            self.anomalies = {
+                key: row for key, row in self.anomalies.items()
+                if not first_day <= row['timestamp'].date() <= last_day
+            }
+        self.anomalies.update({row['id']: row for row in rows})
+        for day in refreshed_days:
+            self.windows.pop(day, None)
+        self.windows.update({
+            row['day']: row['fingerprint']
+            for row in window_rows(refreshed_days, rows, fingerprints, datetime.now())
+        })
+        return days
+
+def test_incremental_refresh_matches_full_refresh():
+    swipes = [
+        swipe('E1', 'LIB_ENT', at(0, 23, 58)),
+        swipe('E1', 'LIB_ENT', at(0, 9, 0)),
+        swipe('E1', 'GYM', at(0, 12, 0)),
+        swipe('E2', 'GYM', at(1, 8, 0)),
+        swipe('E2', 'GYM', at(1, 9, 0)),
+        swipe('E1', 'LIB_ENT', at(4, 10, 0)),
+    ]
+    cache = MemoryCache()
+    cache.refresh(swipes, full_refresh=True)
+    assert 'busy_2025-01-06' in cache.anomalies and 'busy_2025-01-07' not in cache.anomalies
+
+    # Only day 2 gains data, but it closes a travel pair that starts on day 1
+    swipes.append(swipe('E1', 'GYM', at(1, 0, 1)))
+    refreshed = cache.refresh(swipes)
+    assert refreshed == [DAY, DAY + timedelta(days=1)]
+    assert 'travel_E1_2025-01-06T23:58:00+00:00' in cache.anomalies
+    assert 'busy_2025-01-07' in cache.anomalies
+
+    full = MemoryCache()
+    full.refresh(swipes, full_refresh=True)
+    assert cache.anomalies == full.anomalies
+    assert cache.windows == full.windows
+    assert cache.refresh(swipes) == []
+
+def test_failed_day_keeps_cached_rows():
+    def detect_day(day: date) -> dict:
+        failed = {'detector': 'travel', 'status': 'timed_out', 'seconds': 30.0,
+                  'anomaly_count': 0, 'error': 'timeout'}
+        anomalies = [{'id': f"busy_{day}", 'timestamp': datetime.combine(day, time.min)}]
+        return {'anomalies': anomalies,
+                'detectors': [failed if day == DAY else completed('busy', anomalies)]}
+
+    refreshed_days, rows = detect_days(detect_day, [DAY, DAY + timedelta(days=1)])
+    assert refreshed_days == [DAY + timedelta(days=1)]
+    assert [row['id'] for row in rows] == ['busy_2025-01-07']
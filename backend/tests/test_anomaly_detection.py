@@ -0,0 +1,62 @@
+# backend/tests/test_anomaly_detection.py
+import threading
+from datetime import datetime, timezone
+
+from services.anomaly_detection import AnomalyDetectionService
+
+START = datetime(2025, 1, 6, tzinfo=timezone.utc)
+END = datetime(2025, 1, 7, tzinfo=timezone.utc)
+
+def service(workers: int, timeout: float) -> AnomalyDetectionService:
+    """A detection service without a database connection"""
+    service = AnomalyDetectionService.__new__(AnomalyDetectionService)
+    service.detector_workers = workers
+    service.detector_timeout_seconds = timeout
+    return service
+
+def test_run_detectors_matches_running_them_in_turn():
+    def found(kind: str):
+        return lambda start, end: [{'id': f"{kind}_{start.date()}", 'timestamp': end}]
+    detectors = [('overcrowding', found('crowd')), ('underutilization', lambda start, end: []),
+                 ('entity', found('entity'))]
+
+    reports = service(workers=2, timeout=5)._run_detectors(detectors, START, END)
+
+    assert [(r['detector'], r['status'], r['error']) for r in reports] == [
+        (name, 'completed', None) for name, _ in detectors
+    ]
+    assert [r['anomalies'] for r in reports] == [detector(START, END) for _, detector in detectors]
+    assert [r['anomaly_count'] for r in reports] == [1, 0, 1]
+
+def test_run_detectors_reports_failures_and_timeouts():
+    release = threading.Event()
+
+    def fails(start, end):
+        raise RuntimeError("query failed")
+
+    def hangs(start, end):
+        release.wait(5)
+        return [{'id': 'late'}]
+
+    detectors = [('hangs', hangs), ('fails', fails), ('works', lambda start, end: [{'id': 'ok'}])]
+    try:
+        reports = {r['detector']: r for r in service(workers=3, timeout=0.2)._run_detectors(detectors, START, END)}
+    finally:
+        release.set()
+
+    assert list(reports) == ['hangs', 'fails', 'works']
+    assert (reports['hangs']['status'], reports['hangs']['anomalies']) == ('timeout', [])
+    assert 'timeout' in reports['hangs']['error']
+    assert (reports['fails']['status'], reports['fails']['error']) == ('failed', 'query failed')
+    assert (reports['works']['status'], reports['works']['anomaly_count']) == ('completed', 1)
+
+def test_queued_detector_times_out_behind_a_hung_one():
+    release = threading.Event()
+    detectors = [('hangs', lambda start, end: release.wait(5) and []),
+                 ('queued', lambda start, end: [{'id': 'never'}])]
+    try:
+        reports = service(workers=1, timeout=0.2)._run_detectors(detectors, START, END)
+    finally:
+        release.set()
+
+    assert [(r['detector'], r['status']) for r in reports] == [('hangs', 'timeout'), ('queued', 'timeout')]
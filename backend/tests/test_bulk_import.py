@@ -0,0 +1,19 @@
+# backend/tests/test_bulk_import.py
+from services.bulk_import import BulkImportExporter
+
+PROFILES = """entity_id,name,role,email,department,student_id,staff_id,card_id,device_hash,face_id
+E1,Asha Rao,student,asha@campus.edu,CIVIL,S1,,C1,,
+E1,Asha Rao,student,asha@campus.edu,CIVIL,S1,,C1,,
+E2,Ravi Shah,student,ravi@campus.edu,Physics,S2,,,D2,
+"""
+
+def test_profiles_watermark_counts_file_rows(tmp_path):
+    data_dir = tmp_path / 'augmented'
+    data_dir.mkdir()
+    (data_dir / 'student_staff_profiles.csv').write_text(PROFILES)
+    exporter = BulkImportExporter(data_dir, tmp_path / 'import', {})
+    exporter.output_dir.mkdir()
+    exporter._write_headers()
+
+    assert exporter._export_entities() == 2
+    assert [(w['dataset'], w['row_offset']) for w in exporter.watermarks] == [('profiles', 3)]
@@ -0,0 +1,36 @@
+# backend/tests/test_confidence_scorer.py
+from services.confidence_scorer import ConfidenceScorer
+
+def test_score_links_matches_calculate_link_confidence():
+    shared = {
+        ('E1', 'E2'): ['card_id:C1'],
+        ('E1', 'E3'): ['email:a@x.edu', 'device_hash:D1'],
+        ('E2', 'E4'): ['card_id:C9'],
+        ('E3', 'E4'): [],
+    }
+    links = ConfidenceScorer.score_links(shared)
+
+    assert links == {
+        pair: (ConfidenceScorer.calculate_link_confidence([], [], keys), keys)
+        for pair, keys in shared.items() if keys
+    }
+    # Transitive pairs are not stored
+    assert ('E3', 'E4') not in links and ('E1', 'E4') not in links
+
+def test_score_entities_matches_calculate_entity_confidence():
+    identifiers = [
+        [],
+        [('card_id', 'swipes')],
+        [('student_id', 'profiles'), ('email', 'profiles'), ('card_id', 'swipes')],
+        [('device_hash', 'wifi'), ('device_hash', 'wifi'), ('badge', 'unknown_source')],
+        [('face_id', 'cctv'), ('entity_id', 'profiles'), ('card_id', 'profiles'), ('email', 'helpdesk')],
+    ]
+    owners = [position for position, ids in enumerate(identifiers) for _ in ids]
+    types = [id_type for ids in identifiers for id_type, _ in ids]
+    sources = [source for ids in identifiers for _, source in ids]
+
+    scores = ConfidenceScorer.score_entities(owners, types, sources, len(identifiers))
+    assert scores.tolist() == [
+        ConfidenceScorer.calculate_entity_confidence([{'type': t, 'source': s} for t, s in ids])
+        for ids in identifiers
+    ]
@@ -0,0 +1,102 @@
+# backend/tests/test_entity_resolver.py
+from datetime import datetime
+
+import pytest
+
+from models.entity import Observation
+from services.confidence_scorer import ConfidenceScorer
+from services.entity_resolver import EntityResolver
+
+PROFILES = """entity_id,name,role,email,department,student_id,staff_id,card_id,device_hash,face_id
+E1,Asha Rao,student,asha@campus.edu,CIVIL,S1,,C1,,
+E2,Ravi Shah,student,ravi@campus.edu,Physics,S2,,,D2,
+E3,Meera Iyer,staff,meera@campus.edu,Physics,,T3,C3,D3,
+E4,Asha R,student,asha.r@campus.edu,CIVIL,S4,,C1,,
+"""
+
+@pytest.fixture
+def resolver(tmp_path):
+    data_dir = tmp_path / 'augmented'
+    data_dir.mkdir()
+    (data_dir / 'student_staff_profiles.csv').write_text(PROFILES)
+    resolver = EntityResolver(data_dir)
+    resolver.build_entity_graph()
+    return resolver
+
+def test_co_observation_links_and_survives_snapshot(resolver, tmp_path):
+    assert resolver.cluster_of('E1') == resolver.cluster_of('E4')
+    assert resolver.cluster_of('E1') != resolver.cluster_of('E2')
+
+    result = resolver.observe([
+        Observation(identifiers={'card_id': 'C1', 'device_hash': 'D2'}, source='wifi',
+                    timestamp=datetime(2025, 1, 6, 9))
+    ])[0]
+    assert result['merged_cluster'] == 'E1'
+
+    confidence, shared = resolver.link_scores[('E1', 'E2')]
+    assert shared == ['card_id:C1', 'device_hash:D2'] and confidence > 0
+    linked = {link['entity_id']: link['confidence'] for link in resolver.linked_with_confidence('E2')}
+    assert linked['E1'] == confidence and linked['E4'] > 0
+
+    resolver.save_snapshot(tmp_path / 'cache')
+    restored = EntityResolver(resolver.data_dir)
+    assert restored.load_snapshot(tmp_path / 'cache')
+    assert restored.cluster_of('E2') == restored.cluster_of('E1') == 'E1'
+    assert restored.link_scores == resolver.link_scores
+
+def test_missing_dataset_is_missing_attribute(resolver):
+    assert not hasattr(resolver, 'face_embeddings')
+    assert getattr(resolver, 'face_embeddings', None) is None
+    assert len(resolver.build_face_index()) == 0
+
+    frames = resolver.profiles.assign(frame_id='F1')[['frame_id', 'face_id']].fillna('FACE_X')
+    assert resolver.resolve_unmatched_faces(frames).empty
+
+def test_entity_confidence_matches_calculate_entity_confidence(resolver):
+    for entity_id in resolver.entities:
+        entity = resolver.entities[entity_id]
+        identifiers = [identifier.model_dump() for identifier in entity.identifiers]
+        assert entity.confidence_score == ConfidenceScorer.calculate_entity_confidence(identifiers)
+
+@pytest.mark.parametrize('department,entity_type', [
+    (None, None), ('Physics', None), (None, 'student'), ('CIVIL', 'student'), ('Physics', 'faculty'),
+])
+def test_list_entities_pages_match_a_naive_filter(resolver, department, entity_type):
+    expected = [
+        entity_id for entity_id in resolver.entities
+        if department in (None, resolver.entities[entity_id].department)
+        and entity_type in (None, resolver.entities[entity_id].entity_type)
+    ]
+
+    paged, cursor = [], None
+    while True:
+        page, total, cursor = resolver.list_entities(department, entity_type, cursor=cursor, limit=1)
+        assert total == len(expected)
+        paged += [entity.entity_id for entity in page]
+        if cursor is None:
+            break
+    assert paged == expected
+
+    page, total, _ = resolver.list_entities(department, entity_type, skip=1, limit=2)
+    assert [entity.entity_id for entity in page] == expected[1:3]
+
+def test_snapshot_round_trip_matches_built_state(resolver, tmp_path):
+    resolver.observe([
+        Observation(identifiers={'card_id': 'C3', 'face_id': 'F3'}, source='cctv',
+                    timestamp=datetime(2025, 1, 6, 9))
+    ])
+    resolver.save_snapshot(tmp_path / 'cache')
+    restored = EntityResolver(resolver.data_dir)
+    assert restored.load_snapshot(tmp_path / 'cache')
+
+    assert list(restored.entities) == list(resolver.entities)
+    for entity_id in resolver.entities:
+        assert restored.entities[entity_id].model_dump(exclude={'updated_at'}) == \
+            resolver.entities[entity_id].model_dump(exclude={'updated_at'})
+    assert dict(restored.identifier_index) == dict(resolver.identifier_index)
+    assert restored.identifier_index['face_id:F3'] == ['E3']
+
+    def listing(r):
+        page, total, cursor = r.list_entities(department='Physics')
+        return [entity.entity_id for entity in page], total, cursor
+    assert listing(restored) == listing(resolver)
@@ -0,0 +1,21 @@
+# backend/tests/test_entity_routes.py
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+import entity_routes
+from models.entity import Observation
+
+def test_observations_reject_unknown_identifier_types(monkeypatch):
+    monkeypatch.setattr(entity_routes, 'get_resolver', lambda: pytest.fail("resolver should not be used"))
+    observations = [
+        Observation(identifiers={'card_id': 'C1234'}, source='swipes', timestamp=datetime(2025, 1, 6, 9)),
+        Observation(identifiers={'badge_no': '42'}, source='swipes', timestamp=datetime(2025, 1, 6, 9)),
+    ]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(entity_routes.observe_identifiers(observations))
+    assert error.value.status_code == 422
+    assert 'badge_no' in error.value.detail
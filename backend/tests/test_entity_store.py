@@ -0,0 +1,77 @@
+# backend/tests/test_entity_store.py
+from datetime import datetime
+
+import numpy as np
+
+from models.entity import Entity, Identifier
+from services.entity_store import EntityStore
+
+BUILT = datetime(2025, 1, 1)
+
+def identifier(id_type: str, value: str, source: str = 'profiles', seen: datetime = BUILT) -> Identifier:
+    return Identifier(type=id_type, value=value, source=source, first_seen=seen, last_seen=seen)
+
+def baseline_entities() -> list:
+    """Entities the way the resolver held them before the columnar store"""
+    return [
+        Entity(entity_id='E1', name='Asha Rao', email='asha@campus.edu', entity_type='student',
+               department='CIVIL', cluster_id='E1', confidence_score=0.9, created_at=BUILT,
+               identifiers=[identifier('student_id', 'S1'), identifier('card_id', 'C1')]),
+        Entity(entity_id='E2', name='Ravi Shah', entity_type='student', cluster_id='E2',
+               confidence_score=0.8, created_at=BUILT, identifiers=[identifier('device_hash', 'D2')]),
+        Entity(entity_id='E3', name='Meera Iyer', entity_type='staff', department='Physics',
+               cluster_id='E3', confidence_score=0.0, created_at=BUILT),
+    ]
+
+def as_tuples(entity: Entity) -> tuple:
+    return (
+        entity.entity_id, entity.name, entity.email, entity.entity_type, entity.department,
+        entity.cluster_id, entity.confidence_score,
+        [(i.type, i.value, i.source, i.confidence, i.first_seen, i.last_seen) for i in entity.identifiers]
+    )
+
+def test_store_matches_pydantic_entities_and_round_trips():
+    entities = baseline_entities()
+    store = EntityStore.from_entities(entities)
+
+    assert [as_tuples(store[entity.entity_id]) for entity in entities] == [as_tuples(e) for e in entities]
+    for entity in entities:
+        for id_type in ('student_id', 'card_id', 'device_hash', 'face_id'):
+            expected = entity.get_identifier(id_type)
+            assert store.get_identifier(entity.entity_id, id_type) == (expected.value if expected else None)
+
+    arrays = store.to_arrays()
+    assert all(array.dtype != object for array in arrays.values())
+    restored = EntityStore.from_arrays(arrays)
+    assert [as_tuples(restored[entity_id]) for entity_id in restored] == [as_tuples(e) for e in entities]
+
+def test_record_identifier_matches_add_identifier_and_compacts():
+    entities = {entity.entity_id: entity for entity in baseline_entities()}
+    store = EntityStore.from_entities(entities.values())
+    seen = datetime(2025, 1, 6, 9)
+    observed = [
+        ('E1', 'card_id', 'C1', 'profiles'),    # already held: timestamps move
+        ('E1', 'card_id', 'C7', 'swipes'),      # different value of a held type: conflict
+        ('E2', 'card_id', 'C2', 'swipes'),      # new type: added
+        ('E3', 'face_id', 'F3', 'cctv'),        # first identifier of an entity: added
+    ]
+
+    outcomes = []
+    for entity_id, id_type, value, source in observed:
+        entities[entity_id].add_identifier(identifier(id_type, value, source, seen))
+        outcomes.append(store.record_identifier(entity_id, id_type, value, source, seen))
+    assert outcomes == ['updated', 'conflict', 'added', 'added']
+
+    def pairs(identifiers) -> list:
+        return [(i.type, i.value) for i in identifiers]
+
+    overlaid = {entity_id: store[entity_id] for entity_id in store}
+    store.compact()
+    assert store.overlay == {}
+    for entity_id, entity in entities.items():
+        assert pairs(store[entity_id].identifiers) == pairs(entity.identifiers)
+        assert as_tuples(store[entity_id]) == as_tuples(overlaid[entity_id])
+
+    card = store['E1'].identifiers[1]
+    assert (card.first_seen, card.last_seen) == (BUILT, seen)
+    np.testing.assert_array_equal(store.identifier_offsets, [0, 2, 4, 5])
@@ -0,0 +1,22 @@
+# backend/tests/test_fuzzy_index.py
+from services import fuzzy_index
+from services.fuzzy_index import PARALLEL_MIN_BATCH, FuzzyNameIndex, close_pool
+
+def test_search_many_reuses_one_pool_per_index():
+    index = FuzzyNameIndex((f"E{i}", f"person number {i}") for i in range(50))
+    names = [f"person number {i}" for i in range(PARALLEL_MIN_BATCH)]
+    try:
+        first = index.search_many(names, threshold=0.9, max_workers=2)
+        pool = fuzzy_index._pool
+        assert pool is not None
+        assert index.search_many(names, threshold=0.9, max_workers=2) == first
+        assert fuzzy_index._pool is pool
+
+        assert first == [index.search(name, 0.9)[:1] for name in names]
+
+        rebuilt = FuzzyNameIndex((f"E{i}", f"person number {i}") for i in range(50))
+        rebuilt.search_many(names, threshold=0.9, max_workers=2)
+        assert fuzzy_index._pool is not pool
+    finally:
+        close_pool()
+    assert fuzzy_index._pool is None
@@ -0,0 +1,82 @@
+# backend/tests/test_graph_builder.py
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from services.graph_builder import CampusGraphBuilder
+
+@pytest.fixture
+def builder():
+    """A builder with a preloaded identifier map and no database connection"""
+    builder = CampusGraphBuilder.__new__(CampusGraphBuilder)
+    builder.batch_size = CampusGraphBuilder.DEFAULT_BATCH_SIZE
+    builder.identifier_map = {'card_id': {'C1': 'E1', 'C2': 'E2'}, 'device_hash': {}, 'face_id': {}}
+    return builder
+
+def swipe_rows(builder, swipes: pd.DataFrame):
+    swipes, entity_ids = builder._resolve_entity_ids(swipes, 'card_id')
+    return builder._event_rows(swipes, entity_ids=entity_ids, id_prefix='SWIPE_', event_type='swipe',
+                               timestamps=swipes['timestamp'], location=swipes['location_id'],
+                               source_dataset='swipes')
+
+def test_swipe_event_ids_follow_row_content_not_position(builder):
+    swipes = pd.DataFrame({
+        'card_id': ['C1', 'C2', 'C9'],
+        'location_id': ['LIB_ENT', 'GYM', 'GYM'],
+        'timestamp': ['2025-01-06 09:00:00', '9/6/2025 10:30', '2025-01-06 11:00:00'],
+    })
+    rows = swipe_rows(builder, swipes)
+    reordered = swipe_rows(builder, swipes.iloc[::-1].reset_index(drop=True))
+
+    assert [row['event_id'] for row in rows] == [
+        'SWIPE_E1_LIB_ENT_2025-01-06T09:00:00', 'SWIPE_E2_GYM_2025-09-06T10:30:00'
+    ]
+    assert sorted(row['event_id'] for row in reordered) == sorted(row['event_id'] for row in rows)
+
+def test_sources_reusing_an_id_get_distinct_event_ids(builder):
+    records = pd.DataFrame({'entity_id': ['E1'], 'record_id': ['R100'], 'timestamp': ['2025-01-06T09:00:00']})
+    ids = [
+        builder._event_rows(records, entity_ids=records['entity_id'], id_prefix=prefix,
+                            event_ids=records['record_id'], event_type='event',
+                            timestamps=records['timestamp'], location='Library',
+                            source_dataset='test')[0]['event_id']
+        for prefix in ('LIB_', 'BOOK_', 'NOTE_', 'CCTV_')
+    ]
+    assert ids == ['LIB_R100', 'BOOK_R100', 'NOTE_R100', 'CCTV_R100']
+
+def per_row_swipe_events(builder, swipes: pd.DataFrame) -> list:
+    """One lookup and one timestamp parse per row, as events were built before batching"""
+    events = []
+    for row in swipes.to_dict('records'):
+        entity_id = builder.identifier_map['card_id'].get(str(row['card_id']))
+        if entity_id is None:
+            continue
+        try:
+            timestamp = datetime.fromisoformat(row['timestamp'])
+        except (TypeError, ValueError):
+            try:
+                timestamp = datetime.strptime(row['timestamp'], '%m/%d/%Y %H:%M')
+            except (TypeError, ValueError):
+                continue
+        iso = timestamp.isoformat()
+        events.append({
+            'entity_id': entity_id,
+            'event_id': f"SWIPE_{entity_id}_{row['location_id']}_{iso}",
+            'event_type': 'swipe',
+            'timestamp': iso,
+            'location': row['location_id'],
+            'source_dataset': 'swipes',
+        })
+    return events
+
+def test_batched_swipe_rows_match_per_row_baseline(builder):
+    swipes = pd.DataFrame({
+        'card_id': ['C1', 'C9', 'C2', 'C1', None, 'C2'],
+        'location_id': ['LIB_ENT', 'GYM', 'GYM', 'LAB_101', 'GYM', 'LIB_ENT'],
+        'timestamp': ['2025-01-06 09:00:00', '2025-01-06 09:05:00', '9/6/2025 10:30',
+                      'not a time', '2025-01-06 11:00:00', None],
+    })
+    rows = swipe_rows(builder, swipes)
+    assert rows == per_row_swipe_events(builder, swipes)
+    assert [row['entity_id'] for row in rows] == ['E1', 'E2']
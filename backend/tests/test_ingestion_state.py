@@ -0,0 +1,76 @@
+# backend/tests/test_ingestion_state.py
+from services.ingestion_state import HEAD_BYTES, IngestionWatermarkStore, file_checksum
+
+class MemoryWatermarkStore(IngestionWatermarkStore):
+    """Watermarks kept in a dict instead of the graph"""
+
+    def __init__(self):
+        super().__init__(driver=None)
+        self.watermarks = {}
+
+    def get(self, dataset):
+        return self.watermarks.get(dataset)
+
+    def save(self, dataset, row_offset, last_timestamp, head_checksum, file_checksum=None,
+             loaded_bytes=None, loaded_checksum=None):
+        self.watermarks[dataset] = {
+            'row_offset': row_offset, 'last_timestamp': last_timestamp, 'head_checksum': head_checksum,
+            'file_checksum': file_checksum, 'loaded_bytes': loaded_bytes, 'loaded_checksum': loaded_checksum
+        }
+
+def rows(count: int, value: str = 'x') -> str:
+    # Rows long enough that the loaded range runs well past the hashed head
+    return ''.join(f"{i},{value * 300}\n" for i in range(count))
+
+def partial_load(store, path, row_offset: int = 400):
+    """Record a crashed load of the file as it is now"""
+    _, _, fingerprint = store.plan('swipes', path)
+    store.save('swipes', row_offset, None, fingerprint['head_checksum'],
+               loaded_bytes=fingerprint['loaded_bytes'], loaded_checksum=fingerprint['loaded_checksum'])
+
+def test_file_checksum_of_prefix(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(b'abcdef')
+    prefix = tmp_path / 'prefix.csv'
+    prefix.write_bytes(b'abc')
+    assert file_checksum(path, block_size=2, size=3) == file_checksum(prefix)
+    assert file_checksum(path, size=100) == file_checksum(path)
+
+def test_resume_only_when_loaded_bytes_unchanged(tmp_path):
+    path = tmp_path / 'swipes.csv'
+    path.write_text(rows(500))
+    assert path.stat().st_size > 2 * HEAD_BYTES
+    store = MemoryWatermarkStore()
+
+    partial_load(store, path)
+    path.write_text(rows(500) + rows(10, 'y'))
+    start_row, reason, _ = store.plan('swipes', path)
+    assert start_row == 400, reason
+
+    # Same head, same size, but a row the previous load already read was edited
+    path.write_text(rows(500))
+    partial_load(store, path)
+    text = path.read_text()
+    edited = len(text) - 1000
+    path.write_text(text[:edited] + 'z' + text[edited + 1:])
+    assert path.stat().st_size == store.watermarks['swipes']['loaded_bytes']
+    start_row, reason, _ = store.plan('swipes', path)
+    assert (start_row, reason) == (0, "previously loaded bytes changed, reloading")
+
+    # Truncated below what was loaded
+    path.write_text(rows(500))
+    partial_load(store, path)
+    path.write_text(rows(450))
+    assert store.plan('swipes', path)[0] == 0
+
+def test_watermark_without_loaded_range_reloads(tmp_path):
+    path = tmp_path / 'swipes.csv'
+    path.write_text(rows(500))
+    store = MemoryWatermarkStore()
+    _, _, fingerprint = store.plan('swipes', path)
+    store.save('swipes', 400, None, fingerprint['head_checksum'])
+    assert store.plan('swipes', path)[0] == 0
+
+    store.save('swipes', 500, None, fingerprint['head_checksum'], fingerprint['file_checksum'],
+               fingerprint['loaded_bytes'], fingerprint['loaded_checksum'])
+    assert store.plan('swipes', path)[0] is None
@@ -0,0 +1,66 @@
+# backend/tests/test_movement_analysis.py
+from datetime import datetime, timedelta
+
+from neo4j.time import DateTime
+
+from services.movement_analysis import (
+    find_impossible_travel, find_location_conflicts, group_by_entity, merge_presence,
+    native_datetime, walking_times, windowed_pairs
+)
+
+T0 = datetime(2025, 1, 6, 10, 0, 0)
+
+def neo4j_time(offset_seconds: int) -> DateTime:
+    """The driver's DateTime type, as returned for relationship timestamps"""
+    return DateTime.from_native(T0 + timedelta(seconds=offset_seconds))
+
+def swipe(entity_id: str, zone_id: str, offset_seconds: int) -> dict:
+    return {'entity_id': entity_id, 'zone_id': zone_id, 'timestamp': neo4j_time(offset_seconds)}
+
+def presence(entity_id: str, zone_id: str, offset_seconds: int, source: str = 'wifi', ap_id=None) -> dict:
+    return {'entity_id': entity_id, 'zone_id': zone_id, 'ap_id': ap_id, 'source': source,
+            'timestamp': neo4j_time(offset_seconds)}
+
+def test_native_datetime_converts_neo4j_datetime():
+    converted = native_datetime(neo4j_time(30))
+    assert isinstance(converted, datetime)
+    assert converted == T0 + timedelta(seconds=30)
+    assert native_datetime(T0) is T0
+
+def test_impossible_travel_uses_walking_times():
+    walking = walking_times([
+        {'from_zone': 'CAF_01', 'to_zone': 'GYM', 'distance_meters': 200, 'walking_time_minutes': 3}
+    ])
+    swipes = [
+        swipe('E1', 'CAF_01', 0),
+        swipe('E1', 'GYM', 100),       # 100s < 180s walking time
+        swipe('E1', 'LIB_ENT', 400),   # no edge, 300s >= 120s default
+        swipe('E2', 'GYM', 401),       # different entity, never paired with E1
+    ]
+    violations = list(find_impossible_travel(swipes, walking))
+    assert [(a['zone_id'], b['zone_id'], elapsed, required) for a, b, elapsed, required, _ in violations] == [
+        ('CAF_01', 'GYM', 100.0, 180.0)
+    ]
+
+def test_windowed_pairs_and_conflicts_with_neo4j_datetimes():
+    swipes = [swipe('E1', 'CAF_01', 0), swipe('E1', 'LAB_101', 3600), swipe('E2', 'GYM', 0)]
+    wifi = [
+        presence('E1', 'LIB_ENT', 120, ap_id='AP_LIB_1'),
+        presence('E1', 'LAB_102', 3650, ap_id='AP_LAB_3'),  # same AP group as LAB_101
+        presence('E2', 'GYM', 30, ap_id='AP_GYM_1'),
+    ]
+    cctv = [presence('E1', 'CAF_01', 60, source='cctv')]
+    merged = list(merge_presence(wifi, cctv))
+    assert [p['source'] for p in merged] == ['cctv', 'wifi', 'wifi', 'wifi']
+
+    pairs = list(windowed_pairs(swipes, merged, 300))
+    assert len(pairs) == 4
+
+    conflicts = list(find_location_conflicts(swipes, merged, 300))
+    assert [(s['zone_id'], p['zone_id'], offset) for s, p, offset in conflicts] == [('CAF_01', 'LIB_ENT', 120.0)]
+
+def test_group_by_entity_aligns_streams():
+    swipes = [swipe('E1', 'CAF_01', 0), swipe('E3', 'GYM', 0)]
+    wifi = [presence('E0', 'GYM', 0), presence('E3', 'GYM', 10), presence('E4', 'GYM', 0)]
+    groups = [(entity_id, len(events), len(others)) for entity_id, events, others in group_by_entity(swipes, wifi)]
+    assert groups == [('E1', 1, 0), ('E3', 1, 1)]
@@ -0,0 +1,45 @@
+# backend/tests/test_spatial_forecasting.py
+import asyncio
+from datetime import datetime, timedelta
+
+from services.spatial_forecasting import (
+    OCCUPANCY_PATTERN_QUERY, OCCUPANCY_PATTERNS_QUERY, SpatialForecastingService
+)
+
+# (hour, day_of_week, occupancy) SpatialActivity buckets of one zone
+ACTIVITIES = [(9, 1, 10), (9, 1, 14), (10, 1, 30), (9, 2, 5), (23, 7, 2)]
+
+class InMemoryForecasting(SpatialForecastingService):
+    """Answers the pattern queries from ACTIVITIES, counting round trips"""
+
+    def __init__(self):
+        super().__init__(driver=object())
+        self.queries = []
+
+    async def _fetch_async(self, query, **params):
+        self.queries.append(query)
+        def record(matching):
+            return {'avg_occupancy': sum(matching) / len(matching) if matching else None,
+                    'data_points': len(matching)}
+        if query == OCCUPANCY_PATTERN_QUERY:
+            return [record([occ for hour, day, occ in ACTIVITIES
+                            if (hour, day) == (params['target_hour'], params['target_day_of_week'])])]
+        assert query == OCCUPANCY_PATTERNS_QUERY
+        return [
+            {'hour': hour, 'day_of_week': day, **record([occ for h, d, occ in ACTIVITIES if (h, d) == (hour, day)])}
+            for hour, day in map(tuple, params['slots'])
+            if any((h, d) == (hour, day) for h, d, _ in ACTIVITIES)
+        ]
+
+def test_forecast_matches_per_hour_predictions_in_one_query():
+    service = InMemoryForecasting()
+    start = datetime(2025, 1, 6, 8)  # a Monday
+    targets = [start + timedelta(hours=hour) for hour in range(1, 169)]
+
+    forecasts = asyncio.run(service.forecast_zone_occupancy_async('LIB_ENT', targets))
+    assert service.queries == [OCCUPANCY_PATTERNS_QUERY]
+
+    async def baseline():
+        return [await service.predict_zone_occupancy_async('LIB_ENT', target) for target in targets]
+    assert forecasts == asyncio.run(baseline())
+    assert forecasts[0]['predicted_occupancy'] == 12 and forecasts[2]['data_points_used'] == 0